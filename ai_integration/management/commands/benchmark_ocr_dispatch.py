@@ -0,0 +1,56 @@
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from ai_integration.models import OCRJob
+from ai_integration.services.ocr_dispatch import dispatch_to_ocr_engine
+from ai_integration.testing import StubOCREngine
+from files.models import File
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure OCR dispatch throughput through the pooled engine client "
+        "against a local stub engine (nothing is written to the database)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=200,
+            help='Number of jobs to dispatch'
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=4,
+            help='Number of threads dispatching at once'
+        )
+        parser.add_argument(
+            '--delay',
+            type=float,
+            default=0,
+            help='Seconds the stub engine waits before answering each request'
+        )
+
+    def handle(self, *args, **options):
+        jobs = [
+            OCRJob(job_id=uuid.uuid4(), file=File(s3_key=f"offers/benchmark-{index}.pdf"))
+            for index in range(options['requests'])
+        ]
+
+        with StubOCREngine(delay=options['delay']) as engine:
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+                for _ in executor.map(lambda job: dispatch_to_ocr_engine(job=job, url=engine.url), jobs):
+                    pass
+            elapsed = time.perf_counter() - started
+
+        self.stdout.write(f"  Connections opened: {engine.connections}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Dispatched {len(engine.requests)} jobs in {elapsed:.2f}s "
+            f"({len(engine.requests) / elapsed:.0f} jobs/s)"
+        ))
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.11 on 2026-10-18 15:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_integration', '0010_rename_ocrresults_ocrresult_alter_ocrresult_table'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OCRResultUpload',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('next_sequence', models.PositiveIntegerField(default=0)),
+                ('current_company', models.CharField(blank=True, max_length=255, null=True)),
+                ('item_count', models.PositiveIntegerField(default=0)),
+                ('confidence_total', models.FloatField(default=0)),
+                ('review_required', models.BooleanField(default=False)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='result_uploads', to='ai_integration.ocrjob')),
+                ('result', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='upload', to='ai_integration.ocrresult')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(condition=models.Q(('completed_at__isnull', True)), fields=('job',), name='ocr_result_upload_one_open_per_job')],
+            },
+        ),
+    ]
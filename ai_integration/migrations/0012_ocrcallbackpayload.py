@@ -0,0 +1,30 @@
+# Generated by Django 5.2.11 on 2026-10-18 15:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_integration', '0011_ocrresultupload'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OCRCallbackPayload',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('payload', models.JSONField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processed', 'Processed'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('error_message', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='callback_payloads', to='ai_integration.ocrjob')),
+                ('result', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='ai_integration.ocrresult')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'created_at'], name='ai_integrat_status_4ae58a_idx')],
+            },
+        ),
+    ]
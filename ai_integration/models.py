@@ -18,6 +18,8 @@ class OCRJob(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     retries = models.IntegerField(default=0)
     error_message = models.TextField(blank=True, null=True)
+    # Set while a batch flush holds the job (see services.ocr_batch)
+    claimed_at = models.DateTimeField(blank=True, null=True)
 
     def __str__(self):
         return f"OCRJob for {self.file.original_filename} - {self.status}" 
@@ -63,3 +65,58 @@ class OCRResultItem(models.Model):
     extracted_unit_price = models.DecimalField(max_digits=10, decimal_places=2)
 
 
+class OCRResultUpload(models.Model):
+    """
+    Progress of a result the OCR engine delivers in numbered chunks. Its
+    OCRResult stays "receiving" until the completion message arrives.
+    """
+    job = models.ForeignKey(OCRJob, on_delete=models.CASCADE, related_name='result_uploads')
+    result = models.OneToOneField(OCRResult, on_delete=models.CASCADE, related_name='upload')
+    next_sequence = models.PositiveIntegerField(default=0)
+    # Company header in effect at the end of the last chunk (raw tables).
+    current_company = models.CharField(max_length=255, blank=True, null=True)
+    item_count = models.PositiveIntegerField(default=0)
+    confidence_total = models.FloatField(default=0)
+    review_required = models.BooleanField(default=False)
+    completed_at = models.DateTimeField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"OCRResultUpload for job {self.job_id} - {self.next_sequence} chunks"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['job'],
+                condition=models.Q(completed_at__isnull=True),
+                name='ocr_result_upload_one_open_per_job'
+            ),
+        ]
+
+
+class OCRCallbackPayload(models.Model):
+    """
+    Raw callback body staged by the result endpoint when callbacks are
+    ingested in the background (OCR_CALLBACK_ASYNC).
+    """
+    CallbackStatus = [
+        ('pending', 'Pending'),
+        ('processed', 'Processed'),
+        ('failed', 'Failed'),
+    ]
+    job = models.ForeignKey(OCRJob, on_delete=models.CASCADE, related_name='callback_payloads')
+    payload = models.JSONField()
+    status = models.CharField(max_length=20, choices=CallbackStatus, default='pending')
+    result = models.ForeignKey(OCRResult, null=True, blank=True, on_delete=models.SET_NULL, related_name='+')
+    error_message = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f"OCRCallbackPayload for job {self.job_id} - {self.status}"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
@@ -49,7 +49,18 @@ class OCRResultSerializer(serializers.Serializer):
         raise serializers.ValidationError(
             "Payload must include either 'items' or at least one '*_raw_steps' list."
         )
-    
+
+
+class OCRResultChunkSerializer(OCRResultSerializer):
+    """Validates one chunk (e.g. one page) of a result delivered in parts."""
+    sequence = serializers.IntegerField(min_value=0)
+
+
+class OCRResultCompleteSerializer(serializers.Serializer):
+    """Validates the completion message closing a chunked result."""
+    job_id = serializers.UUIDField()
+    chunk_count = serializers.IntegerField(min_value=1)
+
 
 # ── Frontend-facing serializers ────────────────────────────────────────────────
 
@@ -0,0 +1,159 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, F, Q, Value, When
+from django.utils import timezone
+
+from ai_integration.models import OCRJob
+from ai_integration.services.ocr_dispatch import OCRDispatchError, dispatch_batch_to_ocr_engine
+from ai_integration.services.target_items import target_items_fields
+from files.models import File
+
+logger = logging.getLogger(__name__)
+
+# Batched OCR dispatch.
+#
+# With OCR_DISPATCH_BATCH_WINDOW_SECONDS > 0, uploads leave their OCRJob
+# "queued" and only make sure a flush is scheduled: once the window has
+# passed, or as soon as OCR_DISPATCH_BATCH_SIZE jobs are waiting, the queued
+# jobs are claimed and sent to the engine in requests of up to
+# OCR_DISPATCH_BATCH_SIZE jobs that share one target_items snapshot. Job and
+# file statuses are updated in bulk. Batching needs the engine's batch
+# endpoint (OCR_ENGINE_BATCH_PROCESS_URL); without it jobs go one by one.
+#
+# Claimed jobs are "processing" with a claimed_at time. A claim older than
+# OCR_DISPATCH_CLAIM_TIMEOUT_SECONDS belongs to a flush that died, and the
+# next flush (at the latest the periodic one) takes the job over.
+#
+# A failed request puts its jobs back in the queue for a later flush until
+# they run out of retries; until that retry runs, new uploads do not schedule
+# a flush of their own.
+
+BATCH_SCHEDULED_KEY = "ai_integration:ocr-batch:scheduled"
+RETRY_SCHEDULED = "retry"
+MAX_DISPATCH_RETRIES = 3
+
+
+def batch_window() -> int:
+    return getattr(settings, "OCR_DISPATCH_BATCH_WINDOW_SECONDS", 0)
+
+
+def batch_size() -> int:
+    return getattr(settings, "OCR_DISPATCH_BATCH_SIZE", 25)
+
+
+def claim_timeout() -> int:
+    return getattr(settings, "OCR_DISPATCH_CLAIM_TIMEOUT_SECONDS", 300)
+
+
+def batch_dispatch_enabled() -> bool:
+    return batch_window() > 0 and bool(getattr(settings, "OCR_ENGINE_BATCH_PROCESS_URL", None))
+
+
+def schedule_batch_dispatch() -> None:
+    """Make sure the queued jobs are flushed once the current transaction commits."""
+    transaction.on_commit(_schedule_flush, robust=True)
+
+
+def _schedule_flush() -> None:
+    from ai_integration.tasks import dispatch_ocr_batch
+
+    if cache.get(BATCH_SCHEDULED_KEY) == RETRY_SCHEDULED:
+        return
+    if OCRJob.objects.filter(status="queued").count() >= batch_size():
+        dispatch_ocr_batch.delay()
+        return
+    window = batch_window()
+    if cache.add(BATCH_SCHEDULED_KEY, True, window * 2):
+        dispatch_ocr_batch.apply_async(countdown=window)
+
+
+def flush_ocr_batches() -> dict:
+    """
+    Dispatch every queued job, batch_size() jobs per engine request.
+    Returns the number of jobs dispatched, requeued and failed.
+    """
+    # Clear the flag first: jobs queued from here on schedule the next flush,
+    # everything queued before it is claimed below.
+    cache.delete(BATCH_SCHEDULED_KEY)
+    summary = {"dispatched": 0, "requeued": 0, "failed": 0}
+    target_fields = None
+
+    while True:
+        jobs = _claim_queued_jobs(batch_size())
+        if not jobs:
+            break
+        if target_fields is None:
+            target_fields = target_items_fields()
+
+        try:
+            dispatch_batch_to_ocr_engine(jobs=jobs, target_fields=target_fields)
+        except OCRDispatchError as e:
+            requeued, failed = _release_failed_jobs(jobs, str(e))
+            summary["requeued"] += requeued
+            summary["failed"] += failed
+            # The rest of the queue waits for the retry as well.
+            if requeued:
+                _schedule_retry(min(job.retries for job in jobs))
+            break
+
+        OCRJob.objects.filter(id__in=[job.id for job in jobs]).update(
+            status="dispatched", error_message=None, claimed_at=None, updated_at=timezone.now()
+        )
+        summary["dispatched"] += len(jobs)
+        if len(jobs) < batch_size():
+            break
+
+    return summary
+
+
+def _claim_queued_jobs(limit: int) -> list[OCRJob]:
+    now = timezone.now()
+    abandoned = Q(status="processing", claimed_at__lt=now - timedelta(seconds=claim_timeout()))
+    with transaction.atomic():
+        jobs = list(
+            OCRJob.objects.select_for_update(skip_locked=True, of=("self",))
+            .select_related("file")
+            .filter(Q(status="queued") | abandoned)
+            .order_by("id")[:limit]
+        )
+        if jobs:
+            OCRJob.objects.filter(id__in=[job.id for job in jobs]).update(
+                status="processing", error_message=None, claimed_at=now, updated_at=now
+            )
+            File.objects.filter(id__in=[job.file_id for job in jobs]).update(status="processing")
+    return jobs
+
+
+def _release_failed_jobs(jobs: list[OCRJob], error: str) -> tuple[int, int]:
+    job_ids = [job.id for job in jobs]
+    with transaction.atomic():
+        OCRJob.objects.filter(id__in=job_ids).update(
+            retries=F("retries") + 1,
+            error_message=error,
+            claimed_at=None,
+            status=Case(
+                When(retries__gte=MAX_DISPATCH_RETRIES, then=Value("failed")),
+                default=Value("queued"),
+            ),
+            updated_at=timezone.now(),
+        )
+        failed = OCRJob.objects.filter(id__in=job_ids, status="failed")
+        failed_count = failed.count()
+        if failed_count:
+            File.objects.filter(id__in=failed.values("file_id")).update(status="failed")
+    logger.warning(f"Batch dispatch of {len(jobs)} jobs failed ({failed_count} out of retries): {error}")
+    return len(jobs) - failed_count, failed_count
+
+
+def _schedule_retry(previous_retries: int) -> None:
+    from ai_integration.tasks import dispatch_ocr_batch
+
+    # Same backoff as the per-job task: 10s, 20s, 40s. The flag stops new
+    # uploads from scheduling an earlier flush that would skip the backoff.
+    countdown = 10 * (2 ** previous_retries)
+    cache.set(BATCH_SCHEDULED_KEY, RETRY_SCHEDULED, countdown)
+    dispatch_ocr_batch.apply_async(countdown=countdown)
@@ -0,0 +1,99 @@
+import os
+import threading
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# HTTP client for the OCR engine.
+#
+# Every call to the engine goes through one requests.Session per process, so
+# connections are pooled and kept alive across dispatches (and across the
+# Celery tasks a worker runs) instead of paying a TCP/TLS handshake each time.
+# The session is rebuilt after a fork, since pooled sockets must not be shared
+# between processes, and whenever the OCR_ENGINE_* pool settings change.
+#
+# Timeouts are split: OCR_ENGINE_CONNECT_TIMEOUT_SECONDS bounds establishing a
+# connection, OCR_ENGINE_TIMEOUT_SECONDS waiting for the engine's response.
+# Failed connects and 503 answers are retried with backoff up to
+# OCR_ENGINE_MAX_RETRIES times: in both cases the engine has not accepted the
+# job. Read timeouts and 502/504 answers, after which the engine may already
+# be processing it, are not resent here; that is left to the dispatch task's
+# own retries.
+
+RETRY_STATUSES = (503,)
+
+
+class OCREngineClient:
+    def __init__(self, *, pool_size: int, max_retries: int, backoff: float):
+        retry = Retry(
+            total=max_retries,
+            connect=max_retries,
+            read=0,
+            status=max_retries,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=None,
+            backoff_factor=backoff,
+            raise_on_status=False,
+            respect_retry_after_header=True,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=True, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        kwargs.setdefault("timeout", request_timeout())
+        headers = {"Authorization": settings.AI_ENGINE_API_KEY, **kwargs.pop("headers", {})}
+        return self.session.post(url, headers=headers, **kwargs)
+
+    def close(self) -> None:
+        self.session.close()
+
+
+def request_timeout() -> tuple[float, float]:
+    """(connect, read) timeout for one engine request."""
+    return (
+        getattr(settings, "OCR_ENGINE_CONNECT_TIMEOUT_SECONDS", 5),
+        getattr(settings, "OCR_ENGINE_TIMEOUT_SECONDS", 30),
+    )
+
+
+def _client_config() -> dict:
+    return {
+        "pool_size": getattr(settings, "OCR_ENGINE_POOL_SIZE", 10),
+        "max_retries": getattr(settings, "OCR_ENGINE_MAX_RETRIES", 2),
+        "backoff": getattr(settings, "OCR_ENGINE_RETRY_BACKOFF_SECONDS", 0.5),
+    }
+
+
+_client = None
+_client_key = None
+_client_lock = threading.Lock()
+
+
+def get_ocr_client() -> OCREngineClient:
+    """The process-wide OCR engine client."""
+    global _client, _client_key
+
+    config = _client_config()
+    key = (os.getpid(), tuple(sorted(config.items())))
+    with _client_lock:
+        if _client_key != key:
+            if _client is not None and _client_key[0] == key[0]:
+                _client.close()
+            _client = OCREngineClient(**config)
+            _client_key = key
+        return _client
+
+
+def reset_ocr_client() -> None:
+    """Drop the pooled session; the next call builds a fresh one."""
+    global _client, _client_key
+
+    with _client_lock:
+        if _client is not None and _client_key[0] == os.getpid():
+            _client.close()
+        _client = None
+        _client_key = None
@@ -1,9 +1,9 @@
 import logging
 import requests
 from django.conf import settings
-from django.db.models import F
 from ai_integration.models import OCRJob
-from inventory.models import Inventory
+from ai_integration.services.ocr_client import get_ocr_client
+from ai_integration.services.target_items import target_items_fields
 
 logger = logging.getLogger(__name__)
 
@@ -13,43 +13,59 @@ class OCRDispatchError(Exception):
     pass
 
 
-def dispatch_to_ocr_engine(*, job: OCRJob) -> None:
+def dispatch_to_ocr_engine(*, job: OCRJob, url: str | None = None) -> None:
     """
-    Sends {job_id, file_reference, target_items} to the OCR engine.
-    Raises OCRDispatchError on failure.
+    Sends {job_id, file_reference, target_items} to the OCR engine, with
+    target_items_version in place of the items when snapshots are sent by
+    reference. url defaults to OCR_ENGINE_PROCESS_URL. Raises
+    OCRDispatchError on failure.
     """
-    low_stock_items = Inventory.objects.filter(quantity_on_hand__lte=F('min_threshold'))
-    target_items = [
-        {"product_name": item.product_name, "strength": item.strength}
-        for item in low_stock_items
-    ]
-
+    url = url or settings.OCR_ENGINE_PROCESS_URL
     payload = {
         "job_id": str(job.job_id),
         "file_reference": job.file.s3_key,
-        "target_items": target_items,
+        **target_items_fields(),
     }
-    
-    logger.info(f"Dispatching job {job.job_id} to OCR engine at {settings.OCR_ENGINE_PROCESS_URL}")
+
+    logger.info(f"Dispatching job {job.job_id} to OCR engine at {url}")
     logger.debug(f"Dispatch payload: {payload}")
 
+    _post_to_engine(url, payload, f"job {job.job_id}")
+
+
+def dispatch_batch_to_ocr_engine(*, jobs: list[OCRJob], target_fields: dict | None = None) -> None:
+    """
+    Sends {jobs: [{job_id, file_reference}, ...], target_items} to the OCR
+    engine's batch endpoint: one request and one target_items snapshot for
+    all the jobs. target_fields (see target_items_fields) lets several
+    batches share a snapshot. Raises OCRDispatchError on failure, including
+    when OCR_ENGINE_BATCH_PROCESS_URL is not configured.
+    """
+    url = getattr(settings, "OCR_ENGINE_BATCH_PROCESS_URL", None)
+    if not url:
+        raise OCRDispatchError("OCR_ENGINE_BATCH_PROCESS_URL is not configured")
+    payload = {
+        "jobs": [{"job_id": str(job.job_id), "file_reference": job.file.s3_key} for job in jobs],
+        **(target_items_fields() if target_fields is None else target_fields),
+    }
+
+    logger.info(f"Dispatching batch of {len(jobs)} jobs to OCR engine at {url}")
+    logger.debug(f"Dispatch payload: {payload}")
+
+    _post_to_engine(url, payload, f"batch of {len(jobs)} jobs")
+
+
+def _post_to_engine(url: str, payload: dict, label: str) -> None:
     try:
-        resp = requests.post(
-            settings.OCR_ENGINE_PROCESS_URL,
-            json=payload,
-            timeout=getattr(settings, "OCR_ENGINE_TIMEOUT_SECONDS", 30),
-            headers = {
-                "Authorization": settings.AI_ENGINE_API_KEY
-            }
-        )
+        resp = get_ocr_client().post(url, json=payload)
         resp.raise_for_status()
-        logger.info(f"OCR engine accepted job {job.job_id}, status_code={resp.status_code}")
+        logger.info(f"OCR engine accepted {label}, status_code={resp.status_code}")
     except (requests.Timeout, requests.ConnectionError) as e:
-        logger.error(f"Connection/timeout error dispatching job {job.job_id}: {e}")
+        logger.error(f"Connection/timeout error dispatching {label}: {e}")
         raise OCRDispatchError(f"Dispatch connection/timeout error: {e}") from e
     except requests.HTTPError as e:
-        logger.error(f"HTTP error dispatching job {job.job_id}: {e}, response={resp.text if 'resp' in locals() else 'N/A'}")
+        logger.error(f"HTTP error dispatching {label}: {e}, response={resp.text if 'resp' in locals() else 'N/A'}")
         raise OCRDispatchError(f"Dispatch HTTP error: {e}") from e
     except Exception as e:
-        logger.exception(f"Unexpected error dispatching job {job.job_id}: {e}")
-        raise OCRDispatchError(f"Dispatch unexpected error: {e}") from e
\ No newline at end of file
+        logger.exception(f"Unexpected error dispatching {label}: {e}")
+        raise OCRDispatchError(f"Dispatch unexpected error: {e}") from e
@@ -166,8 +166,25 @@ def normalize_ocr_payload_items(payload: Dict[str, Any]) -> List[Dict[str, Any]]
             )
         return normalized_items
 
+    items, _ = normalize_ocr_payload_chunk(payload)
+    return items
+
+
+def normalize_ocr_payload_chunk(
+    payload: Dict[str, Any], current_company: Optional[str] = None
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Normalize one chunk of a payload delivered in several parts.
+
+    Raw tables carry the company of a header row over to the rows below it,
+    also across pages, so the company in effect at the end of the previous
+    chunk is passed in and the one in effect at the end of this chunk is
+    returned along with the items.
+    """
+    if "items" in payload:
+        return normalize_ocr_payload_items(payload), current_company
+
     items: List[Dict[str, Any]] = []
-    current_company: Optional[str] = None
 
     raw_step_keys = sorted(k for k in payload.keys() if k.endswith("_raw_steps"))
     for page_key in raw_step_keys:
@@ -207,4 +224,4 @@ def normalize_ocr_payload_items(payload: Dict[str, Any]) -> List[Dict[str, Any]]
                 }
             )
 
-    return items
+    return items, current_company
@@ -0,0 +1,322 @@
+import logging
+
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from ai_integration.models import OCRCallbackPayload, OCRJob, OCRResult, OCRResultItem, OCRResultUpload
+from ai_integration.services.payload_normalization import (
+    normalize_ocr_payload_chunk,
+    normalize_ocr_payload_items,
+)
+from files.models import File
+
+logger = logging.getLogger(__name__)
+
+# Persistence of OCR engine results.
+#
+# A result arrives either as one callback body (ingest_result) or in numbered
+# chunks, e.g. one per page (ingest_result_chunk), closed by a completion
+# message (complete_result_upload). Each chunk is normalized and its items
+# bulk-inserted in a short transaction of its own, so memory and lock time
+# are bounded by the chunk size rather than the catalogue size; the running
+# totals the result needs are kept on its OCRResultUpload.
+#
+# With OCR_CALLBACK_ASYNC the one-body callback only stages the raw payload
+# (stage_result) and answers 202; the ingest_ocr_callback Celery task then
+# validates, normalizes and stores it (ingest_staged_result), so the engine
+# does not wait on normalization. A body that cannot be ingested, or is still
+# failing once the task runs out of retries, fails its job and file.
+
+ITEM_INSERT_BATCH_SIZE = 500
+
+
+class ResultIngestionError(Exception):
+    """A callback that cannot be applied; status_code is the HTTP answer."""
+
+    status_code = 400
+
+
+class UnknownJobError(ResultIngestionError):
+    def __init__(self, job_uuid):
+        super().__init__("Unknown job_id")
+        self.job_uuid = job_uuid
+
+
+class EmptyResultError(ResultIngestionError):
+    status_code = 422
+
+    def __init__(self):
+        super().__init__("OCR payload did not contain any parsable items.")
+
+
+class ChunkSequenceError(ResultIngestionError):
+    status_code = 409
+
+    def __init__(self, message, expected_sequence):
+        super().__init__(message)
+        self.expected_sequence = expected_sequence
+
+
+def ingest_result(job_uuid, payload: dict) -> OCRResult:
+    """Persist a complete result delivered in one callback."""
+    normalized_items = normalize_ocr_payload_items(payload)
+    if not normalized_items:
+        logger.warning(f"No parsable OCR items found for job_id={job_uuid}")
+        raise EmptyResultError()
+
+    with transaction.atomic():
+        job = _get_job(job_uuid, lock=True)
+        logger.info(f"Processing OCR results for job {job_uuid}, file={job.file.original_filename}")
+
+        result = OCRResult.objects.create(
+            job=job,
+            file=job.file,
+            ware_house_name=job.file.ware_house_name,
+            confidence_score=calculate_overall_confidence(normalized_items),
+            review_required=calculate_review_required(normalized_items),
+            status="completed",
+        )
+        _insert_items(result, normalized_items)
+        _complete_job(job)
+
+    logger.info(f"Successfully processed OCR results for job {job_uuid}: {len(normalized_items)} items extracted")
+    return result
+
+
+def stage_result(job_uuid, payload: dict) -> OCRCallbackPayload:
+    """Store a raw callback body and ingest it in the background after commit."""
+    from ai_integration.tasks import ingest_ocr_callback
+
+    job_pk = OCRJob.objects.filter(job_id=job_uuid).values_list("pk", flat=True).first()
+    if job_pk is None:
+        logger.error(f"OCR callback received for unknown job_id: {job_uuid}")
+        raise UnknownJobError(job_uuid)
+
+    staged = OCRCallbackPayload.objects.create(job_id=job_pk, payload=payload)
+    transaction.on_commit(lambda: ingest_ocr_callback.delay(staged.pk), robust=True)
+    logger.info(f"Staged OCR callback {staged.pk} for job {job_uuid}")
+    return staged
+
+
+def ingest_staged_result(callback_id: int) -> OCRResult | None:
+    """
+    Ingest a staged callback body. Returns the result, or None if the body
+    could not be ingested or was already handled.
+    """
+    from ai_integration.serializers import OCRResultSerializer
+
+    with transaction.atomic():
+        staged = (
+            OCRCallbackPayload.objects.select_for_update(skip_locked=True, of=("self",))
+            .select_related("job")
+            .filter(pk=callback_id, status="pending")
+            .first()
+        )
+        if staged is None:
+            return None
+
+        serializer = OCRResultSerializer(data={"job_id": str(staged.job.job_id), "payload": staged.payload})
+        try:
+            serializer.is_valid(raise_exception=True)
+            result = ingest_result(staged.job.job_id, serializer.validated_data["payload"])
+        except (ResultIngestionError, ValidationError) as e:
+            error = str(e) if isinstance(e, ResultIngestionError) else f"Invalid OCR callback payload: {e.detail}"
+            _fail_staged(staged, error)
+            return None
+
+        staged.status = "processed"
+        staged.result = result
+        staged.processed_at = timezone.now()
+        staged.save(update_fields=["status", "result", "processed_at"])
+    return result
+
+
+def fail_staged_result(callback_id: int, error: str) -> None:
+    """Give up on a staged callback body that is still pending."""
+    with transaction.atomic():
+        staged = (
+            OCRCallbackPayload.objects.select_for_update(of=("self",))
+            .select_related("job")
+            .filter(pk=callback_id, status="pending")
+            .first()
+        )
+        if staged is not None:
+            _fail_staged(staged, error)
+
+
+def _fail_staged(staged: OCRCallbackPayload, error: str) -> None:
+    logger.warning(f"Staged OCR callback {staged.pk} for job {staged.job.job_id} failed: {error}")
+    now = timezone.now()
+    staged.status = "failed"
+    staged.error_message = error
+    staged.processed_at = now
+    staged.save(update_fields=["status", "error_message", "processed_at"])
+
+    # A result that was already stored by another callback stands.
+    failed = (
+        OCRJob.objects.filter(pk=staged.job_id)
+        .exclude(status="ocr_done")
+        .update(status="failed", error_message=error, updated_at=now)
+    )
+    if failed:
+        File.objects.filter(pk=staged.job.file_id).update(status="failed")
+
+
+def ingest_result_chunk(job_uuid, sequence: int, payload: dict) -> tuple[OCRResultUpload, bool]:
+    """
+    Normalize and store one chunk of a result. Chunks are numbered from 0 and
+    applied in order; a chunk that was already applied is ignored. Returns
+    the upload and whether the chunk was applied.
+    """
+    with transaction.atomic():
+        # Locking the job serializes chunks of one result, so a repeated
+        # chunk 0 waits and finds the upload the first one opened.
+        job = _get_job(job_uuid, lock=True)
+        upload = (
+            OCRResultUpload.objects.select_for_update()
+            .select_related("result")
+            .filter(job=job, completed_at__isnull=True)
+            .first()
+        )
+        if upload is None:
+            if sequence != 0:
+                raise ChunkSequenceError(f"No chunked result in progress, expected chunk 0 (got {sequence})", 0)
+            result = OCRResult.objects.create(
+                job=job,
+                file=job.file,
+                ware_house_name=job.file.ware_house_name,
+                confidence_score=0,
+                review_required=False,
+                status="receiving",
+            )
+            upload = OCRResultUpload.objects.create(job=job, result=result)
+        elif sequence < upload.next_sequence:
+            logger.info(f"Ignoring repeated chunk {sequence} for job {job_uuid}")
+            return upload, False
+        elif sequence > upload.next_sequence:
+            raise ChunkSequenceError(
+                f"Expected chunk {upload.next_sequence} (got {sequence})", upload.next_sequence
+            )
+
+        items, upload.current_company = normalize_ocr_payload_chunk(payload, upload.current_company)
+        _insert_items(upload.result, items)
+
+        upload.next_sequence += 1
+        upload.item_count += len(items)
+        upload.confidence_total += sum(float(item["confidence"]) for item in items)
+        upload.review_required = upload.review_required or calculate_review_required(items)
+        upload.save(
+            update_fields=[
+                "next_sequence",
+                "current_company",
+                "item_count",
+                "confidence_total",
+                "review_required",
+                "updated_at",
+            ]
+        )
+
+    logger.debug(f"Stored chunk {sequence} for job {job_uuid}: {len(items)} items")
+    return upload, True
+
+
+def complete_result_upload(job_uuid, chunk_count: int) -> OCRResult:
+    """
+    Close a chunked result once all chunk_count chunks have been applied. A
+    result without any parsable item is discarded so the engine can resend it.
+    """
+    with transaction.atomic():
+        job = _get_job(job_uuid, lock=True)
+        uploads = OCRResultUpload.objects.select_for_update().select_related("result").filter(job=job)
+        upload = uploads.filter(completed_at__isnull=True).first()
+        if upload is None:
+            last = uploads.order_by("-id").first()
+            if last is not None and last.next_sequence == chunk_count:
+                # Repeated completion message.
+                return last.result
+            raise ChunkSequenceError("No chunked result in progress", 0)
+        if upload.next_sequence != chunk_count:
+            raise ChunkSequenceError(
+                f"Received {upload.next_sequence} chunks, expected {chunk_count}", upload.next_sequence
+            )
+        if not upload.item_count:
+            upload.result.delete()
+            result = None
+        else:
+            result = _finish_upload(upload)
+            _complete_job(job)
+
+    if result is None:
+        logger.warning(f"No parsable OCR items found for job_id={job_uuid}")
+        raise EmptyResultError()
+
+    logger.info(
+        f"Successfully processed chunked OCR results for job {job_uuid}: "
+        f"{upload.item_count} items in {chunk_count} chunks"
+    )
+    return result
+
+
+def _finish_upload(upload: OCRResultUpload) -> OCRResult:
+    result = upload.result
+    result.confidence_score = max(0.0, min(1.0, upload.confidence_total / upload.item_count))
+    result.review_required = upload.review_required
+    result.status = "completed"
+    result.save(update_fields=["confidence_score", "review_required", "status"])
+
+    upload.completed_at = timezone.now()
+    upload.save(update_fields=["completed_at", "updated_at"])
+    return result
+
+
+def calculate_overall_confidence(items: list) -> float:
+    """Calculate average confidence score from all extracted items."""
+    if not items:
+        return 0.0
+    confidences = [float(item["confidence"]) for item in items]
+    avg = sum(confidences) / len(confidences)
+    # Ensure within [0, 1] range due to DB constraint
+    return max(0.0, min(1.0, avg))
+
+
+def calculate_review_required(items: list) -> bool:
+    """Return True if any item requires review."""
+    return any(item["review_required"] for item in items)
+
+
+def _get_job(job_uuid, *, lock: bool = False) -> OCRJob:
+    jobs = OCRJob.objects.select_related("file")
+    if lock:
+        jobs = jobs.select_for_update()
+    try:
+        return jobs.get(job_id=job_uuid)
+    except OCRJob.DoesNotExist:
+        logger.error(f"OCR callback received for unknown job_id: {job_uuid}")
+        raise UnknownJobError(job_uuid)
+
+
+def _insert_items(result: OCRResult, items: list) -> None:
+    OCRResultItem.objects.bulk_create(
+        [
+            OCRResultItem(
+                ocr_result=result,
+                extracted_product_name=item["drug_name"],
+                extracted_company=item.get("company"),
+                extracted_unit_price=item["price"],
+            )
+            for item in items
+        ],
+        batch_size=ITEM_INSERT_BATCH_SIZE,
+    )
+
+
+def _complete_job(job: OCRJob) -> None:
+    # Update job status to ocr_done
+    job.status = "ocr_done"
+    job.error_message = None
+    job.save(update_fields=["status", "error_message", "updated_at"])
+
+    # Sync File status to reflect processing completion
+    job.file.status = "completed"
+    job.file.save(update_fields=["status"])
@@ -0,0 +1,66 @@
+import json
+import zlib
+
+from django.conf import settings
+from django.core.cache import cache
+
+from inventory.services.low_stock import get_low_stock_items, get_low_stock_version
+
+# Target-items snapshots for OCR dispatch.
+#
+# The items the engine should look for are the low-stock set, which only
+# changes when its version (inventory.services.low_stock) is bumped. Each
+# version is serialized once into a zlib-compressed JSON snapshot kept in the
+# cache. With OCR_TARGET_ITEMS_BY_REFERENCE the dispatch payload carries only
+# "target_items_version" and the engine fetches the snapshot once per version
+# from GET /api/v1/ocr/target-items/<version>/; otherwise the items are sent
+# inline as "target_items".
+
+SNAPSHOT_CACHE_KEY = "ai_integration:target-items:{version}"
+
+
+def build_target_items() -> list[dict]:
+    """The low-stock items the engine should look for in an offer."""
+    return [
+        {"product_name": item["product_name"], "strength": item["strength"]}
+        for item in get_low_stock_items()
+    ]
+
+
+def target_items_fields() -> dict:
+    """The target-items part of a dispatch payload."""
+    if getattr(settings, "OCR_TARGET_ITEMS_BY_REFERENCE", False):
+        return {"target_items_version": str(current_snapshot_version())}
+    return {"target_items": build_target_items()}
+
+
+def current_snapshot_version() -> int:
+    """The current low-stock version, with its snapshot stored in the cache."""
+    version = get_low_stock_version()
+    key = SNAPSHOT_CACHE_KEY.format(version=version)
+    # Refresh the TTL: payloads referencing this version are being sent now.
+    if not cache.touch(key, snapshot_ttl()):
+        cache.set(key, _compress(build_target_items()), snapshot_ttl())
+    return version
+
+
+def get_compressed_snapshot(version: int) -> bytes | None:
+    """The zlib-compressed JSON snapshot of a version, or None if it expired."""
+    snapshot = cache.get(SNAPSHOT_CACHE_KEY.format(version=version))
+    if snapshot is None and version == get_low_stock_version():
+        current_snapshot_version()
+        snapshot = cache.get(SNAPSHOT_CACHE_KEY.format(version=version))
+    return snapshot
+
+
+def decompress_snapshot(snapshot: bytes) -> list[dict]:
+    return json.loads(zlib.decompress(snapshot))
+
+
+def _compress(items: list[dict]) -> bytes:
+    return zlib.compress(json.dumps(items, separators=(",", ":")).encode())
+
+
+def snapshot_ttl() -> int:
+    """Seconds a snapshot stays available after it was last referenced."""
+    return getattr(settings, "OCR_TARGET_ITEMS_SNAPSHOT_TTL_SECONDS", 3600)
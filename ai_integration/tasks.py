@@ -1,7 +1,9 @@
 import logging
 from celery import shared_task
 from ai_integration.models import OCRJob
+from ai_integration.services.ocr_batch import batch_dispatch_enabled, flush_ocr_batches
 from ai_integration.services.ocr_dispatch import dispatch_to_ocr_engine, OCRDispatchError
+from ai_integration.services.result_ingestion import fail_staged_result, ingest_staged_result
 
 logger = logging.getLogger(__name__)
 
@@ -68,4 +70,36 @@ def dispatch_ocr_job(self, ocr_job_id: int):
         # Retry with exponential backoff: 10s, 20s, 40s
         countdown = 10 * (2 ** self.request.retries)
         logger.info(f"Retrying job {job.job_id} in {countdown}s")
-        raise self.retry(exc=e, countdown=countdown)
\ No newline at end of file
+        raise self.retry(exc=e, countdown=countdown)
+
+
+@shared_task
+def dispatch_ocr_batch():
+    """
+    Background task to dispatch every queued OCR job in multi-job engine
+    requests (batched dispatch mode, see ai_integration.services.ocr_batch).
+    Also run periodically to take over jobs left behind by a dead flush.
+    """
+    if not batch_dispatch_enabled():
+        return None
+    summary = flush_ocr_batches()
+    logger.info(f"Batched OCR dispatch finished: {summary}")
+    return summary
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=10)
+def ingest_ocr_callback(self, callback_id: int):
+    """
+    Background task to validate, normalize and store a staged OCR callback
+    body (see ai_integration.services.result_ingestion) and advance its job.
+    """
+    try:
+        result = ingest_staged_result(callback_id)
+    except Exception as exc:
+        if self.request.retries >= self.max_retries:
+            logger.error(f"Ingestion of staged OCR callback {callback_id} failed after {self.max_retries} retries: {exc}")
+            fail_staged_result(callback_id, f"Ingestion failed: {exc}")
+            return None
+        logger.warning(f"Ingestion of staged OCR callback {callback_id} failed, retrying: {exc}")
+        raise self.retry(exc=exc)
+    return result.id if result else None
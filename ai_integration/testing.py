@@ -0,0 +1,97 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# A local stand-in for the OCR engine, used by the tests and by
+# manage.py benchmark_ocr_dispatch. It accepts every POST on any path,
+# records the requests and counts the TCP connections it was sent them over.
+
+
+class StubOCREngine:
+    """
+    Threaded HTTP/1.1 server on 127.0.0.1 answering like the OCR engine.
+
+        with StubOCREngine() as engine:
+            requests.post(engine.url, json={...})
+            engine.requests  # [{"path", "headers", "json"}, ...]
+
+    statuses: response codes to answer with, in order, before falling back
+    to status. delay: seconds to wait before answering each request.
+    """
+
+    def __init__(self, *, status: int = 202, statuses=(), delay: float = 0, path: str = "/ocr/process"):
+        self.status = status
+        self.statuses = list(statuses)
+        self.delay = delay
+        self.path = path
+        self.requests = []
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}{self.path}"
+
+    def start(self) -> "StubOCREngine":
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def __enter__(self) -> "StubOCREngine":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def _next_status(self) -> int:
+        with self._lock:
+            return self.statuses.pop(0) if self.statuses else self.status
+
+    def _handler_class(self):
+        engine = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                with engine._lock:
+                    engine.connections += 1
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                with engine._lock:
+                    engine.requests.append(
+                        {
+                            "path": self.path,
+                            "headers": dict(self.headers),
+                            "json": json.loads(body) if body else None,
+                        }
+                    )
+                if engine.delay:
+                    time.sleep(engine.delay)
+
+                status = engine._next_status()
+                response = json.dumps({"status": "accepted" if status < 400 else "error"}).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(response)))
+                self.end_headers()
+                self.wfile.write(response)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -1,15 +1,30 @@
 import uuid
 from decimal import Decimal
+from datetime import timedelta
+from django.core.cache import cache
 from django.test import TestCase, override_settings
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework.test import APIClient
 from unittest.mock import patch, MagicMock
 import requests
+import zlib
 
 from files.models import File
-from ai_integration.models import OCRJob, OCRResult, OCRResultItem
-from ai_integration.tasks import dispatch_ocr_job
-from ai_integration.services.ocr_dispatch import dispatch_to_ocr_engine, OCRDispatchError
+from ai_integration.models import OCRCallbackPayload, OCRJob, OCRResult, OCRResultItem, OCRResultUpload
+from ai_integration.tasks import dispatch_ocr_job, ingest_ocr_callback
+from ai_integration.services.ocr_batch import batch_dispatch_enabled, flush_ocr_batches, schedule_batch_dispatch
+from ai_integration.services.ocr_client import get_ocr_client, reset_ocr_client
+from ai_integration.services.ocr_dispatch import (
+    dispatch_batch_to_ocr_engine,
+    dispatch_to_ocr_engine,
+    OCRDispatchError,
+)
+from ai_integration.services.result_ingestion import ingest_staged_result
+from ai_integration.services.target_items import current_snapshot_version
+from ai_integration.testing import StubOCREngine
+from inventory.models import Inventory
+from inventory.services.stock import apply_stock_deltas
 from users.models import User
 
 
@@ -109,18 +124,26 @@ class CeleryDispatchTests(TestCase):
 
 
 @override_settings(INTERNAL_SERVICE_TOKEN='test-service-token')
-class OCRResultCallbackTests(TestCase):
+class OCRCallbackTestCase(TestCase):
+    """An authenticated engine client and one OCR job awaiting results"""
+
+    filename = "demo4.pdf"
+    job_status = "processing"
+
     def setUp(self):
         self.client = APIClient()
         self.client.credentials(HTTP_AUTHORIZATION='test-service-token')
 
         self.file = File.objects.create(
-            s3_key="offers/demo4.pdf",
-            original_filename="demo4.pdf",
+            s3_key=f"offers/{self.filename}",
+            original_filename=self.filename,
             status="uploaded",
             ware_house_name="Warehouse A",
         )
-        self.job = OCRJob.objects.create(file=self.file, status="processing")
+        self.job = OCRJob.objects.create(file=self.file, status=self.job_status)
+
+
+class OCRResultCallbackTests(OCRCallbackTestCase):
 
     def test_callback_unknown_job_returns_400(self):
         from django.urls import reverse
@@ -201,6 +224,161 @@ class OCRResultCallbackTests(TestCase):
         self.assertEqual(items[2].extracted_unit_price, Decimal("100000.00"))
 
 
+class OCRResultChunkedCallbackTests(OCRCallbackTestCase):
+    """Tests for results delivered in numbered chunks plus a completion message"""
+
+    filename = "chunked.pdf"
+    job_status = "dispatched"
+
+    def _send_chunk(self, sequence, payload, job_id=None):
+        body = {"job_id": str(job_id or self.job.job_id), "sequence": sequence, "payload": payload}
+        return self.client.post(reverse("ocr-result-chunk"), data=body, format="json")
+
+    def _complete(self, chunk_count):
+        body = {"job_id": str(self.job.job_id), "chunk_count": chunk_count}
+        return self.client.post(reverse("ocr-result-complete"), data=body, format="json")
+
+    def test_chunks_are_stored_incrementally_and_published_on_completion(self):
+        self.assertEqual(self._send_chunk(0, _raw_steps_payload()).json()["next_sequence"], 1)
+
+        result = OCRResult.objects.get(job=self.job)
+        self.assertEqual(result.status, "receiving")
+        self.assertEqual(result.items.count(), 3)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, "dispatched")
+
+        # The company header at the end of page 1 applies to the rows of page 2.
+        page_2 = {"page_002_raw_steps": [{"Col_1": "50,000", "Col_2": "", "Col_3": "فيتامين د"}]}
+        self.assertEqual(self._send_chunk(1, page_2).status_code, 200)
+
+        resp = self._complete(2)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json()["result_id"], result.id)
+
+        result.refresh_from_db()
+        self.assertEqual(result.status, "completed")
+        self.assertAlmostEqual(result.confidence_score, 0.5)
+        self.assertTrue(result.review_required)
+        last = result.items.order_by("-id").first()
+        self.assertEqual((last.extracted_product_name, last.extracted_company), ("فيتامين د", "بوريسكا"))
+
+        self.job.refresh_from_db()
+        self.file.refresh_from_db()
+        self.assertEqual(self.job.status, "ocr_done")
+        self.assertEqual(self.file.status, "completed")
+
+    def test_repeated_and_out_of_order_chunks(self):
+        self._send_chunk(0, _valid_payload())
+
+        resp = self._send_chunk(0, _valid_payload())
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json()["detail"], "Chunk already received")
+        self.assertEqual(OCRResultItem.objects.count(), 2)
+
+        resp = self._send_chunk(2, _valid_payload())
+        self.assertEqual(resp.status_code, 409)
+        self.assertEqual(resp.json()["expected_sequence"], 1)
+
+        resp = self._complete(3)
+        self.assertEqual(resp.status_code, 409)
+        self.assertEqual(resp.json()["expected_sequence"], 1)
+
+        self.assertEqual(self._complete(1).status_code, 200)
+        # A repeated completion message is acknowledged again.
+        self.assertEqual(self._complete(1).status_code, 200)
+        self.assertEqual(OCRResult.objects.count(), 1)
+
+    def test_result_without_items_is_discarded(self):
+        headers_only = {"page_001_raw_steps": [{"Col_1": "", "Col_2": "", "Col_3": "سان لايف"}]}
+        self._send_chunk(0, headers_only)
+
+        self.assertEqual(self._complete(1).status_code, 422)
+        self.assertFalse(OCRResult.objects.exists())
+        self.assertFalse(OCRResultUpload.objects.exists())
+
+        # The engine can start over.
+        self.assertEqual(self._send_chunk(0, _valid_payload()).status_code, 200)
+
+    def test_unknown_job_and_unauthenticated_chunks(self):
+        self.assertEqual(self._send_chunk(0, _valid_payload(), job_id=uuid.uuid4()).status_code, 400)
+
+        self.client.credentials()
+        self.assertEqual(self._send_chunk(0, _valid_payload()).status_code, 401)
+
+
+@override_settings(OCR_CALLBACK_ASYNC=True)
+class OCRResultCallbackAsyncTests(OCRCallbackTestCase):
+    """Tests for callbacks staged by the endpoint and ingested by a Celery task"""
+
+    filename = "staged.pdf"
+    job_status = "dispatched"
+
+    def _post(self, payload, job_id=None):
+        body = {"job_id": str(job_id or self.job.job_id), "payload": payload}
+        return self.client.post(reverse("ocr-result-callback"), data=body, format="json")
+
+    @patch("ai_integration.tasks.ingest_ocr_callback.delay")
+    def test_callback_is_staged_and_ingested_by_task(self, mock_delay):
+        with self.captureOnCommitCallbacks(execute=True):
+            resp = self._post(_valid_payload())
+
+        self.assertEqual(resp.status_code, 202)
+        staged = OCRCallbackPayload.objects.get(pk=resp.json()["callback_id"])
+        self.assertEqual(staged.status, "pending")
+        self.assertFalse(OCRResult.objects.exists())
+        mock_delay.assert_called_once_with(staged.pk)
+
+        result = ingest_staged_result(staged.pk)
+
+        self.assertEqual(result.items.count(), 2)
+        self.assertAlmostEqual(result.confidence_score, 0.865)
+        staged.refresh_from_db()
+        self.assertEqual((staged.status, staged.result_id), ("processed", result.id))
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, "ocr_done")
+
+        # A redelivered task does not ingest the payload twice.
+        self.assertIsNone(ingest_staged_result(staged.pk))
+        self.assertEqual(OCRResult.objects.count(), 1)
+
+    @patch("ai_integration.tasks.ingest_ocr_callback.delay")
+    def test_payload_without_items_fails_in_task(self, mock_delay):
+        headers_only = {"page_001_raw_steps": [{"Col_1": "", "Col_2": "", "Col_3": "سان لايف"}]}
+        staged_id = self._post(headers_only).json()["callback_id"]
+
+        self.assertIsNone(ingest_staged_result(staged_id))
+
+        staged = OCRCallbackPayload.objects.get(pk=staged_id)
+        self.assertEqual(staged.status, "failed")
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, "failed")
+        self.assertIn("parsable items", self.job.error_message)
+        self.file.refresh_from_db()
+        self.assertEqual(self.file.status, "failed")
+
+    @patch("ai_integration.tasks.ingest_ocr_callback.delay")
+    @patch("ai_integration.tasks.ingest_staged_result", side_effect=RuntimeError("database unavailable"))
+    def test_task_fails_staged_body_when_out_of_retries(self, mock_ingest, mock_delay):
+        staged_id = self._post(_valid_payload()).json()["callback_id"]
+
+        # Last attempt: no retry is left.
+        ingest_ocr_callback.push_request(retries=ingest_ocr_callback.max_retries)
+        self.addCleanup(ingest_ocr_callback.pop_request)
+        self.assertIsNone(ingest_ocr_callback.run(staged_id))
+
+        staged = OCRCallbackPayload.objects.get(pk=staged_id)
+        self.assertEqual(staged.status, "failed")
+        self.assertIn("database unavailable", staged.error_message)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, "failed")
+        self.file.refresh_from_db()
+        self.assertEqual(self.file.status, "failed")
+
+    def test_unknown_job_is_rejected_without_staging(self):
+        self.assertEqual(self._post(_valid_payload(), job_id=uuid.uuid4()).status_code, 400)
+        self.assertFalse(OCRCallbackPayload.objects.exists())
+
+
 class OCRDispatchServiceTests(TestCase):
     """Tests for the dispatch_to_ocr_engine service"""
 
@@ -212,11 +390,12 @@ class OCRDispatchServiceTests(TestCase):
         )
         self.job = OCRJob.objects.create(file=self.file, status="processing")
 
-    @patch("ai_integration.services.ocr_dispatch.requests.post")
+    @patch("ai_integration.services.ocr_client.requests.Session.post")
     @override_settings(
         OCR_ENGINE_PROCESS_URL="http://ai-engine:8000/ocr/process",
         AI_ENGINE_API_KEY="test-api-key",
         OCR_ENGINE_TIMEOUT_SECONDS=30,
+        OCR_ENGINE_CONNECT_TIMEOUT_SECONDS=5,
     )
     def test_dispatch_sends_correct_payload(self, mock_post):
         """Test that dispatch sends job_id and file_reference"""
@@ -237,15 +416,15 @@ class OCRDispatchServiceTests(TestCase):
         self.assertEqual(payload["job_id"], str(self.job.job_id))
         self.assertEqual(payload["file_reference"], "offers/test_dispatch.pdf")
 
-        # Check timeout
-        self.assertEqual(call_args[1]["timeout"], 30)
+        # Check (connect, read) timeout
+        self.assertEqual(call_args[1]["timeout"], (5, 30))
 
         # Check auth header
         self.assertEqual(
             call_args[1]["headers"]["Authorization"], "test-api-key"
         )
 
-    @patch("ai_integration.services.ocr_dispatch.requests.post")
+    @patch("ai_integration.services.ocr_client.requests.Session.post")
     @override_settings(
         OCR_ENGINE_PROCESS_URL="http://ai-engine:8000/ocr/process",
         AI_ENGINE_API_KEY="test-api-key",
@@ -259,7 +438,7 @@ class OCRDispatchServiceTests(TestCase):
 
         self.assertIn("timeout", str(cm.exception).lower())
 
-    @patch("ai_integration.services.ocr_dispatch.requests.post")
+    @patch("ai_integration.services.ocr_client.requests.Session.post")
     @override_settings(
         OCR_ENGINE_PROCESS_URL="http://ai-engine:8000/ocr/process",
         AI_ENGINE_API_KEY="test-api-key",
@@ -273,7 +452,7 @@ class OCRDispatchServiceTests(TestCase):
 
         self.assertIn("connection", str(cm.exception).lower())
 
-    @patch("ai_integration.services.ocr_dispatch.requests.post")
+    @patch("ai_integration.services.ocr_client.requests.Session.post")
     @override_settings(
         OCR_ENGINE_PROCESS_URL="http://ai-engine:8000/ocr/process",
         AI_ENGINE_API_KEY="test-api-key",
@@ -290,6 +469,292 @@ class OCRDispatchServiceTests(TestCase):
         self.assertIn("http", str(cm.exception).lower())
 
 
+@override_settings(AI_ENGINE_API_KEY="test-api-key", OCR_ENGINE_RETRY_BACKOFF_SECONDS=0)
+class OCREngineClientTests(TestCase):
+    """Dispatch through the pooled OCR engine client against the stub engine"""
+
+    def setUp(self):
+        reset_ocr_client()
+        self.addCleanup(reset_ocr_client)
+        self.engine = StubOCREngine().start()
+        self.addCleanup(self.engine.stop)
+        self.jobs = [
+            OCRJob.objects.create(
+                file=File.objects.create(
+                    s3_key=f"offers/pooled_{index}.pdf",
+                    original_filename=f"pooled_{index}.pdf",
+                    status="uploaded",
+                ),
+                status="processing",
+            )
+            for index in range(3)
+        ]
+
+    def test_dispatches_reuse_one_connection(self):
+        with override_settings(OCR_ENGINE_PROCESS_URL=self.engine.url):
+            for job in self.jobs:
+                dispatch_to_ocr_engine(job=job)
+
+        self.assertEqual(self.engine.connections, 1)
+        self.assertEqual(
+            [request["json"]["job_id"] for request in self.engine.requests],
+            [str(job.job_id) for job in self.jobs],
+        )
+        self.assertEqual(self.engine.requests[0]["headers"]["Authorization"], "test-api-key")
+
+    def test_unavailable_engine_is_retried(self):
+        self.engine.statuses = [503, 503]
+
+        with override_settings(OCR_ENGINE_MAX_RETRIES=2):
+            dispatch_to_ocr_engine(job=self.jobs[0], url=self.engine.url)
+
+        self.assertEqual(len(self.engine.requests), 3)
+
+    def test_gateway_errors_are_not_resent(self):
+        # The engine may already be processing the job behind a 502/504.
+        self.engine.statuses = [502]
+
+        with override_settings(OCR_ENGINE_PROCESS_URL=self.engine.url, OCR_ENGINE_MAX_RETRIES=2):
+            with self.assertRaises(OCRDispatchError):
+                dispatch_to_ocr_engine(job=self.jobs[0])
+
+        self.assertEqual(len(self.engine.requests), 1)
+
+    def test_retries_exhausted_raises_dispatch_error(self):
+        self.engine.status = 503
+
+        with override_settings(OCR_ENGINE_PROCESS_URL=self.engine.url, OCR_ENGINE_MAX_RETRIES=1):
+            with self.assertRaises(OCRDispatchError):
+                dispatch_to_ocr_engine(job=self.jobs[0])
+
+        self.assertEqual(len(self.engine.requests), 2)
+
+    def test_client_is_rebuilt_after_fork_or_config_change(self):
+        client = get_ocr_client()
+        self.assertIs(get_ocr_client(), client)
+
+        with override_settings(OCR_ENGINE_POOL_SIZE=2):
+            self.assertIsNot(get_ocr_client(), client)
+
+        with patch("ai_integration.services.ocr_client.os.getpid", return_value=-1):
+            self.assertIsNot(get_ocr_client(), client)
+
+
+@override_settings(
+    AI_ENGINE_API_KEY="test-api-key",
+    OCR_ENGINE_MAX_RETRIES=0,
+    OCR_DISPATCH_BATCH_WINDOW_SECONDS=5,
+    OCR_DISPATCH_BATCH_SIZE=3,
+)
+class OCRBatchDispatchTests(TestCase):
+    """Batched dispatch of queued OCR jobs in multi-job engine requests"""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        reset_ocr_client()
+        self.addCleanup(reset_ocr_client)
+        self.engine = StubOCREngine().start()
+        self.addCleanup(self.engine.stop)
+        settings_override = override_settings(OCR_ENGINE_BATCH_PROCESS_URL=self.engine.url)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def _queue_jobs(self, count):
+        return [
+            OCRJob.objects.create(
+                file=File.objects.create(
+                    s3_key=f"offers/batch_{name}.pdf",
+                    original_filename=f"batch_{name}.pdf",
+                    status="uploaded",
+                ),
+                status="queued",
+            )
+            for name in (uuid.uuid4().hex for _ in range(count))
+        ]
+
+    def test_queued_jobs_are_sent_in_one_request(self):
+        jobs = self._queue_jobs(3)
+
+        summary = flush_ocr_batches()
+
+        self.assertEqual(summary, {"dispatched": 3, "requeued": 0, "failed": 0})
+        self.assertEqual(len(self.engine.requests), 1)
+        payload = self.engine.requests[0]["json"]
+        self.assertEqual(
+            payload["jobs"],
+            [{"job_id": str(job.job_id), "file_reference": job.file.s3_key} for job in jobs],
+        )
+        self.assertIn("target_items", payload)
+        self.assertEqual(
+            set(OCRJob.objects.values_list("status", flat=True)), {"dispatched"}
+        )
+        self.assertEqual(set(File.objects.values_list("status", flat=True)), {"processing"})
+
+    @patch("ai_integration.services.ocr_batch.target_items_fields", return_value={"target_items": []})
+    def test_batches_share_one_target_items_snapshot(self, mock_target_items):
+        self._queue_jobs(7)
+
+        summary = flush_ocr_batches()
+
+        self.assertEqual(summary["dispatched"], 7)
+        self.assertEqual([len(r["json"]["jobs"]) for r in self.engine.requests], [3, 3, 1])
+        mock_target_items.assert_called_once()
+
+    @patch("ai_integration.tasks.dispatch_ocr_batch.apply_async")
+    def test_failed_batch_is_requeued_until_out_of_retries(self, mock_apply_async):
+        self.engine.status = 503
+        fresh = self._queue_jobs(1)[0]
+        exhausted = OCRJob.objects.create(
+            file=File.objects.create(s3_key="offers/exhausted.pdf", original_filename="exhausted.pdf"),
+            status="queued",
+            retries=3,
+        )
+
+        summary = flush_ocr_batches()
+
+        self.assertEqual(summary, {"dispatched": 0, "requeued": 1, "failed": 1})
+        fresh.refresh_from_db()
+        exhausted.refresh_from_db()
+        self.assertEqual((fresh.status, fresh.retries), ("queued", 1))
+        self.assertIn("HTTP error", fresh.error_message)
+        self.assertEqual((exhausted.status, exhausted.retries), ("failed", 4))
+        self.assertEqual(exhausted.file.status, "failed")
+        mock_apply_async.assert_called_once_with(countdown=10)
+
+    @patch("ai_integration.tasks.dispatch_ocr_batch.delay")
+    @patch("ai_integration.tasks.dispatch_ocr_batch.apply_async")
+    def test_uploads_wait_for_a_scheduled_retry(self, mock_apply_async, mock_delay):
+        self.engine.status = 503
+        self._queue_jobs(3)
+        flush_ocr_batches()
+        mock_apply_async.reset_mock()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self._queue_jobs(1)
+            schedule_batch_dispatch()
+
+        mock_apply_async.assert_not_called()
+        mock_delay.assert_not_called()
+
+    @patch("ai_integration.tasks.dispatch_ocr_batch.delay")
+    @patch("ai_integration.tasks.dispatch_ocr_batch.apply_async")
+    def test_uploads_schedule_one_flush_per_window(self, mock_apply_async, mock_delay):
+        self._queue_jobs(2)
+        with self.captureOnCommitCallbacks(execute=True):
+            schedule_batch_dispatch()
+            schedule_batch_dispatch()
+
+        mock_apply_async.assert_called_once_with(countdown=5)
+        mock_delay.assert_not_called()
+
+        self._queue_jobs(1)
+        with self.captureOnCommitCallbacks(execute=True):
+            schedule_batch_dispatch()
+
+        mock_delay.assert_called_once_with()
+        self.assertEqual(len(self.engine.requests), 0)
+
+    def test_stale_claims_are_taken_over(self):
+        stale, live = self._queue_jobs(2)
+        OCRJob.objects.filter(pk=stale.pk).update(
+            status="processing", claimed_at=timezone.now() - timedelta(seconds=301)
+        )
+        OCRJob.objects.filter(pk=live.pk).update(status="processing", claimed_at=timezone.now())
+
+        summary = flush_ocr_batches()
+
+        self.assertEqual(summary["dispatched"], 1)
+        self.assertEqual(
+            [job["job_id"] for job in self.engine.requests[0]["json"]["jobs"]], [str(stale.job_id)]
+        )
+        stale.refresh_from_db()
+        live.refresh_from_db()
+        self.assertEqual((stale.status, stale.claimed_at), ("dispatched", None))
+        self.assertEqual(live.status, "processing")
+
+    def test_batching_needs_the_batch_endpoint(self):
+        job = self._queue_jobs(1)[0]
+        self.assertTrue(batch_dispatch_enabled())
+
+        with override_settings(OCR_ENGINE_BATCH_PROCESS_URL=None, OCR_ENGINE_PROCESS_URL=self.engine.url):
+            self.assertFalse(batch_dispatch_enabled())
+            with self.assertRaises(OCRDispatchError):
+                dispatch_batch_to_ocr_engine(jobs=[job])
+
+        self.assertEqual(len(self.engine.requests), 0)
+
+
+@override_settings(INTERNAL_SERVICE_TOKEN="test-service-token", OCR_TARGET_ITEMS_BY_REFERENCE=True)
+class TargetItemsSnapshotTests(TestCase):
+    """Versioned target-items snapshots referenced from dispatch payloads"""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.low = Inventory.objects.create(
+                product_name="Aspirin", strength="100mg", quantity_on_hand=2, min_threshold=5
+            )
+            self.ok = Inventory.objects.create(
+                product_name="Ibuprofen", strength="400mg", quantity_on_hand=50, min_threshold=5
+            )
+        self.job = OCRJob.objects.create(
+            file=File.objects.create(s3_key="offers/snapshot.pdf", original_filename="snapshot.pdf"),
+            status="processing",
+        )
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION="test-service-token")
+
+    def _fetch(self, version, **headers):
+        return self.client.get(reverse("ocr-target-items", kwargs={"version": version}), **headers)
+
+    @patch("ai_integration.services.ocr_client.requests.Session.post")
+    def test_payload_references_snapshot_version(self, mock_post):
+        mock_post.return_value.status_code = 200
+
+        dispatch_to_ocr_engine(job=self.job)
+
+        payload = mock_post.call_args[1]["json"]
+        self.assertNotIn("target_items", payload)
+        resp = self._fetch(payload["target_items_version"])
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json(), [{"product_name": "Aspirin", "strength": "100mg"}])
+
+    def test_snapshot_is_built_once_per_version(self):
+        version = current_snapshot_version()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(current_snapshot_version(), version)
+            resp = self._fetch(version, HTTP_ACCEPT_ENCODING="gzip, deflate")
+
+        self.assertEqual(resp["Content-Encoding"], "deflate")
+        self.assertEqual(resp["ETag"], f'"{version}"')
+        self.assertEqual(resp["Cache-Control"], "private, max-age=3600")
+        self.assertEqual(
+            zlib.decompress(resp.content),
+            b'[{"product_name":"Aspirin","strength":"100mg"}]',
+        )
+
+    def test_low_stock_transition_starts_a_new_version(self):
+        version = current_snapshot_version()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            apply_stock_deltas({self.ok.pk: -46})
+
+        new_version = current_snapshot_version()
+        self.assertNotEqual(new_version, version)
+        self.assertEqual(len(self._fetch(new_version).json()), 2)
+        # Payloads already sent keep resolving to the snapshot they referenced.
+        self.assertEqual(len(self._fetch(version).json()), 1)
+
+    def test_unknown_version_and_missing_token(self):
+        self.assertEqual(self._fetch(12345).status_code, 404)
+
+        self.client.credentials()
+        self.assertEqual(self._fetch(current_snapshot_version()).status_code, 401)
+
+
 @override_settings(
     CELERY_TASK_ALWAYS_EAGER=True,
     CELERY_TASK_EAGER_PROPAGATES=True,
@@ -3,13 +3,23 @@ from ai_integration.views import (
     AvailableOffersView,
     OCRJobStatusView,
     OCRResultCallbackView,
+    OCRResultChunkView,
+    OCRResultCompleteView,
+    OCRTargetItemsView,
     ManualDispatchView,
 )
 
 urlpatterns = [
     # Callback endpoint for OCR engine to post results
     path("ocr/result/", OCRResultCallbackView.as_view(), name="ocr-result-callback"),
+
+    # Chunked callback for large results: numbered chunks, then a completion message
+    path("ocr/result/chunks/", OCRResultChunkView.as_view(), name="ocr-result-chunk"),
+    path("ocr/result/complete/", OCRResultCompleteView.as_view(), name="ocr-result-complete"),
     
+    # Target-items snapshots referenced by version in dispatch payloads
+    path("ocr/target-items/<int:version>/", OCRTargetItemsView.as_view(), name="ocr-target-items"),
+
     # Endpoint to check OCR job status
     path("ocr/job/<uuid:job_id>/", OCRJobStatusView.as_view(), name="ocr-job-status"),
 
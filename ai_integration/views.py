@@ -1,6 +1,7 @@
 import logging
-from django.db import transaction
 from django.db.models import Count
+from django.http import HttpResponse, JsonResponse
+from django.utils.cache import patch_vary_headers
 from django.utils import timezone
 from django.shortcuts import get_object_or_404
 from django.conf import settings
@@ -10,13 +11,28 @@ from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import BasePermission, IsAuthenticated
 import uuid
+from config.pagination import PageNumberOrCursorPagination
 from rbac.services.audit import create_audit_log
 
 logger = logging.getLogger(__name__)
 
-from ai_integration.models import OCRJob, OCRResult, OCRResultItem
-from ai_integration.serializers import AvailableOfferSerializer, OCRResultSerializer
-from ai_integration.services.payload_normalization import normalize_ocr_payload_items
+from ai_integration.models import OCRJob, OCRResult
+from ai_integration.serializers import (
+    AvailableOfferSerializer,
+    OCRResultChunkSerializer,
+    OCRResultCompleteSerializer,
+    OCRResultSerializer,
+)
+from ai_integration.services.ocr_batch import batch_dispatch_enabled, schedule_batch_dispatch
+from ai_integration.services.result_ingestion import (
+    ChunkSequenceError,
+    ResultIngestionError,
+    complete_result_upload,
+    ingest_result,
+    ingest_result_chunk,
+    stage_result,
+)
+from ai_integration.services.target_items import decompress_snapshot, get_compressed_snapshot, snapshot_ttl
 from ai_integration.tasks import dispatch_ocr_job
 
 
@@ -45,6 +61,8 @@ class OCRResultCallbackView(APIView):
     Callback endpoint for OCR engine to POST results.
     POST /api/v1/ocr/result/
     Payload: {job_id: UUID, payload: {...result data...}}
+    With OCR_CALLBACK_ASYNC the payload is staged and ingested by a Celery
+    task; the engine gets 202 instead of waiting for normalization.
     Authentication: Requires INTERNAL_SERVICE_TOKEN in Authorization header
     """
     permission_classes = [InternalServiceAuthentication]
@@ -57,71 +75,110 @@ class OCRResultCallbackView(APIView):
             return Response(serializer.errors, status=422)
 
         job_uuid = serializer.validated_data["job_id"]
-        payload = serializer.validated_data["payload"]
-        normalized_items = normalize_ocr_payload_items(payload)
-        if not normalized_items:
-            logger.warning(f"No parsable OCR items found for job_id={job_uuid}")
-            return Response(
-                {"detail": "OCR payload did not contain any parsable items."},
-                status=status.HTTP_422_UNPROCESSABLE_ENTITY,
-            )
-
-        with transaction.atomic():
-            try:
-                job = OCRJob.objects.select_related("file").select_for_update().get(job_id=job_uuid)
-                logger.info(f"Processing OCR results for job {job_uuid}, file={job.file.original_filename}")
-            except OCRJob.DoesNotExist:
-                logger.error(f"OCR callback received for unknown job_id: {job_uuid}")
-                return Response({"detail": "Unknown job_id"}, status=status.HTTP_400_BAD_REQUEST)
-
-            # Create OCRResult row with aggregated data
-            result = OCRResult.objects.create(
-                job=job,
-                file=job.file,
-                ware_house_name=job.file.ware_house_name,
-                confidence_score=_calculate_overall_confidence(normalized_items),
-                review_required=_calculate_review_required(normalized_items),
-                status="completed",
-            )
-
-            # Create OCRResultItems in a single bulk INSERT
-            OCRResultItem.objects.bulk_create([
-                OCRResultItem(
-                    ocr_result=result,
-                    extracted_product_name=item["drug_name"],
-                    extracted_company=item.get("company"),
-                    extracted_unit_price=item["price"],
+        try:
+            if getattr(settings, "OCR_CALLBACK_ASYNC", False):
+                staged = stage_result(job_uuid, request.data["payload"])
+                return Response(
+                    {"detail": "Result accepted", "callback_id": staged.id},
+                    status=status.HTTP_202_ACCEPTED,
                 )
-                for item in normalized_items
-            ])
-
-            # Update job status to ocr_done
-            job.status = "ocr_done"
-            job.error_message = None
-            job.save(update_fields=["status", "error_message", "updated_at"])
-            
-            # Sync File status to reflect processing completion
-            job.file.status = "completed"
-            job.file.save(update_fields=["status"])
-            
-            logger.info(f"Successfully processed OCR results for job {job_uuid}: {len(normalized_items)} items extracted")
+            ingest_result(job_uuid, serializer.validated_data["payload"])
+        except ResultIngestionError as e:
+            return _ingestion_error_response(e)
 
         return Response({"detail": "Result received"}, status=200)
 
 
-def _calculate_overall_confidence(items: list) -> float:
-    """Calculate average confidence score from all extracted items."""
-    if not items:
-        return 0.0
-    confidences = [float(item["confidence"]) for item in items]
-    avg = sum(confidences) / len(confidences)
-    # Ensure within [0, 1] range due to DB constraint
-    return max(0.0, min(1.0, avg))
+class OCRResultChunkView(APIView):
+    """
+    Chunked callback: one part (e.g. one page) of a large OCR result.
+    POST /api/v1/ocr/result/chunks/
+    Payload: {job_id: UUID, sequence: 0, 1, 2, ..., payload: {...part of the result...}}
+    Chunks are normalized and stored as they arrive, in sequence order; a
+    repeated chunk is acknowledged without being stored again. The result is
+    published by POST /api/v1/ocr/result/complete/.
+    Authentication: Requires INTERNAL_SERVICE_TOKEN in Authorization header
+    """
+    permission_classes = [InternalServiceAuthentication]
+
+    def post(self, request):
+        serializer = OCRResultChunkSerializer(data=request.data)
+        if not serializer.is_valid():
+            logger.warning(f"Invalid OCR chunk payload: {serializer.errors}")
+            return Response(serializer.errors, status=422)
+
+        data = serializer.validated_data
+        try:
+            upload, applied = ingest_result_chunk(data["job_id"], data["sequence"], data["payload"])
+        except ResultIngestionError as e:
+            return _ingestion_error_response(e)
+
+        return Response({
+            "detail": "Chunk received" if applied else "Chunk already received",
+            "next_sequence": upload.next_sequence,
+        }, status=200)
+
+
+class OCRResultCompleteView(APIView):
+    """
+    Completion message of a chunked callback.
+    POST /api/v1/ocr/result/complete/
+    Payload: {job_id: UUID, chunk_count: int}
+    Authentication: Requires INTERNAL_SERVICE_TOKEN in Authorization header
+    """
+    permission_classes = [InternalServiceAuthentication]
+
+    def post(self, request):
+        serializer = OCRResultCompleteSerializer(data=request.data)
+        if not serializer.is_valid():
+            logger.warning(f"Invalid OCR completion payload: {serializer.errors}")
+            return Response(serializer.errors, status=422)
+
+        data = serializer.validated_data
+        try:
+            result = complete_result_upload(data["job_id"], data["chunk_count"])
+        except ResultIngestionError as e:
+            return _ingestion_error_response(e)
+
+        return Response({"detail": "Result received", "result_id": result.id}, status=200)
+
+
+def _ingestion_error_response(error: ResultIngestionError) -> Response:
+    body = {"detail": str(error)}
+    if isinstance(error, ChunkSequenceError):
+        body["expected_sequence"] = error.expected_sequence
+    return Response(body, status=error.status_code)
 
 
-def _calculate_review_required(items: list) -> bool:
-    """Return True if any item requires review."""
-    return any(item["review_required"] for item in items)
+class OCRTargetItemsView(APIView):
+    """
+    Target-items snapshot referenced by target_items_version in dispatch payloads.
+    GET /api/v1/ocr/target-items/{version}/
+    Authentication: Requires INTERNAL_SERVICE_TOKEN in Authorization header
+    A version's content does not change while it is cached, so the engine may
+    reuse a fetched snapshot for up to the snapshot TTL. The stored deflate
+    body is sent as is to clients that accept it.
+    """
+    permission_classes = [InternalServiceAuthentication]
+
+    def get(self, request, version):
+        snapshot = get_compressed_snapshot(version)
+        if snapshot is None:
+            logger.warning(f"Target items snapshot {version} requested but not available")
+            return Response(
+                {"detail": "Unknown or expired target items version"},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        if "deflate" in request.headers.get("Accept-Encoding", ""):
+            response = HttpResponse(snapshot, content_type="application/json")
+            response["Content-Encoding"] = "deflate"
+        else:
+            response = JsonResponse(decompress_snapshot(snapshot), safe=False)
+        response["ETag"] = f'"{version}"'
+        response["Cache-Control"] = f"private, max-age={snapshot_ttl()}"
+        patch_vary_headers(response, ["Accept-Encoding"])
+        return response
 
 
 class OCRJobStatusView(APIView):
@@ -165,7 +222,10 @@ class ManualDispatchView(APIView):
         job.save(update_fields=["status", "retries", "error_message", "updated_at"])
         
         # Trigger the dispatch task
-        dispatch_ocr_job.delay(job.id)
+        if batch_dispatch_enabled():
+            schedule_batch_dispatch()
+        else:
+            dispatch_ocr_job.delay(job.id)
         logger.info(f"Manual dispatch queued for job {job_id}")
         
         # Audit log
@@ -191,10 +251,12 @@ class AvailableOffersView(generics.ListAPIView):
     """
     GET /api/v1/available-offers/
     Returns OCRResult rows that can be selected as offers for comparison/proposals.
+    ?pagination=cursor switches to cursor pagination (no total count).
     """
 
     permission_classes = [IsAuthenticated]
     serializer_class = AvailableOfferSerializer
+    pagination_class = PageNumberOrCursorPagination
 
     def get_queryset(self):
         qs = (
@@ -0,0 +1,133 @@
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, PageNumberPagination, _reverse_ordering
+from rest_framework.response import Response
+
+# Cursor ("keyset") pagination over (created_at, id), newest first.
+#
+# Pages are fetched with WHERE (created_at, id) < <cursor> ORDER BY
+# created_at DESC, id DESC LIMIT n, which the created_at indexes answer in
+# constant time at any depth. The cursor holds both values, so rows sharing a
+# created_at are paged without an offset. No total count is computed unless
+# ?include_count=true is passed.
+#
+# List endpoints opt in with ?pagination=cursor; the next/previous links carry
+# the cursor from there on.
+
+CURSOR_MODE_PARAM = "pagination"
+INCLUDE_COUNT_PARAM = "include_count"
+
+
+def wants_cursor_pagination(request) -> bool:
+    params = request.query_params
+    return params.get(CURSOR_MODE_PARAM) == "cursor" or "cursor" in params
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    ordering = ("-created_at", "-id")
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        # CursorPagination.paginate_queryset, filtering on the whole
+        # (created_at, id) position instead of created_at plus an offset.
+        self.count = None
+        if request.query_params.get(INCLUDE_COUNT_PARAM, "").lower() in {"1", "true", "yes"}:
+            self.count = queryset.count()
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            reverse, current_position = False, None
+        else:
+            _, reverse, current_position = self.cursor
+
+        if reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if current_position is not None:
+            queryset = queryset.filter(self._after_position(current_position, reverse))
+
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+
+        if len(results) > len(self.page):
+            following_position = self._get_position_from_instance(results[-1], self.ordering)
+        else:
+            following_position = None
+
+        if reverse:
+            self.page = list(reversed(self.page))
+            self.has_next = current_position is not None
+            self.has_previous = following_position is not None
+            self.next_position = current_position
+            self.previous_position = following_position
+        else:
+            self.has_next = following_position is not None
+            self.has_previous = current_position is not None
+            self.next_position = following_position
+            self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def _after_position(self, position: str, reverse: bool) -> Q:
+        created_at, _, pk = position.rpartition("|")
+        created_at = parse_datetime(created_at)
+        if created_at is None or not pk.isdigit():
+            raise NotFound(self.invalid_cursor_message)
+
+        (created_field, pk_field) = (order.lstrip("-") for order in self.ordering)
+        # Test for: (cursor reversed) XOR (queryset reversed)
+        lookup = "lt" if reverse != self.ordering[0].startswith("-") else "gt"
+        return Q(**{f"{created_field}__{lookup}": created_at}) | Q(
+            **{created_field: created_at, f"{pk_field}__{lookup}": int(pk)}
+        )
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = [
+            instance[order.lstrip("-")] if isinstance(instance, dict) else getattr(instance, order.lstrip("-"))
+            for order in ordering
+        ]
+        return f"{values[0].isoformat()}|{values[1]}"
+
+    def get_paginated_data(self, data) -> dict:
+        payload = {
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+        }
+        if self.count is not None:
+            payload["count"] = self.count
+        payload["results"] = data
+        return payload
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+
+class PageNumberOrCursorPagination(PageNumberPagination):
+    """Default page-number pagination, switching to cursor mode on request."""
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        if wants_cursor_pagination(request):
+            self.cursor_paginator = CreatedAtCursorPagination()
+            return self.cursor_paginator.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
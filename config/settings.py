@@ -181,7 +181,7 @@ REST_FRAMEWORK = {
         'rest_framework.renderers.JSONRenderer',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'rbac.authentication.PermissionClaimsJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -232,6 +232,22 @@ else:
     MEDIA_URL = '/media/'
     MEDIA_ROOT = BASE_DIR / 'media'
 
+# Cache: Redis when REDIS_URL is set, otherwise per-process local memory (dev/tests)
+REDIS_URL = os.getenv("REDIS_URL")
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
 # Celery configuration
 CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL")
 CELERY_RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND")
@@ -242,6 +258,38 @@ CELERY_RESULT_SERIALIZER = "json"
 
 CELERY_TIMEZONE = "Europe/Berlin"
 
+# Dashboard counters (cached aggregates, recounted periodically by Celery beat)
+DASHBOARD_COUNTERS_TTL_SECONDS = int(os.getenv("DASHBOARD_COUNTERS_TTL_SECONDS", "600"))
+DASHBOARD_COUNTERS_RECONCILE_SECONDS = int(os.getenv("DASHBOARD_COUNTERS_RECONCILE_SECONDS", "300"))
+
+# Audit log partition maintenance (see rbac.tasks.maintain_audit_partitions)
+AUDIT_LOG_MAINTENANCE_SECONDS = int(os.getenv("AUDIT_LOG_MAINTENANCE_SECONDS", "86400"))
+
+# Notification delivery: "per_user" (one UserNotification row per recipient) or
+# "broadcast" (one Notification per audience with per-user read watermarks)
+NOTIFICATION_DELIVERY_MODE = os.getenv("NOTIFICATION_DELIVERY_MODE", "per_user")
+
+# Recent-activity feed: number of rendered entries kept in the ring
+RECENT_ACTIVITY_FEED_SIZE = int(os.getenv("RECENT_ACTIVITY_FEED_SIZE", "50"))
+
+# Low-stock digest: coalesce alerts over this many seconds (0 = one digest per stock change)
+NOTIFICATION_DIGEST_WINDOW_SECONDS = int(os.getenv("NOTIFICATION_DIGEST_WINDOW_SECONDS", "0"))
+
+# Notification event stream (SSE): "memory" (single process) or "redis"; defaults to redis when REDIS_URL is set
+NOTIFICATION_STREAM_BACKEND = os.getenv("NOTIFICATION_STREAM_BACKEND", "")
+NOTIFICATION_STREAM_KEEPALIVE_SECONDS = int(os.getenv("NOTIFICATION_STREAM_KEEPALIVE_SECONDS", "15"))
+
+CELERY_BEAT_SCHEDULE = {
+    "reconcile-dashboard-counters": {
+        "task": "notifications.tasks.reconcile_dashboard_counters",
+        "schedule": DASHBOARD_COUNTERS_RECONCILE_SECONDS,
+    },
+    "maintain-audit-partitions": {
+        "task": "rbac.tasks.maintain_audit_partitions",
+        "schedule": AUDIT_LOG_MAINTENANCE_SECONDS,
+    },
+}
+
 # OCR Engine configuration
 OCR_ENGINE_PROCESS_URL = os.getenv("OCR_ENGINE_PROCESS_URL")
 AI_ENGINE_API_KEY = os.getenv("AI_ENGINE_API_KEY", "")
@@ -249,5 +297,80 @@ INTERNAL_SERVICE_TOKEN = os.getenv("INTERNAL_SERVICE_TOKEN", "")
 
 OCR_ENGINE_TIMEOUT_SECONDS = int(os.getenv("OCR_ENGINE_TIMEOUT_SECONDS", "30"))
 
+# Pooled OCR engine client: connect timeout (the read timeout is
+# OCR_ENGINE_TIMEOUT_SECONDS), keep-alive connections per process, and
+# retries of failed connects / 503 answers with exponential backoff.
+OCR_ENGINE_CONNECT_TIMEOUT_SECONDS = float(os.getenv("OCR_ENGINE_CONNECT_TIMEOUT_SECONDS", "5"))
+OCR_ENGINE_POOL_SIZE = int(os.getenv("OCR_ENGINE_POOL_SIZE", "10"))
+OCR_ENGINE_MAX_RETRIES = int(os.getenv("OCR_ENGINE_MAX_RETRIES", "2"))
+OCR_ENGINE_RETRY_BACKOFF_SECONDS = float(os.getenv("OCR_ENGINE_RETRY_BACKOFF_SECONDS", "0.5"))
+
+# Batched OCR dispatch: with a window > 0, queued jobs are collected for up to
+# that many seconds (or until OCR_DISPATCH_BATCH_SIZE are waiting) and sent in
+# multi-job requests to OCR_ENGINE_BATCH_PROCESS_URL. 0 (or no batch URL)
+# dispatches each job on its own.
+OCR_DISPATCH_BATCH_WINDOW_SECONDS = int(os.getenv("OCR_DISPATCH_BATCH_WINDOW_SECONDS", "0"))
+OCR_DISPATCH_BATCH_SIZE = int(os.getenv("OCR_DISPATCH_BATCH_SIZE", "25"))
+OCR_ENGINE_BATCH_PROCESS_URL = os.getenv("OCR_ENGINE_BATCH_PROCESS_URL")
+# Jobs claimed by a flush that has not finished after this long are taken over
+OCR_DISPATCH_CLAIM_TIMEOUT_SECONDS = int(os.getenv("OCR_DISPATCH_CLAIM_TIMEOUT_SECONDS", "300"))
+CELERY_BEAT_SCHEDULE["dispatch-ocr-batches"] = {
+    "task": "ai_integration.tasks.dispatch_ocr_batch",
+    "schedule": OCR_DISPATCH_CLAIM_TIMEOUT_SECONDS,
+}
+
+# Send target items as a cached, versioned snapshot reference
+# (target_items_version) that the engine fetches once per version, instead of
+# inline in every dispatch payload.
+OCR_TARGET_ITEMS_BY_REFERENCE = os.getenv("OCR_TARGET_ITEMS_BY_REFERENCE", "False").lower() == "true"
+OCR_TARGET_ITEMS_SNAPSHOT_TTL_SECONDS = int(os.getenv("OCR_TARGET_ITEMS_SNAPSHOT_TTL_SECONDS", "3600"))
+
+# OCR result callbacks: stage the raw payload and answer 202, leaving
+# normalization and persistence to a Celery task
+OCR_CALLBACK_ASYNC = os.getenv("OCR_CALLBACK_ASYNC", "False").lower() == "true"
+
+# Stock row locking: checkout, refund, adjustment and opening-balance
+# transactions are retried on deadlock / serialization failure.
+STOCK_LOCK_MAX_ATTEMPTS = int(os.getenv("STOCK_LOCK_MAX_ATTEMPTS", "3"))
+STOCK_LOCK_RETRY_BASE_DELAY_SECONDS = float(os.getenv("STOCK_LOCK_RETRY_BASE_DELAY_SECONDS", "0.05"))
+STOCK_LOCK_RETRY_MAX_DELAY_SECONDS = float(os.getenv("STOCK_LOCK_RETRY_MAX_DELAY_SECONDS", "1.0"))
+# Log each process's retry counters at most this often (0 = never)
+STOCK_LOCK_STATS_LOG_SECONDS = int(os.getenv("STOCK_LOCK_STATS_LOG_SECONDS", "300"))
+
+# POS checkout stock decrement strategy:
+#   "locking"     - SELECT ... FOR UPDATE the cart rows, check, then UPDATE
+#   "conditional" - single UPDATE ... WHERE quantity_on_hand >= n, no row lock read
+POS_STOCK_DECREMENT_MODE = os.getenv("POS_STOCK_DECREMENT_MODE", "locking").lower()
+
+# POS barcode lookup cache
+POS_BARCODE_CACHE_TTL_SECONDS = int(os.getenv("POS_BARCODE_CACHE_TTL_SECONDS", "3600"))
+POS_BARCODE_LOCAL_CACHE_SIZE = int(os.getenv("POS_BARCODE_LOCAL_CACHE_SIZE", "2048"))
+POS_BARCODE_LOCAL_CACHE_TTL_SECONDS = int(os.getenv("POS_BARCODE_LOCAL_CACHE_TTL_SECONDS", "5"))
+# 0 = always read quantity_on_hand fresh; >0 = accept a cached quantity up to this age
+POS_BARCODE_STOCK_MAX_AGE_SECONDS = int(os.getenv("POS_BARCODE_STOCK_MAX_AGE_SECONDS", "0"))
+
+# Cached low-stock set (versioned; invalidated on low-stock transitions)
+INVENTORY_LOW_STOCK_CACHE_TTL_SECONDS = int(os.getenv("INVENTORY_LOW_STOCK_CACHE_TTL_SECONDS", "300"))
+
+# RBAC effective-permission cache, keyed on each user's permissions_version
+# (never stale in any backend). Only worth it when shared between processes,
+# so it is off by default without Redis.
+RBAC_PERMISSION_CACHE_TTL_SECONDS = int(
+    os.getenv("RBAC_PERMISSION_CACHE_TTL_SECONDS", "300" if REDIS_URL else "0")
+)
+# Embed a permission bitmap in issued JWTs so checks can skip the database
+RBAC_EMBED_PERMISSIONS_IN_TOKEN = os.getenv("RBAC_EMBED_PERMISSIONS_IN_TOKEN", "False").lower() == "true"
+
+# Audit log writes: buffered per transaction and bulk-inserted on commit;
+# set AUDIT_LOG_ASYNC to hand the batches to Celery instead
+AUDIT_LOG_ASYNC = os.getenv("AUDIT_LOG_ASYNC", "False").lower() == "true"
+AUDIT_LOG_BATCH_SIZE = int(os.getenv("AUDIT_LOG_BATCH_SIZE", "500"))
+# Monthly audit partitions (Postgres) / archival of rows older than the retention window
+AUDIT_LOG_PARTITION_MONTHS_AHEAD = int(os.getenv("AUDIT_LOG_PARTITION_MONTHS_AHEAD", "3"))
+AUDIT_LOG_RETENTION_MONTHS = int(os.getenv("AUDIT_LOG_RETENTION_MONTHS", "12"))
+AUDIT_LOG_ARCHIVE_PREFIX = os.getenv("AUDIT_LOG_ARCHIVE_PREFIX", "audit-archive")
+# Recent-activity reads look at this many days first so only hot partitions are scanned
+AUDIT_LOG_HOT_DAYS = int(os.getenv("AUDIT_LOG_HOT_DAYS", "31"))
+
 # Pharmacy Name
 PHARMACY_NAME = os.getenv("PHARMACY_NAME", "Pharmacio")
\ No newline at end of file
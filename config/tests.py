@@ -0,0 +1,51 @@
+from unittest.mock import MagicMock
+
+from django.db import transaction
+from django.test import SimpleTestCase, TestCase
+
+from config.transactions import commit_buffer
+
+
+class CommitBufferTests(TestCase):
+
+    def setUp(self):
+        self.flush = MagicMock()
+
+    def test_buffer_is_flushed_once_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            commit_buffer(self.flush).append(1)
+            commit_buffer(self.flush).append(2)
+            self.flush.assert_not_called()
+
+        self.flush.assert_called_once_with([1, 2])
+
+    def test_work_queued_in_rolled_back_savepoint_is_dropped(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            commit_buffer(self.flush, set).add(1)
+            try:
+                with transaction.atomic():
+                    commit_buffer(self.flush, set).add(2)
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+            with transaction.atomic():
+                commit_buffer(self.flush, set).add(3)
+            commit_buffer(self.flush, set).add(4)
+
+        self.assertEqual([call.args[0] for call in self.flush.call_args_list], [{1, 4}, {3}])
+
+    def test_buffers_are_kept_per_flush(self):
+        other = MagicMock()
+        with self.captureOnCommitCallbacks(execute=True):
+            commit_buffer(self.flush).append(1)
+            commit_buffer(other).append(2)
+
+        self.flush.assert_called_once_with([1])
+        other.assert_called_once_with([2])
+
+
+class CommitBufferOutsideTransactionTests(SimpleTestCase):
+
+    def test_requires_an_atomic_block(self):
+        with self.assertRaises(transaction.TransactionManagementError):
+            commit_buffer(MagicMock())
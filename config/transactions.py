@@ -0,0 +1,46 @@
+import weakref
+
+from django.db import transaction
+
+# Buffers flushed once after the current transaction commits.
+#
+# Code that runs many times inside one transaction (an audit entry per
+# action, a stock evaluation per mutation) collects its work in a buffer and
+# handles it all in a single on_commit hook. There is one buffer per
+# savepoint level: Django drops the hook of a rolled-back savepoint or
+# transaction, and since the hook holds the only strong reference to its
+# buffer, the buffer and the work queued in it are dropped too. The next
+# call at that level starts a new buffer.
+
+
+def commit_buffer(flush, factory=list, using=None):
+    """
+    The buffer for flush at the current savepoint level, created with
+    factory() and passed to flush() once the transaction commits. Must be
+    called inside an atomic block. Errors raised by flush are logged, not
+    propagated (robust hook): the transaction has already committed.
+    """
+    connection = transaction.get_connection(using)
+    if not connection.in_atomic_block:
+        raise transaction.TransactionManagementError("commit_buffer() needs an atomic block.")
+
+    pending = getattr(connection, "_commit_buffers", None)
+    if pending is None:
+        pending = connection._commit_buffers = weakref.WeakValueDictionary()
+    key = (flush, tuple(connection.savepoint_ids))
+    entry = pending.get(key)
+    if entry is None or entry.flushed:
+        entry = pending[key] = _PendingFlush(flush, factory())
+        transaction.on_commit(entry.flush, using=using, robust=True)
+    return entry.buffer
+
+
+class _PendingFlush:
+    def __init__(self, flush, buffer):
+        self._flush = flush
+        self.buffer = buffer
+        self.flushed = False
+
+    def flush(self) -> None:
+        self.flushed = True
+        self._flush(self.buffer)
@@ -148,11 +148,12 @@ class FileUploadViewTests(TestCase):
             content_type="text/csv"
         )
 
-        response = self.client.post(
-            '/api/v1/offers/upload/',
-            {'file': file, 'ware_house_name': 'Main Pharmacy'},
-            format='multipart'
-        )
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                '/api/v1/offers/upload/',
+                {'file': file, 'ware_house_name': 'Main Pharmacy'},
+                format='multipart'
+            )
 
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(response.json()['status'], 'completed')
@@ -2,7 +2,6 @@ import logging
 import os
 import uuid
 
-from django.db import transaction
 from django.shortcuts import get_object_or_404
 from rest_framework import status
 from rest_framework.exceptions import ValidationError
@@ -15,12 +14,14 @@ from .models import File
 from .serializers import UploadStatusSerializer
 from .storage import get_storage_adapter
 from ai_integration.models import OCRJob
+from ai_integration.services.ocr_batch import batch_dispatch_enabled, schedule_batch_dispatch
 from ai_integration.tasks import dispatch_ocr_job
 from inventory.services.opening_balance_import import (
     apply_opening_balance_rows,
     parse_opening_balance,
     validate_opening_balance_barcode_conflicts,
 )
+from inventory.services.stock import atomic_with_lock_retry
 from rbac.constants import UPLOAD_OFFER_FILES, VIEW_OFFER_FILES
 from rbac.permissions import user_has_permission
 from rbac.services.audit import create_audit_log
@@ -86,42 +87,9 @@ class FileUploadView(APIView):
             logger.info(f"File uploaded successfully: {file_obj.name} -> {storage_key}")
 
             if ext in opening_balance_extensions:
-                with transaction.atomic():
-                    file_record = File.objects.create(
-                        s3_key=storage_key,
-                        original_filename=file_obj.name,
-                        ware_house_name=request.data.get("ware_house_name"),
-                        status="completed"
-                    )
-
-                    import_result = apply_opening_balance_rows(opening_balance_rows)
-
-                    create_audit_log(
-                        actor=request.user,
-                        action="file_uploaded",
-                        entity=file_record,
-                        metadata={
-                            'filename': file_obj.name,
-                            'storage_key': storage_key,
-                            'file_id': str(file_record.id),
-                            'warehouse_name': request.data.get("ware_house_name"),
-                            'import_type': 'opening_balance',
-                        },
-                        request=request
-                    )
-
-                    create_audit_log(
-                        actor=request.user,
-                        action="opening_balance_imported",
-                        entity=file_record,
-                        metadata={
-                            'filename': file_obj.name,
-                            'storage_key': storage_key,
-                            'file_id': str(file_record.id),
-                            **import_result,
-                        },
-                        request=request
-                    )
+                file_record, import_result = _record_opening_balance_import(
+                    request, file_obj, storage_key, opening_balance_rows
+                )
 
                 serializer = UploadStatusSerializer(file_record)
                 response_data = serializer.data
@@ -149,7 +117,10 @@ class FileUploadView(APIView):
             )
 
             # Trigger async dispatch of OCR job to AI engine
-            dispatch_ocr_job.delay(ocr_job.id)
+            if batch_dispatch_enabled():
+                schedule_batch_dispatch()
+            else:
+                dispatch_ocr_job.delay(ocr_job.id)
             logger.info(f"OCR job created and dispatched: job_id={ocr_job.job_id}, file_id={file_record.id}")
             
             # Audit log
@@ -183,6 +154,47 @@ class FileUploadView(APIView):
             )
 
 
+@atomic_with_lock_retry
+def _record_opening_balance_import(request, file_obj, storage_key, opening_balance_rows):
+    file_record = File.objects.create(
+        s3_key=storage_key,
+        original_filename=file_obj.name,
+        ware_house_name=request.data.get("ware_house_name"),
+        status="completed"
+    )
+
+    import_result = apply_opening_balance_rows(opening_balance_rows)
+
+    create_audit_log(
+        actor=request.user,
+        action="file_uploaded",
+        entity=file_record,
+        metadata={
+            'filename': file_obj.name,
+            'storage_key': storage_key,
+            'file_id': str(file_record.id),
+            'warehouse_name': request.data.get("ware_house_name"),
+            'import_type': 'opening_balance',
+        },
+        request=request
+    )
+
+    create_audit_log(
+        actor=request.user,
+        action="opening_balance_imported",
+        entity=file_record,
+        metadata={
+            'filename': file_obj.name,
+            'storage_key': storage_key,
+            'file_id': str(file_record.id),
+            **import_result,
+        },
+        request=request
+    )
+
+    return file_record, import_result
+
+
 class UploadStatusView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.11 on 2026-10-18 14:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0004_inventorybarcode'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inventory',
+            name='is_low',
+            field=models.GeneratedField(db_persist=True, expression=models.ExpressionWrapper(models.Q(('quantity_on_hand__lte', models.F('min_threshold'))), output_field=models.BooleanField()), output_field=models.BooleanField()),
+        ),
+        migrations.AddIndex(
+            model_name='inventory',
+            index=models.Index(condition=models.Q(('is_low', True)), fields=['id'], name='inventory_low_stock_idx'),
+        ),
+    ]
@@ -5,6 +5,15 @@ class Inventory(models.Model):
     strength = models.CharField(max_length=255)
     quantity_on_hand = models.IntegerField()
     min_threshold = models.IntegerField()
+    # Maintained by the database on every write, including bulk UPDATEs.
+    is_low = models.GeneratedField(
+        expression=models.ExpressionWrapper(
+            models.Q(quantity_on_hand__lte=models.F("min_threshold")),
+            output_field=models.BooleanField(),
+        ),
+        output_field=models.BooleanField(),
+        db_persist=True,
+    )
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
@@ -14,6 +23,11 @@ class Inventory(models.Model):
         indexes = [
             models.Index(fields=['product_name']),
             models.Index(fields=['strength']),
+            models.Index(
+                fields=['id'],
+                condition=models.Q(is_low=True),
+                name='inventory_low_stock_idx',
+            ),
         ]
         constraints = [
             models.CheckConstraint(
@@ -0,0 +1,55 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from inventory.models import Inventory
+
+# The low-stock set (rows with quantity_on_hand <= min_threshold) is read from
+# the database-maintained Inventory.is_low column through a partial index and
+# cached under a version number. The version is bumped when a row enters or
+# leaves the set (low-stock transitions detected after each stock mutation)
+# and when low-stock rows are renamed or deleted.
+
+VERSION_CACHE_KEY = "inventory:low-stock:version"
+
+
+def get_low_stock_items() -> list[dict]:
+    """Low-stock rows as [{"id", "product_name", "strength"}], ordered by id."""
+    key = f"inventory:low-stock:{get_low_stock_version()}"
+    items = cache.get(key)
+    if items is None:
+        items = list(
+            Inventory.objects.filter(is_low=True)
+            .order_by("id")
+            .values("id", "product_name", "strength")
+        )
+        cache.set(key, items, _cache_ttl())
+    return items
+
+
+def get_low_stock_version() -> int:
+    version = cache.get(VERSION_CACHE_KEY)
+    if version is None:
+        # Seed from the clock so a lost counter never reuses an older version.
+        cache.add(VERSION_CACHE_KEY, time.time_ns(), None)
+        version = cache.get(VERSION_CACHE_KEY)
+    return version
+
+
+def bump_low_stock_version() -> None:
+    """Invalidate the cached low-stock set, now and again after commit."""
+    _bump()
+    transaction.on_commit(_bump)
+
+
+def _bump() -> None:
+    try:
+        cache.incr(VERSION_CACHE_KEY)
+    except ValueError:
+        cache.set(VERSION_CACHE_KEY, time.time_ns(), None)
+
+
+def _cache_ttl() -> int:
+    return getattr(settings, "INVENTORY_LOW_STOCK_CACHE_TTL_SECONDS", 300)
@@ -6,10 +6,10 @@ from decimal import Decimal
 from zipfile import BadZipFile
 from typing import Iterable
 
-from django.db import transaction
 from rest_framework import serializers
 
 from inventory.models import Inventory, InventoryBarcode
+from inventory.services.stock import atomic_with_lock_retry
 
 
 HEADER_ALIASES = {
@@ -59,59 +59,63 @@ def import_opening_balance(file_obj, extension: str) -> dict:
     return apply_opening_balance_rows(rows)
 
 
+@atomic_with_lock_retry
 def apply_opening_balance_rows(rows: list[OpeningBalanceRow]) -> dict:
     created_count = 0
     updated_count = 0
     barcode_count = 0
 
-    with transaction.atomic():
-        for row in rows:
-            item = (
-                Inventory.objects.select_for_update()
-                .filter(product_name=row.product_name, strength=row.strength)
-                .first()
+    # Lock every existing row the import may overwrite up front, in primary-key order.
+    existing_items = {
+        (item.product_name, item.strength): item
+        for item in Inventory.objects.select_for_update()
+        .filter(product_name__in={row.product_name for row in rows})
+        .order_by("id")
+    }
+
+    for row in rows:
+        item = existing_items.get((row.product_name, row.strength))
+        if item is None:
+            item = Inventory.objects.create(
+                product_name=row.product_name,
+                strength=row.strength,
+                quantity_on_hand=row.quantity_on_hand,
+                min_threshold=row.min_threshold,
             )
-            if item is None:
-                item = Inventory.objects.create(
-                    product_name=row.product_name,
-                    strength=row.strength,
-                    quantity_on_hand=row.quantity_on_hand,
-                    min_threshold=row.min_threshold,
-                )
-                created_count += 1
-            else:
-                item.quantity_on_hand = row.quantity_on_hand
-                item.min_threshold = row.min_threshold
-                item.save(update_fields=["quantity_on_hand", "min_threshold", "updated_at"])
-                updated_count += 1
-
-            if row.barcode:
-                barcode, created = InventoryBarcode.objects.get_or_create(
-                    barcode=row.barcode,
-                    defaults={
-                        "inventory_item": item,
-                        "is_primary": not InventoryBarcode.objects.filter(
-                            inventory_item=item
-                        ).exists(),
-                    },
+            created_count += 1
+        else:
+            item.quantity_on_hand = row.quantity_on_hand
+            item.min_threshold = row.min_threshold
+            item.save(update_fields=["quantity_on_hand", "min_threshold", "updated_at"])
+            updated_count += 1
+
+        if row.barcode:
+            barcode, created = InventoryBarcode.objects.get_or_create(
+                barcode=row.barcode,
+                defaults={
+                    "inventory_item": item,
+                    "is_primary": not InventoryBarcode.objects.filter(
+                        inventory_item=item
+                    ).exists(),
+                },
+            )
+            if barcode.inventory_item_id != item.id:
+                raise serializers.ValidationError(
+                    {
+                        "rows": [
+                            {
+                                "row": row.row_number,
+                                "errors": {
+                                    "barcode": [
+                                        "Barcode is already assigned to another inventory item."
+                                    ]
+                                },
+                            }
+                        ]
+                    }
                 )
-                if barcode.inventory_item_id != item.id:
-                    raise serializers.ValidationError(
-                        {
-                            "rows": [
-                                {
-                                    "row": row.row_number,
-                                    "errors": {
-                                        "barcode": [
-                                            "Barcode is already assigned to another inventory item."
-                                        ]
-                                    },
-                                }
-                            ]
-                        }
-                    )
-                if created:
-                    barcode_count += 1
+            if created:
+                barcode_count += 1
 
     return {
         "status": "completed",
@@ -0,0 +1,224 @@
+import functools
+import logging
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+from typing import Iterable
+
+from django.conf import settings
+from django.db import OperationalError, transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils import timezone
+
+from inventory.models import Inventory
+from inventory.signals import stock_levels_changed
+
+logger = logging.getLogger(__name__)
+
+# Postgres SQLSTATEs for serialization_failure and deadlock_detected.
+LOCK_CONFLICT_SQLSTATES = {"40001", "40P01"}
+
+# Retry counters are per process. Each process logs them at most every
+# STOCK_LOCK_STATS_LOG_SECONDS, when stock transactions ran in between.
+_lock_stats = Counter()
+_lock_stats_mutex = threading.Lock()
+_lock_stats_logged = {"at": time.monotonic(), "attempts": 0}
+
+
+def _record_lock_stat(name: str) -> None:
+    with _lock_stats_mutex:
+        _lock_stats[name] += 1
+    if name == "attempts":
+        _log_lock_stats_if_due()
+
+
+def _log_lock_stats_if_due() -> None:
+    interval = getattr(settings, "STOCK_LOCK_STATS_LOG_SECONDS", 300)
+    if interval <= 0:
+        return
+    now = time.monotonic()
+    with _lock_stats_mutex:
+        if now - _lock_stats_logged["at"] < interval:
+            return
+        ran = _lock_stats["attempts"] - _lock_stats_logged["attempts"]
+        _lock_stats_logged.update(at=now, attempts=_lock_stats["attempts"])
+    if ran:
+        stats = stock_lock_stats()
+        logger.info(
+            "Stock lock retries: %s attempts, %s retries, %s exhausted (retry rate %.2f%%)",
+            stats["attempts"], stats["retries"], stats["exhausted"], stats["retry_rate"] * 100,
+        )
+
+
+def stock_lock_stats() -> dict:
+    """
+    Process-local counters for stock transactions run through
+    atomic_with_lock_retry: attempts, retries, exhausted and retry_rate.
+    Logged periodically (see STOCK_LOCK_STATS_LOG_SECONDS).
+    """
+    with _lock_stats_mutex:
+        attempts = _lock_stats["attempts"]
+        retries = _lock_stats["retries"]
+        exhausted = _lock_stats["exhausted"]
+    return {
+        "attempts": attempts,
+        "retries": retries,
+        "exhausted": exhausted,
+        "retry_rate": (retries / attempts) if attempts else 0.0,
+    }
+
+
+def reset_stock_lock_stats() -> None:
+    with _lock_stats_mutex:
+        _lock_stats.clear()
+        _lock_stats_logged.update(at=time.monotonic(), attempts=0)
+
+
+def is_lock_conflict(exc: Exception) -> bool:
+    cause = exc.__cause__ or exc
+    if getattr(cause, "pgcode", None) in LOCK_CONFLICT_SQLSTATES:
+        return True
+    # SQLite reports writer contention as a plain OperationalError.
+    return "database is locked" in str(exc).lower()
+
+
+class _LockConflict(Exception):
+    """Carries a lock conflict raised inside the block out of atomic()."""
+
+
+def atomic_with_lock_retry(func):
+    """
+    Run ``func`` in transaction.atomic() and re-run the whole block when the
+    database aborts it with a deadlock or serialization failure.
+
+    Retrying is only possible from the outermost atomic block: when called
+    inside an existing transaction the function joins it and errors propagate
+    to the caller, whose transaction is already aborted.
+    """
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if transaction.get_connection().in_atomic_block:
+            with transaction.atomic():
+                return func(*args, **kwargs)
+
+        max_attempts = max(1, getattr(settings, "STOCK_LOCK_MAX_ATTEMPTS", 3))
+        base_delay = getattr(settings, "STOCK_LOCK_RETRY_BASE_DELAY_SECONDS", 0.05)
+        max_delay = getattr(settings, "STOCK_LOCK_RETRY_MAX_DELAY_SECONDS", 1.0)
+
+        for attempt in range(1, max_attempts + 1):
+            _record_lock_stat("attempts")
+            try:
+                with transaction.atomic():
+                    try:
+                        return func(*args, **kwargs)
+                    except OperationalError as exc:
+                        if not is_lock_conflict(exc):
+                            raise
+                        raise _LockConflict() from exc
+            except _LockConflict as conflict:
+                # Only conflicts raised by func() are retried: errors from the
+                # commit or its on_commit hooks come after the work committed.
+                exc = conflict.__cause__
+                if attempt == max_attempts:
+                    _record_lock_stat("exhausted")
+                    logger.error(
+                        "%s gave up after %s attempts on lock conflict: %s",
+                        func.__qualname__, attempt, exc,
+                    )
+                    raise exc
+
+                _record_lock_stat("retries")
+                delay = min(
+                    max_delay,
+                    base_delay * (2 ** (attempt - 1)) + random.uniform(0, base_delay),
+                )
+                logger.warning(
+                    "%s hit a lock conflict (attempt %s/%s), retrying in %.3fs: %s",
+                    func.__qualname__, attempt, max_attempts, delay, exc,
+                )
+                time.sleep(delay)
+
+    return wrapper
+
+
+def aggregate_quantities(lines: Iterable[tuple[int, int]]) -> dict[int, int]:
+    """Sum (inventory_id, quantity) pairs so repeated cart lines hit each row once."""
+    totals = defaultdict(int)
+    for inventory_id, quantity in lines:
+        totals[inventory_id] += quantity
+    return dict(totals)
+
+
+def lock_inventory_rows(inventory_ids: Iterable[int]) -> dict[int, Inventory]:
+    """
+    Lock every referenced Inventory row with a single SELECT ... FOR UPDATE.
+    Rows are locked in primary-key order so concurrent tills never wait on
+    each other in opposite order. Must be called inside a transaction.
+    """
+    ids = sorted(set(inventory_ids))
+    if not ids:
+        return {}
+
+    rows = Inventory.objects.select_for_update().filter(id__in=ids).order_by("id")
+    return {item.id: item for item in rows}
+
+
+def apply_stock_deltas(deltas: dict[int, int]) -> int:
+    """
+    Apply signed quantity deltas to many Inventory rows with one
+    UPDATE ... SET quantity_on_hand = quantity_on_hand + CASE ... END.
+    Returns the number of rows updated.
+    """
+    deltas = {inventory_id: delta for inventory_id, delta in deltas.items() if delta}
+    if not deltas:
+        return 0
+
+    updated = Inventory.objects.filter(id__in=deltas.keys()).update(
+        quantity_on_hand=F("quantity_on_hand") + _delta_case(deltas),
+        updated_at=timezone.now(),
+    )
+    stock_levels_changed.send(sender=Inventory, inventory_ids=list(deltas))
+    return updated
+
+
+def decrement_stock_if_available(quantities: dict[int, int]) -> bool:
+    """
+    Compare-and-swap decrement without a prior row lock:
+    UPDATE ... SET quantity_on_hand = quantity_on_hand - n
+    WHERE id IN (...) AND quantity_on_hand >= n.
+    Returns False, leaving every row untouched, when any row is missing
+    or short of stock (detected from the affected-row count).
+    """
+    quantities = {inventory_id: quantity for inventory_id, quantity in quantities.items() if quantity}
+    if not quantities:
+        return True
+
+    try:
+        with transaction.atomic():
+            updated = Inventory.objects.filter(
+                id__in=quantities.keys(),
+                quantity_on_hand__gte=_delta_case(quantities),
+            ).update(
+                quantity_on_hand=F("quantity_on_hand") - _delta_case(quantities),
+                updated_at=timezone.now(),
+            )
+            if updated != len(quantities):
+                raise _StockUnavailable
+    except _StockUnavailable:
+        return False
+    stock_levels_changed.send(sender=Inventory, inventory_ids=list(quantities))
+    return True
+
+
+class _StockUnavailable(Exception):
+    pass
+
+
+def _delta_case(deltas: dict[int, int]) -> Case:
+    return Case(
+        *[When(id=inventory_id, then=Value(delta)) for inventory_id, delta in deltas.items()],
+        default=Value(0),
+        output_field=IntegerField(),
+    )
@@ -0,0 +1,24 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from inventory.models import Inventory
+from inventory.services.low_stock import bump_low_stock_version
+
+# Sent after quantity_on_hand is changed with bulk UPDATEs that bypass
+# Inventory.save() (checkout, refund). Arguments: inventory_ids.
+stock_levels_changed = Signal()
+
+IDENTITY_FIELDS = {"product_name", "strength"}
+
+
+@receiver(post_save, sender=Inventory)
+def refresh_low_stock_on_rename(sender, instance, created, update_fields=None, **kwargs):
+    # Entering or leaving the low-stock set is handled by the low-stock
+    # transition engine; renames change the cached entries in place.
+    if not created and (update_fields is None or IDENTITY_FIELDS & set(update_fields)):
+        bump_low_stock_version()
+
+
+@receiver(post_delete, sender=Inventory)
+def refresh_low_stock_on_delete(sender, instance, **kwargs):
+    bump_low_stock_version()
@@ -1,10 +1,24 @@
+import time
+from unittest.mock import patch
+
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.cache import cache
+from django.db import OperationalError, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
 from rest_framework import status
 from rest_framework.test import APIClient
 
 from inventory.models import Inventory, InventoryBarcode
+from inventory.services.low_stock import get_low_stock_items, get_low_stock_version
+from inventory.services.stock import (
+    apply_stock_deltas,
+    atomic_with_lock_retry,
+    lock_inventory_rows,
+    reset_stock_lock_stats,
+    stock_lock_stats,
+)
 from rbac.models import AuditLog, Permission, Role, UserRole
+from rbac.services.audit import create_audit_log
 
 
 class InventoryListApiTests(TestCase):
@@ -195,11 +209,12 @@ class InventoryAdjustApiTests(TestCase):
     def test_adjustment_writes_audit_log(self):
         client = APIClient()
         client.force_authenticate(user=self.permitted_user)
-        client.post(
-            self._url(self.item.pk),
-            {"adjustment": 10, "reason": "audit test"},
-            format="json",
-        )
+        with self.captureOnCommitCallbacks(execute=True):
+            client.post(
+                self._url(self.item.pk),
+                {"adjustment": 10, "reason": "audit test"},
+                format="json",
+            )
         log = AuditLog.objects.filter(
             action="inventory_adjusted",
             actor=self.permitted_user,
@@ -364,7 +379,8 @@ class InventoryCreateApiTests(TestCase):
     def test_create_writes_audit_log(self):
         client = APIClient()
         client.force_authenticate(user=self.permitted_user)
-        client.post(self.URL, self._payload(), format="json")
+        with self.captureOnCommitCallbacks(execute=True):
+            client.post(self.URL, self._payload(), format="json")
         log = AuditLog.objects.filter(
             action="inventory_item_created",
             actor=self.permitted_user,
@@ -373,3 +389,195 @@ class InventoryCreateApiTests(TestCase):
         self.assertEqual(log.metadata["product_name"], "Aspirin")
         self.assertEqual(log.metadata["quantity_on_hand"], 50)
         self.assertIsNone(log.metadata["barcode"])
+
+
+class _DeadlockDetected(Exception):
+    pgcode = "40P01"
+
+
+def _deadlock_error():
+    exc = OperationalError("deadlock detected")
+    exc.__cause__ = _DeadlockDetected()
+    return exc
+
+
+@override_settings(STOCK_LOCK_MAX_ATTEMPTS=3)
+@patch("inventory.services.stock.time.sleep")
+class StockLockRetryTests(TransactionTestCase):
+    def setUp(self):
+        reset_stock_lock_stats()
+
+    def test_lock_conflict_is_retried_until_success(self, mock_sleep):
+        calls = []
+
+        @atomic_with_lock_retry
+        def restock():
+            calls.append(1)
+            item = Inventory.objects.create(
+                product_name=f"Aspirin {len(calls)}",
+                strength="100mg",
+                quantity_on_hand=10,
+                min_threshold=2,
+            )
+            if len(calls) < 3:
+                raise _deadlock_error()
+            return item
+
+        item = restock()
+
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(mock_sleep.call_count, 2)
+        # Failed attempts were rolled back before re-running the block.
+        self.assertEqual(list(Inventory.objects.values_list("pk", flat=True)), [item.pk])
+        stats = stock_lock_stats()
+        self.assertEqual(stats["attempts"], 3)
+        self.assertEqual(stats["retries"], 2)
+        self.assertEqual(stats["exhausted"], 0)
+
+    def test_gives_up_after_max_attempts(self, mock_sleep):
+        @atomic_with_lock_retry
+        def always_deadlocks():
+            raise _deadlock_error()
+
+        with self.assertRaises(OperationalError):
+            always_deadlocks()
+
+        stats = stock_lock_stats()
+        self.assertEqual(stats["attempts"], 3)
+        self.assertEqual(stats["exhausted"], 1)
+
+    @override_settings(STOCK_LOCK_STATS_LOG_SECONDS=60)
+    def test_counters_are_logged_periodically(self, mock_sleep):
+        @atomic_with_lock_retry
+        def restock():
+            return None
+
+        with self.assertNoLogs("inventory.services.stock", level="INFO"):
+            restock()
+
+        later = time.monotonic() + 61
+        with patch("inventory.services.stock.time.monotonic", return_value=later):
+            with self.assertLogs("inventory.services.stock", level="INFO") as logs:
+                restock()
+            with self.assertNoLogs("inventory.services.stock", level="INFO"):
+                restock()
+
+        self.assertIn("2 attempts, 0 retries, 0 exhausted", logs.output[0])
+
+    def test_other_database_errors_are_not_retried(self, mock_sleep):
+        calls = []
+
+        @atomic_with_lock_retry
+        def broken():
+            calls.append(1)
+            raise OperationalError("no such table")
+
+        with self.assertRaises(OperationalError):
+            broken()
+
+        self.assertEqual(len(calls), 1)
+        mock_sleep.assert_not_called()
+
+    def test_nested_call_joins_outer_transaction_without_retry(self, mock_sleep):
+        calls = []
+
+        @atomic_with_lock_retry
+        def inner():
+            calls.append(1)
+            raise _deadlock_error()
+
+        with self.assertRaises(OperationalError):
+            with transaction.atomic():
+                inner()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(stock_lock_stats()["attempts"], 0)
+
+    def test_errors_after_commit_are_not_retried(self, mock_sleep):
+        calls = []
+
+        @atomic_with_lock_retry
+        def restock():
+            calls.append(1)
+            item = Inventory.objects.create(
+                product_name="Aspirin", strength="100mg", quantity_on_hand=10, min_threshold=2
+            )
+            create_audit_log(actor=None, action="stock_adjusted", entity=item)
+            return item
+
+        with patch("rbac.services.audit.AuditLog.objects.bulk_create", side_effect=_deadlock_error()):
+            item = restock()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(list(Inventory.objects.values_list("pk", flat=True)), [item.pk])
+        mock_sleep.assert_not_called()
+
+    def test_lock_inventory_rows_returns_rows_by_id(self, mock_sleep):
+        first = Inventory.objects.create(
+            product_name="Aspirin", strength="100mg", quantity_on_hand=1, min_threshold=0
+        )
+        second = Inventory.objects.create(
+            product_name="Ibuprofen", strength="400mg", quantity_on_hand=1, min_threshold=0
+        )
+
+        with transaction.atomic():
+            locked = lock_inventory_rows([second.pk, first.pk, second.pk, 999999])
+
+        self.assertEqual(list(locked), [first.pk, second.pk])
+
+
+class LowStockSetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.low = Inventory.objects.create(
+                product_name="Aspirin", strength="100mg", quantity_on_hand=2, min_threshold=5
+            )
+            self.ok = Inventory.objects.create(
+                product_name="Ibuprofen", strength="400mg", quantity_on_hand=50, min_threshold=5
+            )
+
+    def test_is_low_is_maintained_by_bulk_updates(self):
+        apply_stock_deltas({self.ok.pk: -46, self.low.pk: 10})
+
+        self.assertEqual(
+            list(Inventory.objects.filter(is_low=True).values_list("pk", flat=True)),
+            [self.ok.pk],
+        )
+
+    def test_low_stock_set_is_cached(self):
+        self.assertEqual(
+            get_low_stock_items(),
+            [{"id": self.low.pk, "product_name": "Aspirin", "strength": "100mg"}],
+        )
+
+        with self.assertNumQueries(0):
+            get_low_stock_items()
+
+    def test_transition_invalidates_cached_set(self):
+        get_low_stock_items()
+        version = get_low_stock_version()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            apply_stock_deltas({self.ok.pk: -46})
+
+        self.assertNotEqual(get_low_stock_version(), version)
+        self.assertEqual([item["id"] for item in get_low_stock_items()], [self.low.pk, self.ok.pk])
+
+    def test_stock_change_without_transition_keeps_cached_set(self):
+        version = get_low_stock_version()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            apply_stock_deltas({self.ok.pk: -1})
+
+        self.assertEqual(get_low_stock_version(), version)
+
+    def test_rename_invalidates_cached_set(self):
+        get_low_stock_items()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.low.product_name = "Aspirin Forte"
+            self.low.save(update_fields=["product_name", "updated_at"])
+
+        self.assertEqual(get_low_stock_items()[0]["product_name"], "Aspirin Forte")
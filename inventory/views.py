@@ -11,6 +11,7 @@ from inventory.serializers import (
     InventoryCreateSerializer,
     InventoryListSerializer,
 )
+from inventory.services.stock import atomic_with_lock_retry, lock_inventory_rows
 from rbac.constants import ADJUST_INVENTORY, CREATE_INVENTORY
 from rbac.permissions import user_has_permission
 from rbac.services.audit import create_audit_log
@@ -83,45 +84,47 @@ class InventoryAdjustView(APIView):
         adjustment = serializer.validated_data["adjustment"]
         reason = serializer.validated_data["reason"]
 
-        with transaction.atomic():
-            try:
-                item = Inventory.objects.select_for_update().get(pk=pk)
-            except Inventory.DoesNotExist:
-                return Response(
-                    {"detail": "Inventory item not found."},
-                    status=status.HTTP_404_NOT_FOUND,
-                )
-
-            new_quantity = item.quantity_on_hand + adjustment
-            if new_quantity < 0:
-                return Response(
-                    {
-                        "detail": (
-                            f"Adjustment would result in negative stock "
-                            f"({item.quantity_on_hand} + {adjustment} = {new_quantity})."
-                        )
-                    },
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-            previous_quantity = item.quantity_on_hand
-            item.quantity_on_hand = new_quantity
-            item.save(update_fields=["quantity_on_hand"])
+        return self._apply_adjustment(request, pk, adjustment, reason)
 
-            create_audit_log(
-                actor=request.user,
-                action="inventory_adjusted",
-                entity=item,
-                metadata={
-                    "product_name": item.product_name,
-                    "previous_quantity": previous_quantity,
-                    "adjustment": adjustment,
-                    "new_quantity": new_quantity,
-                    "reason": reason,
+    @atomic_with_lock_retry
+    def _apply_adjustment(self, request, pk, adjustment, reason):
+        item = lock_inventory_rows([pk]).get(pk)
+        if item is None:
+            return Response(
+                {"detail": "Inventory item not found."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        new_quantity = item.quantity_on_hand + adjustment
+        if new_quantity < 0:
+            return Response(
+                {
+                    "detail": (
+                        f"Adjustment would result in negative stock "
+                        f"({item.quantity_on_hand} + {adjustment} = {new_quantity})."
+                    )
                 },
-                request=request,
+                status=status.HTTP_400_BAD_REQUEST,
             )
 
+        previous_quantity = item.quantity_on_hand
+        item.quantity_on_hand = new_quantity
+        item.save(update_fields=["quantity_on_hand"])
+
+        create_audit_log(
+            actor=request.user,
+            action="inventory_adjusted",
+            entity=item,
+            metadata={
+                "product_name": item.product_name,
+                "previous_quantity": previous_quantity,
+                "adjustment": adjustment,
+                "new_quantity": new_quantity,
+                "reason": reason,
+            },
+            request=request,
+        )
+
         return Response(
             {
                 "id": item.pk,
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from notifications.services import dashboard_counters
+from notifications.services.delivery import recompute_unread_counters
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = "Recompute the denormalized per-user unread notification counters from the inbox"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            action='append',
+            dest='usernames',
+            help='Only repair this user (may be given more than once)'
+        )
+
+    def handle(self, *args, **options):
+        users = User.objects.order_by('id')
+        if options['usernames']:
+            users = users.filter(username__in=options['usernames'])
+
+        repaired = recompute_unread_counters(users)
+        dashboard_counters.invalidate_unread(users.values_list('id', flat=True))
+
+        self.stdout.write(self.style.SUCCESS(f"Unread counters repaired for {repaired} users"))
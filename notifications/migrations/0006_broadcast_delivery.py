@@ -0,0 +1,213 @@
+import importlib
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# In broadcast delivery mode (NOTIFICATION_DELIVERY_MODE=broadcast, exposed to
+# the trigger as the pharmacio.notification_delivery session setting) a low
+# stock alert is stored as one Notification for the "staff" audience instead
+# of one UserNotification row per admin and pharmacist.
+
+
+def update_postgres_threshold_trigger_for_broadcast(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    schema_editor.execute(
+        """
+        CREATE OR REPLACE FUNCTION notifications_handle_inventory_threshold()
+        RETURNS trigger AS $$
+        DECLARE
+            record_id bigint;
+            was_low boolean;
+            is_low boolean;
+            low_message text;
+            recovered_message text;
+            created_notification_id bigint;
+        BEGIN
+            is_low := NEW.quantity_on_hand <= NEW.min_threshold;
+
+            SELECT id, is_below_threshold
+            INTO record_id, was_low
+            FROM notifications_stockalertrecord
+            WHERE inventory_id = NEW.id
+            FOR UPDATE;
+
+            IF NOT FOUND THEN
+                INSERT INTO notifications_stockalertrecord (
+                    inventory_id,
+                    is_below_threshold,
+                    last_notified_at,
+                    last_notified_quantity,
+                    updated_at
+                )
+                VALUES (NEW.id, FALSE, NULL, NULL, NOW())
+                RETURNING id, is_below_threshold INTO record_id, was_low;
+            END IF;
+
+            IF is_low AND NOT was_low THEN
+                low_message := format(
+                    'Low stock alert: %%s (%%s) is at %%s, threshold is %%s.',
+                    NEW.product_name,
+                    NEW.strength,
+                    NEW.quantity_on_hand,
+                    NEW.min_threshold
+                );
+
+                IF current_setting('pharmacio.notification_delivery', TRUE) = 'broadcast' THEN
+                    INSERT INTO notifications_notifications (message, type, audience, created_at)
+                    VALUES (low_message, 'low_stock', 'staff', NOW());
+                ELSE
+                    INSERT INTO notifications_notifications (message, type, audience, created_at)
+                    VALUES (low_message, 'low_stock', '', NOW())
+                    RETURNING id INTO created_notification_id;
+
+                    INSERT INTO notifications_usernotification (
+                        notification_id,
+                        user_id,
+                        is_read,
+                        read_at,
+                        created_at,
+                        updated_at
+                    )
+                    SELECT
+                        created_notification_id,
+                        u.id,
+                        FALSE,
+                        NULL,
+                        NOW(),
+                        NOW()
+                    FROM users u
+                    WHERE u.is_active = TRUE
+                      AND COALESCE(u.role, '') IN ('admin', 'pharmacist');
+                END IF;
+
+                INSERT INTO notifications_notificationlog (
+                    inventory_id,
+                    record_id,
+                    event,
+                    message,
+                    created_notifications,
+                    created_at
+                )
+                VALUES (
+                    NEW.id,
+                    record_id,
+                    'low_stock_detected',
+                    low_message,
+                    1,
+                    NOW()
+                );
+
+                UPDATE notifications_stockalertrecord
+                SET
+                    is_below_threshold = TRUE,
+                    last_notified_at = NOW(),
+                    last_notified_quantity = NEW.quantity_on_hand,
+                    updated_at = NOW()
+                WHERE id = record_id;
+
+            ELSIF NOT is_low AND was_low THEN
+                recovered_message := format(
+                    'Stock recovered: %%s (%%s) is now %%s, threshold is %%s.',
+                    NEW.product_name,
+                    NEW.strength,
+                    NEW.quantity_on_hand,
+                    NEW.min_threshold
+                );
+
+                INSERT INTO notifications_notificationlog (
+                    inventory_id,
+                    record_id,
+                    event,
+                    message,
+                    created_notifications,
+                    created_at
+                )
+                VALUES (
+                    NEW.id,
+                    record_id,
+                    'stock_recovered',
+                    recovered_message,
+                    0,
+                    NOW()
+                );
+
+                UPDATE notifications_stockalertrecord
+                SET
+                    is_below_threshold = FALSE,
+                    updated_at = NOW()
+                WHERE id = record_id;
+            END IF;
+
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        """
+    )
+
+
+def restore_user_delivery_trigger(apps, schema_editor):
+    previous = importlib.import_module("notifications.migrations.0003_usernotification_delivery")
+    previous.update_postgres_threshold_trigger_for_user_delivery(apps, schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0005_rename_notifications_notification_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationReadMarker',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('read_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='NotificationReadState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('read_through_id', models.BigIntegerField(default=0)),
+                ('read_through_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='audience',
+            field=models.CharField(blank=True, default='', max_length=50),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['audience', 'created_at'], name='notificatio_audienc_f90e8c_idx'),
+        ),
+        migrations.AddField(
+            model_name='notificationreadmarker',
+            name='notification',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='read_markers', to='notifications.notification'),
+        ),
+        migrations.AddField(
+            model_name='notificationreadmarker',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notification_read_markers', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='notificationreadstate',
+            name='user',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='notification_read_state', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='notificationreadmarker',
+            constraint=models.UniqueConstraint(fields=('user', 'notification'), name='notification_read_marker_unique'),
+        ),
+        migrations.RunPython(
+            update_postgres_threshold_trigger_for_broadcast,
+            reverse_code=restore_user_delivery_trigger,
+        ),
+    ]
@@ -0,0 +1,50 @@
+import importlib
+
+from django.db import migrations
+
+# Low-stock transitions are now detected by
+# notifications.services.stock_alerts after each stock mutation commits, on
+# every backend, so the Postgres trigger goes away.
+
+
+def drop_postgres_threshold_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    schema_editor.execute(
+        """
+        DROP TRIGGER IF EXISTS trg_inventory_threshold_notify ON inventory_inventory;
+        DROP FUNCTION IF EXISTS notifications_handle_inventory_threshold();
+        """
+    )
+
+
+def restore_postgres_threshold_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    previous = importlib.import_module("notifications.migrations.0006_broadcast_delivery")
+    previous.update_postgres_threshold_trigger_for_broadcast(apps, schema_editor)
+    schema_editor.execute(
+        """
+        CREATE TRIGGER trg_inventory_threshold_notify
+        AFTER INSERT OR UPDATE OF quantity_on_hand, min_threshold
+        ON inventory_inventory
+        FOR EACH ROW
+        EXECUTE FUNCTION notifications_handle_inventory_threshold();
+        """
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notifications", "0006_broadcast_delivery"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            drop_postgres_threshold_trigger,
+            reverse_code=restore_postgres_threshold_trigger,
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.11 on 2026-10-18 15:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0005_inventory_is_low'),
+        ('notifications', '0007_drop_stock_threshold_trigger'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificationlog',
+            name='digest_pending',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='notificationlog',
+            name='notification',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='logs', to='notifications.notification'),
+        ),
+        migrations.AddIndex(
+            model_name='notificationlog',
+            index=models.Index(condition=models.Q(('digest_pending', True)), fields=['id'], name='notificationlog_pending_idx'),
+        ),
+    ]
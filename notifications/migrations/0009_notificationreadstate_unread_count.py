@@ -0,0 +1,18 @@
+# Generated by Django 5.2.11 on 2026-10-18 15:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0008_notificationlog_digest'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificationreadstate',
+            name='unread_count',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -3,6 +3,14 @@ from django.db import models
 
 class NotificationType(models.TextChoices):
     LOW_STOCK = "low_stock", "Low Stock"
+    LOW_STOCK_DIGEST = "low_stock_digest", "Low Stock Digest"
+
+
+class NotificationAudience(models.TextChoices):
+    # Empty audience: delivered per user through UserNotification rows.
+    DIRECT = "", "Direct"
+    ALL = "all", "All users"
+    STAFF = "staff", "Admins and pharmacists"
 
 
 class NotificationLogEvent(models.TextChoices):
@@ -13,8 +21,10 @@ class NotificationLogEvent(models.TextChoices):
 class Notification(models.Model):
     message = models.TextField()
     type = models.CharField(max_length=50)
+    # Broadcast notifications are stored once for an audience ("all", "staff"
+    # or a role name) instead of once per recipient.
+    audience = models.CharField(max_length=50, blank=True, default=NotificationAudience.DIRECT)
     created_at = models.DateTimeField(auto_now_add=True)
-    
 
     def __str__(self):
         return f"{self.type} - {self.message[:20]}..."
@@ -24,6 +34,7 @@ class Notification(models.Model):
         indexes = [
             models.Index(fields=['type']),
             models.Index(fields=['created_at']),
+            models.Index(fields=['audience', 'created_at']),
         ]
 
 
@@ -59,12 +70,27 @@ class NotificationLog(models.Model):
     event = models.CharField(max_length=64, choices=NotificationLogEvent.choices)
     message = models.TextField()
     created_notifications = models.PositiveIntegerField(default=0)
+    # The (possibly digest) notification this event was reported in, and
+    # whether it is still waiting for the current digest window to close.
+    notification = models.ForeignKey(
+        Notification,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="logs",
+    )
+    digest_pending = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         indexes = [
             models.Index(fields=["event", "created_at"]),
             models.Index(fields=["inventory", "created_at"]),
+            models.Index(
+                fields=["id"],
+                condition=models.Q(digest_pending=True),
+                name="notificationlog_pending_idx",
+            ),
         ]
 
 
@@ -94,4 +120,46 @@ class UserNotification(models.Model):
         indexes = [
             models.Index(fields=["user", "is_read", "created_at"]),
             models.Index(fields=["notification", "user"]),
-        ]
\ No newline at end of file
+        ]
+
+
+class NotificationReadState(models.Model):
+    """
+    Per-user notification state: the broadcast read watermark (broadcasts
+    with id <= read_through_id are read) and the denormalized unread count
+    (null until first computed).
+    """
+
+    user = models.OneToOneField(
+        "users.User",
+        on_delete=models.CASCADE,
+        related_name="notification_read_state",
+    )
+    read_through_id = models.BigIntegerField(default=0)
+    read_through_at = models.DateTimeField(null=True, blank=True)
+    unread_count = models.PositiveIntegerField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+
+class NotificationReadMarker(models.Model):
+    """Sparse read marker for a broadcast above the user's watermark."""
+
+    notification = models.ForeignKey(
+        Notification,
+        on_delete=models.CASCADE,
+        related_name="read_markers",
+    )
+    user = models.ForeignKey(
+        "users.User",
+        on_delete=models.CASCADE,
+        related_name="notification_read_markers",
+    )
+    read_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "notification"],
+                name="notification_read_marker_unique",
+            )
+        ]
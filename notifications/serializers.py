@@ -1,6 +1,6 @@
 from rest_framework import serializers
 
-from notifications.models import UserNotification
+from notifications.models import Notification, UserNotification
 
 
 class UserNotificationSerializer(serializers.ModelSerializer):
@@ -21,3 +21,57 @@ class UserNotificationSerializer(serializers.ModelSerializer):
             "read_at",
             "created_at",
         ]
+
+
+class InboxNotificationSerializer(serializers.ModelSerializer):
+    """
+    Inbox entry read from an annotated Notification (see
+    notifications.services.delivery.inbox_queryset). Broadcast entries have
+    no UserNotification, so their id is null.
+    """
+
+    id = serializers.IntegerField(source="user_notification_id", allow_null=True, default=None)
+    notification_id = serializers.IntegerField(source="pk")
+    is_read = serializers.BooleanField(default=False)
+    read_at = serializers.DateTimeField(allow_null=True, default=None)
+
+    class Meta:
+        model = Notification
+        fields = [
+            "id",
+            "notification_id",
+            "type",
+            "message",
+            "audience",
+            "is_read",
+            "read_at",
+            "created_at",
+        ]
+
+
+class MarkNotificationsReadSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        required=False,
+        max_length=500,
+    )
+    notification_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        required=False,
+        max_length=500,
+    )
+    up_to_id = serializers.IntegerField(required=False, min_value=1)
+    up_to = serializers.DateTimeField(required=False)
+
+    def validate(self, attrs):
+        by_list = "ids" in attrs or "notification_ids" in attrs
+        by_cutoff = [key for key in ("up_to_id", "up_to") if key in attrs]
+        if len(by_cutoff) > 1 or (by_list and by_cutoff):
+            raise serializers.ValidationError(
+                "Provide ids/notification_ids, up_to_id or up_to, not a combination."
+            )
+        if not by_list and not by_cutoff:
+            raise serializers.ValidationError(
+                "Provide ids/notification_ids, up_to_id or up_to."
+            )
+        return attrs
@@ -0,0 +1,187 @@
+import functools
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.fields import DateTimeField
+
+from rbac.models import AuditLog
+from users.models import User
+
+# Recent-activity feed.
+#
+# The newest audit entries are kept pre-rendered in a capped ring: a Redis
+# list trimmed with LTRIM when REDIS_URL is configured, otherwise a single
+# list in the Django cache. The audit writer appends to it after commit, so
+# the dashboard reads the last N entries without touching rbac_auditlog. A
+# cold ring (first read, or after Redis was flushed) is rebuilt from AuditLog.
+#
+# In Redis, appends are one MULTI (LPUSH + LTRIM) and happen whether or not
+# the ring is primed; a rebuild merges the entries pushed since it read
+# AuditLog, so appends racing a cold read are not lost. The cache ring is a
+# read-modify-write and best effort: concurrent appends can drop each other's
+# entries.
+
+ACTION_MESSAGES = {
+    "proposal_generated": {"msg": "New proposal generated", "theme": "blue", "icon": "document"},
+    "proposal_approved": {"msg": "Proposal approved", "theme": "green", "icon": "check"},
+    "proposal_rejected": {"msg": "Proposal rejected", "theme": "red", "icon": "close"},
+    "inventory_adjusted": {"msg": "Inventory adjusted", "theme": "blue", "icon": "box"},
+    "inventory_item_created": {"msg": "New inventory item created", "theme": "green", "icon": "box"},
+    "sale_recorded": {"msg": "POS transaction recorded", "theme": "green", "icon": "cash"},
+    "refund_processed": {"msg": "POS refund processed", "theme": "green", "icon": "cash"},
+    "assign_role": {"msg": "Role assigned", "theme": "blue", "icon": "shield"},
+    "revoke_role": {"msg": "Role revoked", "theme": "red", "icon": "shield"},
+    "create_permission": {"msg": "Permission created", "theme": "green", "icon": "key"},
+    "delete_permission": {"msg": "Permission deleted", "theme": "red", "icon": "key"},
+    "user_registered": {"msg": "New user registered", "theme": "green", "icon": "user"},
+    "admin_created": {"msg": "Admin user created", "theme": "green", "icon": "shield"},
+    "password_changed": {"msg": "Password changed", "theme": "blue", "icon": "key"},
+    "file_uploaded": {"msg": "File uploaded", "theme": "blue", "icon": "upload"},
+}
+
+RING_KEY = "pharmacio:activity:ring"
+PRIMED_KEY = "pharmacio:activity:primed"
+
+
+def feed_size() -> int:
+    return getattr(settings, "RECENT_ACTIVITY_FEED_SIZE", 50)
+
+
+def recent_activity(limit: int) -> list[dict]:
+    """The newest `limit` rendered entries, newest first."""
+    if limit > feed_size():
+        return render_entries(_load_from_audit_log(limit))
+
+    ring = get_ring()
+    entries = ring.read(limit)
+    if entries is None:
+        entries = render_entries(_load_from_audit_log(feed_size()))
+        ring.replace(entries)
+        entries = entries[:limit]
+    return entries
+
+
+def append_entries(logs) -> None:
+    """Add freshly written audit entries to the ring, if it is primed."""
+    entries = render_entries(sorted(logs, key=lambda log: (log.created_at, log.pk)))
+    if entries:
+        get_ring().push(entries)
+
+
+def render_entries(logs) -> list[dict]:
+    logs = list(logs)
+    missing = {log.actor_id for log in logs if log.actor_id and not AuditLog.actor.is_cached(log)}
+    usernames = dict(User.objects.filter(pk__in=missing).values_list("pk", "username")) if missing else {}
+    created_at = DateTimeField()
+
+    entries = []
+    for log in logs:
+        meta = ACTION_MESSAGES.get(log.action, {"msg": f"System action: {log.action}", "theme": "gray", "icon": "info"})
+        if not log.actor_id:
+            actor = "System"
+        elif log.actor_id in usernames:
+            actor = usernames[log.actor_id]
+        else:
+            actor = log.actor.username
+        entries.append(
+            {
+                "id": log.id,
+                "action": log.action,
+                "message": meta["msg"],
+                "theme": meta["theme"],
+                "icon": meta["icon"],
+                "created_at": created_at.to_representation(log.created_at),
+                "actor": actor,
+            }
+        )
+    return entries
+
+
+def _load_from_audit_log(limit: int) -> list[AuditLog]:
+    # Read the hot window first so partitioned storage only scans recent
+    # months; reach further back only when it holds too few entries.
+    recent = AuditLog.objects.select_related("actor").order_by("-created_at", "-id")
+    hot_since = timezone.now() - timedelta(days=settings.AUDIT_LOG_HOT_DAYS)
+    logs = list(recent.filter(created_at__gte=hot_since)[:limit])
+    if len(logs) < limit:
+        logs += list(recent.filter(created_at__lt=hot_since)[:limit - len(logs)])
+    return logs
+
+
+class CacheRing:
+    """
+    Ring kept as one list in the Django cache (per process with LocMem).
+    Best effort: appends are not atomic (see the module comment).
+    """
+
+    def read(self, limit: int) -> list[dict] | None:
+        entries = cache.get(RING_KEY)
+        return None if entries is None else entries[:limit]
+
+    def replace(self, entries: list[dict]) -> None:
+        cache.set(RING_KEY, entries[:feed_size()], None)
+
+    def push(self, entries: list[dict]) -> None:
+        current = cache.get(RING_KEY)
+        if current is not None:
+            cache.set(RING_KEY, (entries[::-1] + current)[:feed_size()], None)
+
+
+class RedisRing:
+    """Ring kept as a Redis list, newest first, capped with LTRIM."""
+
+    def __init__(self, url: str):
+        import redis
+
+        self._client = redis.Redis.from_url(url)
+
+    def read(self, limit: int) -> list[dict] | None:
+        primed, raw = self._client.pipeline().exists(PRIMED_KEY).lrange(RING_KEY, 0, limit - 1).execute()
+        if not primed:
+            return None
+        return [json.loads(item) for item in raw]
+
+    def replace(self, entries: list[dict]) -> None:
+        size = feed_size()
+
+        def rebuild(pipe):
+            if pipe.exists(PRIMED_KEY):
+                # Primed by a concurrent read; appends since then are already in.
+                return
+            pushed = [json.loads(item) for item in pipe.lrange(RING_KEY, 0, size - 1)]
+            merged = _merge_entries(pushed, entries)[:size]
+            pipe.multi()
+            pipe.delete(RING_KEY)
+            if merged:
+                pipe.rpush(RING_KEY, *[json.dumps(entry) for entry in merged])
+            pipe.set(PRIMED_KEY, 1)
+
+        # WATCH both keys and retry if an append lands between read and write.
+        self._client.transaction(rebuild, RING_KEY, PRIMED_KEY)
+
+    def push(self, entries: list[dict]) -> None:
+        pipe = self._client.pipeline(transaction=True)
+        pipe.lpush(RING_KEY, *[json.dumps(entry) for entry in entries])
+        pipe.ltrim(RING_KEY, 0, feed_size() - 1)
+        pipe.execute()
+
+
+def _merge_entries(*sources: list[dict]) -> list[dict]:
+    """Rendered entries from all sources, deduplicated by id, newest first."""
+    by_id = {entry["id"]: entry for source in sources for entry in source}
+    return sorted(
+        by_id.values(),
+        key=lambda entry: (parse_datetime(entry["created_at"]), entry["id"]),
+        reverse=True,
+    )
+
+
+@functools.lru_cache(maxsize=1)
+def get_ring():
+    if getattr(settings, "REDIS_URL", None):
+        return RedisRing(settings.REDIS_URL)
+    return CacheRing()
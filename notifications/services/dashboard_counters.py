@@ -0,0 +1,142 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from inventory.models import Inventory
+from notifications.models import NotificationReadState, StockAlertRecord
+from notifications.services.delivery import get_unread_counter
+from purchases.models import PurchaseProposal
+from users.models import User
+
+# Dashboard aggregates kept in the cache, one key per counter so a dashboard
+# poll is a single get_many. Hooks adjust counters with incr/decr when the
+# delta is known and drop the key when it is not; a missing key is recounted
+# on the next read. reconcile_counters() rewrites everything periodically to
+# correct drift.
+#
+# Per-user unread keys carry an unread generation. A broadcast reaches a
+# whole audience, so instead of adjusting one key per recipient it bumps the
+# generation, and each badge is recounted from its NotificationReadState row
+# (a single row read) the next time it is asked for.
+
+LOW_STOCK = "low_stock"
+PROPOSALS = "proposals"
+INVENTORY = "inventory"
+
+UNREAD_GENERATION_KEY = "dashboard:unread-generation"
+
+GLOBAL_COUNTERS = {
+    LOW_STOCK: lambda: StockAlertRecord.objects.filter(is_below_threshold=True).count(),
+    PROPOSALS: lambda: PurchaseProposal.objects.filter(status="pending").count(),
+    INVENTORY: lambda: Inventory.objects.count(),
+}
+
+
+def get_dashboard_counters(user_id) -> dict:
+    keys = {_counter_key(name): name for name in GLOBAL_COUNTERS}
+    unread_key = _unread_key(user_id, _unread_generation())
+    cached = cache.get_many([*keys, unread_key])
+
+    counters = {}
+    for key, name in keys.items():
+        value = cached.get(key)
+        if value is None:
+            value = GLOBAL_COUNTERS[name]()
+            cache.add(key, value, _ttl())
+        counters[name] = value
+
+    unread = cached.get(unread_key)
+    if unread is None:
+        unread = _count_unread(unread_key, user_id)
+    counters["activity_alerts"] = unread
+    return counters
+
+
+def get_unread_count(user_id) -> int:
+    key = _unread_key(user_id, _unread_generation())
+    unread = cache.get(key)
+    if unread is None:
+        unread = _count_unread(key, user_id)
+    return unread
+
+
+def adjust_counter(name: str, delta: int) -> None:
+    _adjust(_counter_key(name), delta)
+
+
+def adjust_unread(user_id, delta: int) -> None:
+    _adjust(_unread_key(user_id, _unread_generation()), delta)
+
+
+def invalidate_counter(name: str) -> None:
+    cache.delete(_counter_key(name))
+
+
+def invalidate_unread(user_ids) -> None:
+    generation = _unread_generation()
+    cache.delete_many([_unread_key(user_id, generation) for user_id in user_ids])
+
+
+def invalidate_all_unread() -> None:
+    """Drop every cached unread count at once, e.g. after a broadcast."""
+    try:
+        cache.incr(UNREAD_GENERATION_KEY)
+    except ValueError:
+        cache.set(UNREAD_GENERATION_KEY, time.time_ns(), None)
+
+
+def reconcile_counters() -> dict:
+    """Recount every dashboard aggregate from the database and store it."""
+    ttl = _ttl()
+    counters = {name: count() for name, count in GLOBAL_COUNTERS.items()}
+    values = {_counter_key(name): value for name, value in counters.items()}
+
+    unread = dict(
+        NotificationReadState.objects.filter(user__is_active=True, unread_count__isnull=False)
+        .values_list("user_id", "unread_count")
+    )
+    for user_id in User.objects.filter(is_active=True).exclude(pk__in=list(unread)).values_list("id", flat=True):
+        unread[user_id] = get_unread_counter(user_id)
+    generation = _unread_generation()
+    values.update({_unread_key(user_id, generation): total for user_id, total in unread.items()})
+    cache.set_many(values, ttl)
+    return counters
+
+
+def _count_unread(key: str, user_id) -> int:
+    unread = get_unread_counter(user_id)
+    cache.add(key, unread, _ttl())
+    return unread
+
+
+def _adjust(key: str, delta: int) -> None:
+    try:
+        if delta >= 0:
+            cache.incr(key, delta)
+        else:
+            cache.decr(key, -delta)
+    except ValueError:
+        # Not cached yet; the next read recounts it.
+        pass
+
+
+def _counter_key(name: str) -> str:
+    return f"dashboard:{name}"
+
+
+def _unread_generation() -> int:
+    generation = cache.get(UNREAD_GENERATION_KEY)
+    if generation is None:
+        # Seed from the clock so a lost counter never reuses an older generation.
+        cache.add(UNREAD_GENERATION_KEY, time.time_ns(), None)
+        generation = cache.get(UNREAD_GENERATION_KEY)
+    return generation
+
+
+def _unread_key(user_id, generation: int) -> str:
+    return f"dashboard:unread:{generation}:{user_id}"
+
+
+def _ttl() -> int:
+    return getattr(settings, "DASHBOARD_COUNTERS_TTL_SECONDS", 600)
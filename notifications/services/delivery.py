@@ -0,0 +1,255 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import BooleanField, Case, DateTimeField, Exists, F, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Greatest
+from django.dispatch import Signal
+from django.utils import timezone
+
+from notifications.models import (
+    Notification,
+    NotificationAudience,
+    NotificationReadMarker,
+    NotificationReadState,
+    UserNotification,
+)
+from users.models import User
+
+# Notification delivery.
+#
+# "per_user" (default) writes one UserNotification row per recipient.
+# "broadcast" stores a Notification once with an audience; each user's read
+# state is a watermark (every broadcast up to read_through_id is read) plus
+# sparse NotificationReadMarker rows for broadcasts read above it. In that
+# mode inboxes are read from Notification, so both kinds of entry list, count
+# and page together; per_user inboxes are read from UserNotification alone,
+# which the (user, is_read, created_at) index answers directly.
+#
+# NotificationReadState.unread_count is kept in step with every delivery and
+# read by F() updates in the same transaction, so an unread badge is a single
+# row read; recompute_unread_counters() (manage.py repair_unread_counters)
+# rebuilds it from the inbox.
+
+PER_USER = "per_user"
+BROADCAST = "broadcast"
+
+STAFF_ROLES = ("admin", "pharmacist")
+
+# Sent after bulk writes that bypass model signals.
+notifications_delivered = Signal()
+notifications_marked_read = Signal()
+
+
+def delivery_mode() -> str:
+    return getattr(settings, "NOTIFICATION_DELIVERY_MODE", PER_USER)
+
+
+def audiences_for_role(role) -> list[str]:
+    audiences = [NotificationAudience.ALL]
+    if role in STAFF_ROLES:
+        audiences.append(NotificationAudience.STAFF)
+    if role:
+        audiences.append(role)
+    return audiences
+
+
+def audience_recipients(audience: str):
+    users = User.objects.filter(is_active=True)
+    if audience == NotificationAudience.ALL:
+        return users
+    if audience == NotificationAudience.STAFF:
+        return users.filter(role__in=STAFF_ROLES)
+    return users.filter(role=audience)
+
+
+def deliver(notifications: list[Notification], audience: str) -> list[Notification]:
+    """
+    Bulk-create notifications for an audience: one broadcast row each in
+    broadcast mode, otherwise one UserNotification row per recipient.
+    """
+    if delivery_mode() == BROADCAST:
+        for notification in notifications:
+            notification.audience = audience
+        created = Notification.objects.bulk_create(notifications)
+        entries = []
+        adjust_unread_counters(audience_recipients(audience).values("id"), len(created))
+    else:
+        created = Notification.objects.bulk_create(notifications)
+        recipients = list(audience_recipients(audience).values_list("id", flat=True))
+        entries = UserNotification.objects.bulk_create(
+            [
+                UserNotification(notification=notification, user_id=user_id)
+                for notification in created
+                for user_id in recipients
+            ]
+        )
+        adjust_unread_counters(recipients, len(created))
+
+    notifications_delivered.send(sender=Notification, notifications=created, entries=entries)
+    return created
+
+
+def direct_inbox_queryset(user):
+    """The user's UserNotification entries: the whole inbox in per_user mode."""
+    return UserNotification.objects.filter(user=user).select_related("notification")
+
+
+def inbox_queryset(user):
+    """
+    Notifications visible to the user, direct and broadcast, annotated with
+    the inbox fields: user_notification_id (direct entries only), is_read
+    and read_at. Only needed in broadcast mode (see direct_inbox_queryset).
+    """
+    state = NotificationReadState.objects.filter(user=user).first()
+    read_through_id = state.read_through_id if state else 0
+    read_through_at = state.read_through_at if state else None
+
+    direct = UserNotification.objects.filter(notification=OuterRef("pk"), user=user)
+    marker = NotificationReadMarker.objects.filter(notification=OuterRef("pk"), user=user)
+
+    visible = Q(pk__in=UserNotification.objects.filter(user=user).values("notification_id"))
+    visible |= Q(audience__in=audiences_for_role(user.role), created_at__gte=user.date_joined)
+
+    return (
+        Notification.objects.filter(visible)
+        .annotate(
+            user_notification_id=Subquery(direct.values("pk")[:1]),
+            direct_is_read=Subquery(direct.values("is_read")[:1]),
+            direct_read_at=Subquery(direct.values("read_at")[:1]),
+            marker_read_at=Subquery(marker.values("read_at")[:1]),
+        )
+        .annotate(
+            is_read=Case(
+                When(audience=NotificationAudience.DIRECT, then=F("direct_is_read")),
+                When(pk__lte=read_through_id, then=Value(True)),
+                When(Exists(marker), then=Value(True)),
+                default=Value(False),
+                output_field=BooleanField(),
+            ),
+            read_at=Case(
+                When(audience=NotificationAudience.DIRECT, then=F("direct_read_at")),
+                When(pk__lte=read_through_id, then=Value(read_through_at)),
+                default=F("marker_read_at"),
+                output_field=DateTimeField(),
+            ),
+        )
+    )
+
+
+def count_unread(user) -> int:
+    if delivery_mode() == BROADCAST:
+        return inbox_queryset(user).filter(is_read=False).count()
+    return direct_inbox_queryset(user).filter(is_read=False).count()
+
+
+def get_unread_counter(user_id) -> int:
+    """The user's unread count from the counter row, computed on first use."""
+    unread = NotificationReadState.objects.filter(user_id=user_id).values_list("unread_count", flat=True).first()
+    if unread is None:
+        user = User.objects.filter(pk=user_id).first()
+        unread = recompute_unread_counter(user) if user is not None else 0
+    return unread
+
+
+def adjust_unread_counters(user_ids, delta: int) -> None:
+    """Atomically add delta to the unread counters of the given users."""
+    if delta:
+        # Counters not computed yet stay null and are computed on first read.
+        NotificationReadState.objects.filter(user_id__in=user_ids, unread_count__isnull=False).update(
+            unread_count=Greatest(F("unread_count") + delta, Value(0))
+        )
+
+
+def recompute_unread_counter(user) -> int:
+    with transaction.atomic():
+        state, _ = NotificationReadState.objects.select_for_update().get_or_create(user=user)
+        state.unread_count = count_unread(user)
+        state.save(update_fields=["unread_count", "updated_at"])
+    return state.unread_count
+
+
+def recompute_unread_counters(users=None) -> int:
+    """Rebuild the unread counters of the given (default: all) users."""
+    users = User.objects.all() if users is None else users
+    repaired = 0
+    for user in users.iterator():
+        recompute_unread_counter(user)
+        repaired += 1
+    return repaired
+
+
+def mark_all_read(user) -> int:
+    return mark_read(user, up_to=timezone.now())
+
+
+def mark_broadcast_read(user, notification_id: int):
+    """Mark one broadcast read for the user; returns the inbox entry or None."""
+    entry = (
+        inbox_queryset(user)
+        .exclude(audience=NotificationAudience.DIRECT)
+        .filter(pk=notification_id)
+        .first()
+    )
+    if entry is None or entry.is_read:
+        return entry
+
+    with transaction.atomic():
+        marker, created = NotificationReadMarker.objects.get_or_create(notification_id=entry.pk, user=user)
+        if created:
+            adjust_unread_counters([user.pk], -1)
+    entry.is_read = True
+    entry.read_at = marker.read_at
+    return entry
+
+
+def mark_read(user, *, ids=(), notification_ids=(), up_to_id=None, up_to=None) -> int:
+    """
+    Mark inbox entries read in bulk and return how many were unread.
+
+    ids are UserNotification ids and notification_ids broadcast Notification
+    ids. up_to_id / up_to mark everything up to a notification id or creation
+    time: direct entries with one UPDATE, broadcasts by moving the user's
+    watermark, which makes the markers below it redundant.
+    """
+    now = timezone.now()
+    marked = 0
+    with transaction.atomic():
+        direct = UserNotification.objects.filter(user=user, is_read=False)
+        if delivery_mode() == BROADCAST:
+            broadcasts = inbox_queryset(user).exclude(audience=NotificationAudience.DIRECT).filter(is_read=False)
+        else:
+            broadcasts = Notification.objects.none()
+
+        if up_to_id is not None or up_to is not None:
+            if up_to_id is not None:
+                direct = direct.filter(notification_id__lte=up_to_id)
+                broadcasts = broadcasts.filter(pk__lte=up_to_id)
+            else:
+                direct = direct.filter(notification__created_at__lte=up_to)
+                broadcasts = broadcasts.filter(created_at__lte=up_to)
+            unread = list(broadcasts.values_list("pk", flat=True))
+            if unread:
+                # Everything unread is above the current watermark.
+                state, _ = NotificationReadState.objects.select_for_update().get_or_create(user=user)
+                state.read_through_id = max(unread)
+                state.read_through_at = now
+                state.save(update_fields=["read_through_id", "read_through_at", "updated_at"])
+                NotificationReadMarker.objects.filter(
+                    user=user, notification_id__lte=state.read_through_id
+                ).delete()
+                marked += len(unread)
+        else:
+            direct = direct.filter(pk__in=list(ids))
+            unread = list(broadcasts.filter(pk__in=list(notification_ids)).values_list("pk", flat=True))
+            NotificationReadMarker.objects.bulk_create(
+                [NotificationReadMarker(notification_id=pk, user=user) for pk in unread],
+                ignore_conflicts=True,
+            )
+            marked += len(unread)
+
+        marked += direct.update(is_read=True, read_at=now, updated_at=now)
+        adjust_unread_counters([user.pk], -marked)
+
+    if marked:
+        notifications_marked_read.send(sender=UserNotification, user_ids=[user.pk])
+    return marked
+
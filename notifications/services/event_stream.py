@@ -0,0 +1,147 @@
+import asyncio
+import functools
+import json
+import logging
+import threading
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+logger = logging.getLogger(__name__)
+
+# Pub/sub fan-out for the notification event stream.
+#
+# Publishers are ordinary (sync) request and signal code; subscribers are the
+# async SSE responses. Events are published to a per-user channel
+# ("user:<id>"), a broadcast audience channel ("audience:<audience>") or the
+# shared "dashboard" channel. The in-process broker only
+# reaches clients connected to the same process; the Redis broker reaches
+# every web process and is used whenever REDIS_URL is configured.
+
+DASHBOARD_CHANNEL = "dashboard"
+CHANNEL_PREFIX = "pharmacio:events:"
+
+
+def user_channel(user_id) -> str:
+    return f"user:{user_id}"
+
+
+def audience_channel(audience: str) -> str:
+    return f"audience:{audience}"
+
+
+def publish(channel: str, event: str, data: dict) -> None:
+    try:
+        get_broker().publish(channel, json.dumps({"event": event, "data": data}, cls=DjangoJSONEncoder))
+    except Exception:
+        # Streaming is best-effort; clients recover by refetching on reconnect.
+        logger.exception("Failed to publish %s event to %s", event, channel)
+
+
+class InProcessBroker:
+    def __init__(self):
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def publish(self, channel: str, message: str) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for entry in subscribers:
+            loop, queue = entry
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, message)
+            except RuntimeError:
+                # The subscriber's event loop is closed; it will never read again.
+                self._drop(entry)
+
+    def subscribe(self, channels: list[str]) -> "_InProcessSubscription":
+        return _InProcessSubscription(self, channels)
+
+    def _add(self, channels, entry):
+        with self._lock:
+            for channel in channels:
+                self._subscribers.setdefault(channel, set()).add(entry)
+
+    def _drop(self, entry):
+        with self._lock:
+            channels = [channel for channel, entries in self._subscribers.items() if entry in entries]
+        self._remove(channels, entry)
+
+    def _remove(self, channels, entry):
+        with self._lock:
+            for channel in channels:
+                entries = self._subscribers.get(channel)
+                if entries is not None:
+                    entries.discard(entry)
+                    if not entries:
+                        del self._subscribers[channel]
+
+
+class _InProcessSubscription:
+    def __init__(self, broker: InProcessBroker, channels: list[str]):
+        self._broker = broker
+        self._channels = channels
+        self._queue = asyncio.Queue()
+        self._entry = (asyncio.get_running_loop(), self._queue)
+        broker._add(channels, self._entry)
+
+    async def get(self, timeout: float) -> dict | None:
+        try:
+            return json.loads(await asyncio.wait_for(self._queue.get(), timeout))
+        except asyncio.TimeoutError:
+            return None
+
+    async def close(self) -> None:
+        self._broker._remove(self._channels, self._entry)
+
+
+class RedisBroker:
+    def __init__(self, url: str):
+        import redis
+
+        self._url = url
+        self._client = redis.Redis.from_url(url)
+
+    def publish(self, channel: str, message: str) -> None:
+        self._client.publish(CHANNEL_PREFIX + channel, message)
+
+    def subscribe(self, channels: list[str]) -> "_RedisSubscription":
+        return _RedisSubscription(self._url, channels)
+
+
+class _RedisSubscription:
+    def __init__(self, url: str, channels: list[str]):
+        import redis.asyncio
+
+        self._client = redis.asyncio.Redis.from_url(url)
+        self._pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        self._channels = [CHANNEL_PREFIX + channel for channel in channels]
+        self._subscribed = False
+
+    async def get(self, timeout: float) -> dict | None:
+        if not self._subscribed:
+            await self._pubsub.subscribe(*self._channels)
+            self._subscribed = True
+        deadline = asyncio.get_running_loop().time() + timeout
+        while True:
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0:
+                return None
+            message = await self._pubsub.get_message(timeout=remaining)
+            if message is not None:
+                return json.loads(message["data"])
+
+    async def close(self) -> None:
+        await self._pubsub.close()
+        await self._client.close()
+
+
+@functools.lru_cache(maxsize=1)
+def get_broker():
+    backend = getattr(settings, "NOTIFICATION_STREAM_BACKEND", "").lower()
+    if not backend:
+        backend = "redis" if getattr(settings, "REDIS_URL", None) else "memory"
+
+    if backend == "redis":
+        return RedisBroker(settings.REDIS_URL)
+    return InProcessBroker()
@@ -0,0 +1,191 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import BooleanField, Case, F, Value, When
+from django.dispatch import Signal
+from django.utils import timezone
+
+from config.transactions import commit_buffer
+from inventory.models import Inventory
+from notifications.models import (
+    Notification,
+    NotificationAudience,
+    NotificationLog,
+    NotificationLogEvent,
+    NotificationType,
+    StockAlertRecord,
+)
+from notifications.services.delivery import deliver
+
+# Low-stock detection.
+#
+# Every stock mutation queues the inventory ids it touched; once the
+# transaction commits they are evaluated together. One query finds the rows
+# whose low/ok state differs from their StockAlertRecord (the edge
+# transitions), and the records, notifications and logs for all of them are
+# written in bulk. Low-stock alerts go to admins and pharmacists.
+#
+# Items that go low together are reported in one digest notification, with
+# the per-item detail in their NotificationLog rows. With
+# NOTIFICATION_DIGEST_WINDOW_SECONDS > 0 the logs are held as digest_pending
+# and every burst within the window is reported by a single delayed flush.
+
+LOW_STOCK_MESSAGE = "Low stock alert: {name} ({strength}) is at {quantity}, threshold is {threshold}."
+RECOVERED_MESSAGE = "Stock recovered: {name} ({strength}) is now {quantity}, threshold is {threshold}."
+DIGEST_MESSAGE = "Low stock alert: {count} items are at or below their threshold: {items}."
+DIGEST_ITEM = "{name} ({strength}) at {quantity}/{threshold}"
+
+DIGEST_SCHEDULED_KEY = "notifications:low-stock-digest:scheduled"
+DIGEST_LISTED_ITEMS = 20
+
+# Sent after StockAlertRecords change. Arguments: inventory_ids.
+stock_alerts_changed = Signal()
+
+
+def queue_stock_evaluation(inventory_ids) -> None:
+    """Evaluate the given inventory rows after the current transaction commits."""
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        evaluate_stock_alerts(inventory_ids)
+        return
+
+    commit_buffer(evaluate_stock_alerts, set).update(inventory_ids)
+
+
+def evaluate_stock_alerts(inventory_ids) -> dict:
+    """
+    Bring the StockAlertRecords of the given inventory rows up to date and
+    record every low-stock / recovery transition. Returns the number of
+    transitions of each kind.
+    """
+    inventory_ids = set(inventory_ids)
+    summary = {NotificationLogEvent.LOW_STOCK_DETECTED: 0, NotificationLogEvent.STOCK_RECOVERED: 0}
+    if not inventory_ids:
+        return summary
+
+    now = timezone.now()
+    with transaction.atomic():
+        missing = Inventory.objects.filter(id__in=inventory_ids, stock_alert_record__isnull=True)
+        StockAlertRecord.objects.bulk_create(
+            [StockAlertRecord(inventory_id=inventory_id) for inventory_id in missing.values_list("id", flat=True)],
+            ignore_conflicts=True,
+        )
+
+        changed = list(
+            StockAlertRecord.objects.select_for_update(of=("self",))
+            .select_related("inventory")
+            .filter(inventory_id__in=inventory_ids)
+            .annotate(
+                is_low=Case(
+                    When(inventory__quantity_on_hand__lte=F("inventory__min_threshold"), then=Value(True)),
+                    default=Value(False),
+                    output_field=BooleanField(),
+                )
+            )
+            .exclude(is_below_threshold=F("is_low"))
+            .order_by("inventory_id")
+        )
+        if not changed:
+            return summary
+
+        window = digest_window()
+        logs = []
+        for record in changed:
+            item = record.inventory
+            record.is_below_threshold = record.is_low
+            record.updated_at = now
+            if record.is_low:
+                record.last_notified_at = now
+                record.last_notified_quantity = item.quantity_on_hand
+                event, template = NotificationLogEvent.LOW_STOCK_DETECTED, LOW_STOCK_MESSAGE
+            else:
+                event, template = NotificationLogEvent.STOCK_RECOVERED, RECOVERED_MESSAGE
+            logs.append(
+                NotificationLog(
+                    inventory=item,
+                    record=record,
+                    event=event,
+                    message=template.format(
+                        name=item.product_name,
+                        strength=item.strength,
+                        quantity=item.quantity_on_hand,
+                        threshold=item.min_threshold,
+                    ),
+                    digest_pending=bool(record.is_low and window),
+                )
+            )
+            summary[event] += 1
+
+        StockAlertRecord.objects.bulk_update(
+            changed,
+            ["is_below_threshold", "last_notified_at", "last_notified_quantity", "updated_at"],
+        )
+        low_logs = [log for log in logs if log.event == NotificationLogEvent.LOW_STOCK_DETECTED]
+        if low_logs and not window:
+            _report_low_stock(low_logs)
+        NotificationLog.objects.bulk_create(logs)
+        stock_alerts_changed.send(sender=StockAlertRecord, inventory_ids=[record.inventory_id for record in changed])
+        if low_logs and window:
+            transaction.on_commit(_schedule_digest, robust=True)
+
+    return summary
+
+
+def digest_window() -> int:
+    return getattr(settings, "NOTIFICATION_DIGEST_WINDOW_SECONDS", 0)
+
+
+def flush_low_stock_digest() -> Notification | None:
+    """Report every pending low-stock event in one notification."""
+    # Clear the flag first: events committed from here on schedule the next
+    # flush, everything committed before it is picked up below.
+    cache.delete(DIGEST_SCHEDULED_KEY)
+    with transaction.atomic():
+        pending = list(
+            NotificationLog.objects.select_for_update(of=("self",))
+            .select_related("inventory", "record")
+            .filter(digest_pending=True)
+            .order_by("id")
+        )
+        # Items that recovered within the window are not reported.
+        still_low = [log for log in pending if log.record.is_below_threshold]
+        notification = _report_low_stock(still_low) if still_low else None
+        for log in pending:
+            log.digest_pending = False
+        NotificationLog.objects.bulk_update(pending, ["digest_pending", "notification", "created_notifications"])
+    return notification
+
+
+def _report_low_stock(logs: list[NotificationLog]) -> Notification:
+    if len(logs) == 1:
+        notification = Notification(message=logs[0].message, type=NotificationType.LOW_STOCK)
+    else:
+        items = [
+            DIGEST_ITEM.format(
+                name=log.inventory.product_name,
+                strength=log.inventory.strength,
+                quantity=log.record.last_notified_quantity,
+                threshold=log.inventory.min_threshold,
+            )
+            for log in logs[:DIGEST_LISTED_ITEMS]
+        ]
+        if len(logs) > DIGEST_LISTED_ITEMS:
+            items.append(f"and {len(logs) - DIGEST_LISTED_ITEMS} more")
+        notification = Notification(
+            message=DIGEST_MESSAGE.format(count=len(logs), items=", ".join(items)),
+            type=NotificationType.LOW_STOCK_DIGEST,
+        )
+
+    deliver([notification], NotificationAudience.STAFF)
+    for log in logs:
+        log.notification = notification
+        log.created_notifications = 1
+    return notification
+
+
+def _schedule_digest() -> None:
+    from notifications.tasks import send_low_stock_digest
+
+    window = digest_window()
+    if cache.add(DIGEST_SCHEDULED_KEY, True, window * 2):
+        send_low_stock_digest.apply_async(countdown=window)
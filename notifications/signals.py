@@ -0,0 +1,179 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from inventory.models import Inventory
+from inventory.services.low_stock import bump_low_stock_version
+from inventory.signals import stock_levels_changed
+from notifications.models import (
+    Notification,
+    NotificationAudience,
+    NotificationReadMarker,
+    NotificationReadState,
+    StockAlertRecord,
+    UserNotification,
+)
+from notifications.serializers import InboxNotificationSerializer, UserNotificationSerializer
+from notifications.services import dashboard_counters as counters
+from notifications.services import delivery
+from notifications.services.activity_feed import append_entries
+from notifications.services.stock_alerts import queue_stock_evaluation, stock_alerts_changed
+from notifications.services.event_stream import DASHBOARD_CHANNEL, audience_channel, publish, user_channel
+from purchases.models import PurchaseProposal
+from rbac.services.audit import audit_logs_written
+from users.models import User
+
+STOCK_FIELDS = {"quantity_on_hand", "min_threshold"}
+
+# Counter changes are applied after commit and streamed to SSE clients as
+# {"counter": name, "delta": n} when the delta is known, or
+# {"counter": name, "stale": true} when the client should refetch.
+
+
+def _counter_adjusted(name, delta):
+    def apply():
+        counters.adjust_counter(name, delta)
+        publish(DASHBOARD_CHANNEL, "dashboard", {"counter": name, "delta": delta})
+
+    transaction.on_commit(apply)
+
+
+def _counter_stale(name):
+    def apply():
+        counters.invalidate_counter(name)
+        publish(DASHBOARD_CHANNEL, "dashboard", {"counter": name, "stale": True})
+
+    # Drop now for this process and again once the write is visible to others.
+    counters.invalidate_counter(name)
+    transaction.on_commit(apply)
+
+
+def _unread_stale(user_ids):
+    def apply():
+        counters.invalidate_unread(user_ids)
+        for user_id in user_ids:
+            publish(user_channel(user_id), "unread_count", {"stale": True})
+
+    counters.invalidate_unread(user_ids)
+    transaction.on_commit(apply)
+
+
+@receiver(post_save, sender=Inventory)
+def count_inventory_saved(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        _counter_adjusted(counters.INVENTORY, 1)
+    if created or update_fields is None or STOCK_FIELDS & set(update_fields):
+        queue_stock_evaluation([instance.pk])
+
+
+@receiver(post_delete, sender=Inventory)
+def count_inventory_deleted(sender, instance, **kwargs):
+    _counter_adjusted(counters.INVENTORY, -1)
+
+
+@receiver(stock_levels_changed)
+def evaluate_stock_levels_changed(sender, inventory_ids, **kwargs):
+    queue_stock_evaluation(inventory_ids)
+
+
+@receiver(stock_alerts_changed)
+def refresh_low_stock_set(sender, inventory_ids, **kwargs):
+    bump_low_stock_version()
+
+
+@receiver(stock_alerts_changed)
+@receiver(post_save, sender=StockAlertRecord)
+@receiver(post_delete, sender=StockAlertRecord)
+def count_stock_alert_changed(sender, **kwargs):
+    _counter_stale(counters.LOW_STOCK)
+
+
+@receiver(post_save, sender=PurchaseProposal)
+def count_proposal_saved(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        if instance.status == "pending":
+            _counter_adjusted(counters.PROPOSALS, 1)
+    elif update_fields is None or "status" in update_fields:
+        _counter_stale(counters.PROPOSALS)
+
+
+@receiver(post_delete, sender=PurchaseProposal)
+def count_proposal_deleted(sender, instance, **kwargs):
+    _counter_stale(counters.PROPOSALS)
+
+
+def _user_notification_delivered(entry):
+    """Count and stream a committed, unread UserNotification."""
+    counters.adjust_unread(entry.user_id, 1)
+    channel = user_channel(entry.user_id)
+    publish(channel, "notification", UserNotificationSerializer(entry).data)
+    publish(channel, "unread_count", {"delta": 1})
+
+
+@receiver(post_save, sender=UserNotification)
+def count_user_notification_saved(sender, instance, created, **kwargs):
+    if not created:
+        _unread_stale([instance.user_id])
+        return
+    if instance.is_read:
+        return
+
+    delivery.adjust_unread_counters([instance.user_id], 1)
+    transaction.on_commit(lambda: _user_notification_delivered(instance))
+
+
+def _broadcast_delivered(notification):
+    """Count and stream a committed broadcast Notification."""
+    counters.invalidate_all_unread()
+    channel = audience_channel(notification.audience)
+    publish(channel, "notification", InboxNotificationSerializer(notification).data)
+    publish(channel, "unread_count", {"delta": 1})
+
+
+@receiver(post_save, sender=Notification)
+def count_broadcast_saved(sender, instance, created, **kwargs):
+    if created and instance.audience != NotificationAudience.DIRECT:
+        delivery.adjust_unread_counters(delivery.audience_recipients(instance.audience).values("id"), 1)
+        transaction.on_commit(lambda: _broadcast_delivered(instance))
+
+
+@receiver(delivery.notifications_delivered)
+def count_bulk_delivery(sender, notifications, entries, **kwargs):
+    def apply():
+        for notification in notifications:
+            if notification.audience != NotificationAudience.DIRECT:
+                _broadcast_delivered(notification)
+        for entry in entries:
+            _user_notification_delivered(entry)
+
+    transaction.on_commit(apply)
+
+
+@receiver(post_delete, sender=UserNotification)
+def count_user_notification_deleted(sender, instance, **kwargs):
+    if not instance.is_read:
+        delivery.adjust_unread_counters([instance.user_id], -1)
+    _unread_stale([instance.user_id])
+
+
+@receiver(post_save, sender=NotificationReadMarker)
+def count_broadcast_read(sender, instance, **kwargs):
+    _unread_stale([instance.user_id])
+
+
+@receiver(delivery.notifications_marked_read)
+def count_bulk_reads(sender, user_ids, **kwargs):
+    _unread_stale(user_ids)
+
+
+@receiver(post_save, sender=User)
+def reset_new_user_unread(sender, instance, created, **kwargs):
+    if created:
+        # Never inherit a count cached for a deleted user with the same id.
+        counters.invalidate_unread([instance.pk])
+        NotificationReadState.objects.get_or_create(user=instance, defaults={"unread_count": 0})
+
+
+@receiver(audit_logs_written)
+def feed_recent_activity(sender, entries, **kwargs):
+    transaction.on_commit(lambda: append_entries(entries))
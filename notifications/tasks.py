@@ -0,0 +1,23 @@
+import logging
+
+from celery import shared_task
+
+from notifications.services.dashboard_counters import reconcile_counters
+from notifications.services.stock_alerts import flush_low_stock_digest
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def reconcile_dashboard_counters():
+    """Periodic recount of the cached dashboard counters to correct drift."""
+    counters = reconcile_counters()
+    logger.info("Dashboard counters reconciled: %s", counters)
+    return counters
+
+
+@shared_task
+def send_low_stock_digest():
+    """Close the current digest window and report its low-stock events."""
+    notification = flush_low_stock_digest()
+    return notification.pk if notification else None
@@ -1,11 +1,19 @@
-from django.test import TestCase
+from io import StringIO
+
+from django.core.cache import cache
+from django.utils import timezone
+from django.test import TestCase, override_settings
 from django.db import connection
-from unittest import skipUnless
+from django.test.utils import CaptureQueriesContext
+from unittest.mock import MagicMock, patch
 from django.contrib.auth import get_user_model
 from rest_framework import status
 from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
 
 from inventory.models import Inventory
+from notifications.services.stock_alerts import evaluate_stock_alerts
+from notifications.services.event_stream import DASHBOARD_CHANNEL, get_broker, publish, user_channel
 from notifications.models import (
 	NotificationLog,
 	NotificationLogEvent,
@@ -15,23 +23,43 @@ from notifications.models import (
 )
 
 
-@skipUnless(connection.vendor == "postgresql", "Postgres trigger test only")
-class PostgresThresholdTriggerTests(TestCase):
-
-	def test_trigger_creates_notification_and_recovery_log(self):
-		item = Inventory.objects.create(
-			product_name="Amoxicillin",
-			strength="500mg",
-			quantity_on_hand=3,
-			min_threshold=10,
+class StockAlertEngineTests(TestCase):
+	def setUp(self):
+		cache.clear()
+		self.addCleanup(cache.clear)
+		self.pharmacist = get_user_model().objects.create_user(
+			username="alert_pharmacist",
+			password="password123",
+			role="pharmacist",
+		)
+		get_user_model().objects.create_user(
+			username="alert_cashier",
+			password="password123",
+			role="cashier",
 		)
 
+	def test_transitions_create_notification_and_recovery_log(self):
+		from notifications.models import UserNotification
+
+		with self.captureOnCommitCallbacks(execute=True):
+			item = Inventory.objects.create(
+				product_name="Amoxicillin",
+				strength="500mg",
+				quantity_on_hand=3,
+				min_threshold=10,
+			)
+
 		self.assertEqual(Notification.objects.count(), 1)
 		self.assertEqual(NotificationLog.objects.count(), 1)
 		self.assertEqual(item.stock_alert_record.logs.count(), 1)
 
 		notif = Notification.objects.first()
 		self.assertEqual(notif.type, NotificationType.LOW_STOCK)
+		self.assertEqual(notif.message, "Low stock alert: Amoxicillin (500mg) is at 3, threshold is 10.")
+		self.assertEqual(
+			list(UserNotification.objects.values_list("user_id", flat=True)),
+			[self.pharmacist.id],
+		)
 
 		record = StockAlertRecord.objects.get(inventory=item)
 		self.assertTrue(record.is_below_threshold)
@@ -41,8 +69,9 @@ class PostgresThresholdTriggerTests(TestCase):
 		self.assertEqual(low_log.event, NotificationLogEvent.LOW_STOCK_DETECTED)
 		self.assertEqual(low_log.created_notifications, 1)
 
-		item.quantity_on_hand = 20
-		item.save(update_fields=["quantity_on_hand", "updated_at"])
+		with self.captureOnCommitCallbacks(execute=True):
+			item.quantity_on_hand = 20
+			item.save(update_fields=["quantity_on_hand", "updated_at"])
 
 		self.assertEqual(Notification.objects.count(), 1)
 		self.assertEqual(NotificationLog.objects.count(), 2)
@@ -54,6 +83,84 @@ class PostgresThresholdTriggerTests(TestCase):
 		self.assertEqual(recovered_log.event, NotificationLogEvent.STOCK_RECOVERED)
 		self.assertEqual(recovered_log.created_notifications, 0)
 
+	def test_bulk_stock_changes_are_evaluated_once_after_commit(self):
+		from inventory.services.stock import apply_stock_deltas
+
+		with self.captureOnCommitCallbacks(execute=True):
+			items = [
+				Inventory.objects.create(product_name=f"Item {index}", strength="10mg", quantity_on_hand=20, min_threshold=5)
+				for index in range(3)
+			]
+
+		with patch(
+			"notifications.services.stock_alerts.evaluate_stock_alerts",
+			wraps=evaluate_stock_alerts,
+		) as evaluate_mock:
+			with self.captureOnCommitCallbacks(execute=True):
+				apply_stock_deltas({items[0].id: -16, items[1].id: -1})
+				apply_stock_deltas({items[2].id: -15})
+
+				self.assertFalse(NotificationLog.objects.exists())
+
+		evaluate_mock.assert_called_once_with({item.id for item in items})
+		self.assertEqual(
+			set(StockAlertRecord.objects.filter(is_below_threshold=True).values_list("inventory_id", flat=True)),
+			{items[0].id, items[2].id},
+		)
+		digest = Notification.objects.get()
+		self.assertEqual(digest.type, NotificationType.LOW_STOCK_DIGEST)
+		self.assertEqual(
+			digest.message,
+			"Low stock alert: 2 items are at or below their threshold: Item 0 (10mg) at 4/5, Item 2 (10mg) at 5/5.",
+		)
+		self.assertEqual(
+			set(NotificationLog.objects.values_list("notification_id", flat=True)),
+			{digest.id},
+		)
+
+	@override_settings(NOTIFICATION_DIGEST_WINDOW_SECONDS=30)
+	def test_bursts_within_the_window_are_reported_once(self):
+		from notifications.models import UserNotification
+		from notifications.tasks import send_low_stock_digest
+
+		with patch.object(send_low_stock_digest, "apply_async") as schedule_mock:
+			with self.captureOnCommitCallbacks(execute=True):
+				first = Inventory.objects.create(product_name="Burst A", strength="1mg", quantity_on_hand=1, min_threshold=5)
+			with self.captureOnCommitCallbacks(execute=True):
+				second = Inventory.objects.create(product_name="Burst B", strength="2mg", quantity_on_hand=2, min_threshold=5)
+				recovered = Inventory.objects.create(product_name="Burst C", strength="3mg", quantity_on_hand=3, min_threshold=5)
+			with self.captureOnCommitCallbacks(execute=True):
+				recovered.quantity_on_hand = 30
+				recovered.save(update_fields=["quantity_on_hand", "updated_at"])
+
+		schedule_mock.assert_called_once_with(countdown=30)
+		self.assertFalse(Notification.objects.exists())
+		self.assertEqual(NotificationLog.objects.filter(digest_pending=True).count(), 3)
+
+		with self.captureOnCommitCallbacks(execute=True):
+			send_low_stock_digest()
+
+		digest = Notification.objects.get()
+		self.assertEqual(digest.type, NotificationType.LOW_STOCK_DIGEST)
+		self.assertIn("2 items", digest.message)
+		self.assertEqual(UserNotification.objects.filter(notification=digest).count(), 1)
+		self.assertFalse(NotificationLog.objects.filter(digest_pending=True).exists())
+		self.assertEqual(
+			set(NotificationLog.objects.filter(notification=digest).values_list("inventory_id", flat=True)),
+			{first.id, second.id},
+		)
+
+	def test_unchanged_state_creates_nothing(self):
+		with self.captureOnCommitCallbacks(execute=True):
+			item = Inventory.objects.create(product_name="Steady", strength="5mg", quantity_on_hand=50, min_threshold=5)
+
+		self.assertEqual(
+			evaluate_stock_alerts([item.id]),
+			{NotificationLogEvent.LOW_STOCK_DETECTED: 0, NotificationLogEvent.STOCK_RECOVERED: 0},
+		)
+		self.assertFalse(NotificationLog.objects.exists())
+		self.assertFalse(StockAlertRecord.objects.get(inventory=item).is_below_threshold)
+
 
 class NotificationInboxApiTests(TestCase):
 	def setUp(self):
@@ -91,11 +198,59 @@ class NotificationInboxApiTests(TestCase):
 		response = client.get("/api/v1/notifications/me/?unread_only=true")
 
 		self.assertEqual(response.status_code, status.HTTP_200_OK)
-		self.assertEqual(response.data["count"], 1)
+		self.assertNotIn("count", response.data)
 		self.assertEqual(response.data["unread_count"], 1)
 		self.assertEqual(len(response.data["results"]), 1)
 		self.assertEqual(response.data["results"][0]["id"], self.entry.id)
 
+	def test_cursor_mode_pages_without_total_count(self):
+		from notifications.models import UserNotification
+
+		second = UserNotification.objects.create(
+			notification=Notification.objects.create(message="Second", type=NotificationType.LOW_STOCK),
+			user=self.user,
+		)
+		client = APIClient()
+		client.force_authenticate(self.user)
+
+		response = client.get("/api/v1/notifications/me/", {"pagination": "cursor", "page_size": 1})
+
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+		self.assertNotIn("count", response.data)
+		self.assertEqual(response.data["unread_count"], 2)
+		self.assertEqual([entry["id"] for entry in response.data["results"]], [second.id])
+
+		response = client.get(response.data["next"])
+
+		self.assertEqual([entry["id"] for entry in response.data["results"]], [self.entry.id])
+		self.assertIsNone(response.data["next"])
+
+	def test_cursor_mode_pages_through_equal_timestamps(self):
+		from notifications.models import UserNotification
+
+		entries = [self.entry] + [
+			UserNotification.objects.create(
+				notification=Notification.objects.create(message=f"Tied {index}", type=NotificationType.LOW_STOCK),
+				user=self.user,
+			)
+			for index in range(4)
+		]
+		UserNotification.objects.filter(user=self.user).update(created_at=self.entry.created_at)
+		client = APIClient()
+		client.force_authenticate(self.user)
+
+		seen = []
+		response = client.get("/api/v1/notifications/me/", {"pagination": "cursor", "page_size": 2})
+		while True:
+			seen += [entry["id"] for entry in response.data["results"]]
+			if response.data["next"] is None:
+				break
+			response = client.get(response.data["next"])
+
+		self.assertEqual(seen, sorted((entry.id for entry in entries), reverse=True))
+		previous = client.get(response.data["previous"])
+		self.assertEqual([entry["id"] for entry in previous.data["results"]], seen[2:4])
+
 	def test_user_can_mark_own_notification_as_read(self):
 		client = APIClient()
 		client.force_authenticate(self.user)
@@ -107,6 +262,64 @@ class NotificationInboxApiTests(TestCase):
 		self.assertTrue(self.entry.is_read)
 		self.assertIsNotNone(self.entry.read_at)
 
+	def _entries(self, count):
+		from notifications.models import UserNotification
+
+		return [
+			UserNotification.objects.create(
+				notification=Notification.objects.create(message=f"Bulk {index}", type=NotificationType.LOW_STOCK),
+				user=self.user,
+			)
+			for index in range(count)
+		]
+
+	def test_bulk_mark_read_by_ids_returns_unread_count(self):
+		first, second, third = self._entries(3)
+		client = APIClient()
+		client.force_authenticate(self.user)
+
+		response = client.post(
+			"/api/v1/notifications/read/",
+			{"ids": [first.id, second.id, self.other_entry.id]},
+			format="json",
+		)
+
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+		self.assertEqual(response.data, {"marked_read": 2, "unread_count": 2})
+		third.refresh_from_db()
+		self.assertFalse(third.is_read)
+		self.other_entry.refresh_from_db()
+		self.assertFalse(self.other_entry.is_read)
+
+	def test_bulk_mark_read_up_to_notification_id(self):
+		first, second, third = self._entries(3)
+		client = APIClient()
+		client.force_authenticate(self.user)
+
+		response = client.post(
+			"/api/v1/notifications/read/",
+			{"up_to_id": second.notification_id},
+			format="json",
+		)
+
+		self.assertEqual(response.data, {"marked_read": 3, "unread_count": 1})
+		self.assertEqual(
+			list(self.user.notifications.filter(is_read=False).values_list("id", flat=True)),
+			[third.id],
+		)
+
+	def test_bulk_mark_read_rejects_mixed_modes(self):
+		client = APIClient()
+		client.force_authenticate(self.user)
+
+		response = client.post(
+			"/api/v1/notifications/read/",
+			{"ids": [self.entry.id], "up_to_id": 1},
+			format="json",
+		)
+
+		self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
 	def test_user_cannot_mark_other_users_notification(self):
 		client = APIClient()
 		client.force_authenticate(self.user)
@@ -116,8 +329,210 @@ class NotificationInboxApiTests(TestCase):
 		self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
 
+class BroadcastNotificationDeliveryTests(TestCase):
+	def setUp(self):
+		cache.clear()
+		self.addCleanup(cache.clear)
+		user_model = get_user_model()
+		self.pharmacist = user_model.objects.create_user(
+			username="broadcast_pharmacist",
+			password="password123",
+			role="pharmacist",
+		)
+		self.admin = user_model.objects.create_user(
+			username="broadcast_admin",
+			password="password123",
+			role="admin",
+		)
+		self.cashier = user_model.objects.create_user(
+			username="broadcast_cashier",
+			password="password123",
+			role="cashier",
+		)
+
+	def _notify(self, message="Low stock alert: broadcast"):
+		from notifications.models import NotificationAudience
+		from notifications.services.delivery import deliver
+
+		with self.captureOnCommitCallbacks(execute=True):
+			return deliver([Notification(message=message, type=NotificationType.LOW_STOCK)], NotificationAudience.STAFF)[0]
+
+	def _client(self, user):
+		client = APIClient()
+		client.force_authenticate(user)
+		return client
+
+	@override_settings(NOTIFICATION_DELIVERY_MODE="broadcast")
+	def test_broadcast_is_stored_once_and_listed_for_its_audience(self):
+		from notifications.models import UserNotification
+
+		notification = self._notify()
+
+		self.assertEqual(Notification.objects.count(), 1)
+		self.assertFalse(UserNotification.objects.exists())
+
+		response = self._client(self.pharmacist).get("/api/v1/notifications/me/")
+		self.assertEqual(len(response.data["results"]), 1)
+		self.assertEqual(response.data["unread_count"], 1)
+		entry = response.data["results"][0]
+		self.assertIsNone(entry["id"])
+		self.assertEqual(entry["notification_id"], notification.id)
+		self.assertFalse(entry["is_read"])
+
+		response = self._client(self.cashier).get("/api/v1/notifications/me/")
+		self.assertEqual(response.data["results"], [])
+		self.assertEqual(response.data["unread_count"], 0)
+
+	@override_settings(NOTIFICATION_DELIVERY_MODE="broadcast")
+	def test_broadcast_read_markers_are_per_user(self):
+		notification = self._notify()
+		client = self._client(self.pharmacist)
+
+		response = client.post(f"/api/v1/notifications/broadcasts/{notification.id}/read/")
+
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+		self.assertTrue(response.data["is_read"])
+		self.assertEqual(client.get("/api/v1/notifications/me/").data["unread_count"], 0)
+		self.assertEqual(
+			len(self._client(self.admin).get("/api/v1/notifications/me/?unread_only=true").data["results"]),
+			1,
+		)
+
+		response = self._client(self.cashier).post(f"/api/v1/notifications/broadcasts/{notification.id}/read/")
+		self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+	@override_settings(NOTIFICATION_DELIVERY_MODE="broadcast")
+	def test_read_all_moves_watermark_and_drops_markers(self):
+		from notifications.models import NotificationReadMarker, NotificationReadState, UserNotification
+
+		first = self._notify("First")
+		second = self._notify("Second")
+		direct = UserNotification.objects.create(
+			notification=Notification.objects.create(message="Direct", type=NotificationType.LOW_STOCK),
+			user=self.pharmacist,
+		)
+		client = self._client(self.pharmacist)
+		client.post(f"/api/v1/notifications/broadcasts/{first.id}/read/")
+
+		response = client.post("/api/v1/notifications/read-all/")
+
+		self.assertEqual(response.data["marked_read"], 2)
+		self.assertEqual(NotificationReadState.objects.get(user=self.pharmacist).read_through_id, second.id)
+		self.assertFalse(NotificationReadMarker.objects.exists())
+		direct.refresh_from_db()
+		self.assertTrue(direct.is_read)
+		response = client.get("/api/v1/notifications/me/")
+		self.assertEqual(response.data["unread_count"], 0)
+		self.assertTrue(all(entry["is_read"] for entry in response.data["results"]))
+
+	def test_per_user_mode_writes_one_row_per_recipient(self):
+		from notifications.models import UserNotification
+
+		self._notify()
+
+		self.assertEqual(
+			set(UserNotification.objects.values_list("user_id", flat=True)),
+			{self.pharmacist.id, self.admin.id},
+		)
+		with CaptureQueriesContext(connection) as queries:
+			response = self._client(self.admin).get("/api/v1/notifications/me/")
+		self.assertEqual(response.data["unread_count"], 1)
+		self.assertIsNotNone(response.data["results"][0]["id"])
+		# Read through the UserNotification index, not the merged broadcast query.
+		sql = [query["sql"] for query in queries]
+		self.assertTrue(any('FROM "notifications_usernotification"' in query for query in sql))
+		self.assertFalse(any('FROM "notifications_notifications"' in query for query in sql))
+
+
+class UnreadCounterTests(TestCase):
+	def setUp(self):
+		cache.clear()
+		self.addCleanup(cache.clear)
+		self.user = get_user_model().objects.create_user(
+			username="counter_user",
+			password="password123",
+			role="pharmacist",
+		)
+
+	def _counter(self):
+		from notifications.models import NotificationReadState
+
+		return NotificationReadState.objects.get(user=self.user).unread_count
+
+	def _deliver(self, count):
+		from notifications.models import NotificationAudience
+		from notifications.services.delivery import deliver
+
+		return deliver(
+			[Notification(message=f"Counter {index}", type=NotificationType.LOW_STOCK) for index in range(count)],
+			NotificationAudience.STAFF,
+		)
+
+	def test_counter_follows_delivery_and_reads(self):
+		from notifications.services.delivery import mark_read
+
+		self.assertEqual(self._counter(), 0)
+
+		self._deliver(3)
+		self.assertEqual(self._counter(), 3)
+
+		entry = self.user.notifications.order_by("id").first()
+		client = APIClient()
+		client.force_authenticate(self.user)
+		client.post(f"/api/v1/notifications/{entry.id}/read/")
+		self.assertEqual(self._counter(), 2)
+
+		mark_read(self.user, up_to=timezone.now())
+		self.assertEqual(self._counter(), 0)
+
+	@override_settings(NOTIFICATION_DELIVERY_MODE="broadcast")
+	def test_counter_follows_broadcasts(self):
+		from notifications.services.delivery import mark_broadcast_read
+
+		notification, _ = self._deliver(2)
+		self.assertEqual(self._counter(), 2)
+
+		mark_broadcast_read(self.user, notification.id)
+		self.assertEqual(self._counter(), 1)
+
+	def test_unread_count_is_a_single_row_read(self):
+		from notifications.services.dashboard_counters import get_unread_count
+
+		self._deliver(2)
+
+		with self.assertNumQueries(1):
+			self.assertEqual(get_unread_count(self.user.id), 2)
+
+	@override_settings(NOTIFICATION_DELIVERY_MODE="broadcast")
+	def test_broadcast_refreshes_cached_counts_without_per_user_writes(self):
+		from notifications.services.dashboard_counters import get_unread_count
+
+		self._deliver(1)
+		self.assertEqual(get_unread_count(self.user.id), 1)
+
+		with patch("notifications.signals.counters.adjust_unread") as adjust_unread:
+			with self.captureOnCommitCallbacks(execute=True):
+				self._deliver(2)
+
+		adjust_unread.assert_not_called()
+		self.assertEqual(get_unread_count(self.user.id), 3)
+
+	def test_repair_command_recomputes_counters(self):
+		from django.core.management import call_command
+		from notifications.models import NotificationReadState
+
+		self._deliver(2)
+		NotificationReadState.objects.filter(user=self.user).update(unread_count=7)
+
+		call_command("repair_unread_counters", stdout=StringIO())
+
+		self.assertEqual(self._counter(), 2)
+
+
 class DashboardStatsApiTests(TestCase):
 	def setUp(self):
+		cache.clear()
+		self.addCleanup(cache.clear)
 		self.user_model = get_user_model()
 		self.user = self.user_model.objects.create_user(
 			username="stats_user",
@@ -127,11 +542,9 @@ class DashboardStatsApiTests(TestCase):
 		
 		# Setup some test data
 		from notifications.models import NotificationType, Notification, UserNotification, StockAlertRecord
-		from django.db import connection
-		
-		if connection.vendor != "postgresql":
-			notif = Notification.objects.create(message="Test", type=NotificationType.LOW_STOCK)
-			UserNotification.objects.create(notification=notif, user=self.user, is_read=False)
+
+		notif = Notification.objects.create(message="Test", type=NotificationType.LOW_STOCK)
+		UserNotification.objects.create(notification=notif, user=self.user, is_read=False)
 		
 		from inventory.models import Inventory
 		item = Inventory.objects.create(product_name="P1", strength="10mg", quantity_on_hand=5, min_threshold=10)
@@ -157,9 +570,51 @@ class DashboardStatsApiTests(TestCase):
 		self.assertEqual(response.data["proposals"], 1)
 		self.assertEqual(response.data["inventory"], 1)
 
+	def test_dashboard_stats_are_served_from_cached_counters(self):
+		client = APIClient()
+		client.force_authenticate(self.user)
+		client.get("/api/v1/notifications/dashboard/stats/")
+
+		with self.assertNumQueries(0):
+			response = client.get("/api/v1/notifications/dashboard/stats/")
+
+		self.assertEqual(response.data["inventory"], 1)
+
+	def test_dashboard_counters_follow_changes(self):
+		from inventory.models import Inventory
+		from purchases.models import PurchaseProposal
+
+		client = APIClient()
+		client.force_authenticate(self.user)
+		client.get("/api/v1/notifications/dashboard/stats/")
+
+		with self.captureOnCommitCallbacks(execute=True):
+			Inventory.objects.create(product_name="P2", strength="20mg", quantity_on_hand=50, min_threshold=10)
+			proposal = PurchaseProposal.objects.get()
+			proposal.status = "approved"
+			proposal.save(update_fields=["status", "updated_at"])
+
+		response = client.get("/api/v1/notifications/dashboard/stats/")
+
+		self.assertEqual(response.data["inventory"], 2)
+		self.assertEqual(response.data["proposals"], 0)
+
+	def test_reconcile_task_rewrites_counters(self):
+		from notifications.services.dashboard_counters import adjust_counter, get_dashboard_counters, INVENTORY
+		from notifications.tasks import reconcile_dashboard_counters
+
+		get_dashboard_counters(self.user.id)
+		adjust_counter(INVENTORY, 5)
+
+		reconcile_dashboard_counters()
+
+		self.assertEqual(get_dashboard_counters(self.user.id)["inventory"], 1)
+
 
 class RecentActivityApiTests(TestCase):
 	def setUp(self):
+		cache.clear()
+		self.addCleanup(cache.clear)
 		self.user_model = get_user_model()
 		self.user = self.user_model.objects.create_user(
 			username="activity_user",
@@ -190,3 +645,173 @@ class RecentActivityApiTests(TestCase):
 
 		self.assertEqual(response.data[1]["action"], "inventory_adjusted")
 		self.assertEqual(response.data[1]["actor"], "activity_user")
+
+	def test_recent_activity_reaches_past_hot_window_when_needed(self):
+		from datetime import timedelta
+		from django.utils import timezone
+		from rbac.models import AuditLog
+
+		old_log = AuditLog.objects.create(actor=self.user, action="sale_recorded")
+		AuditLog.objects.filter(pk=old_log.pk).update(created_at=timezone.now() - timedelta(days=90))
+		client = APIClient()
+		client.force_authenticate(self.user)
+
+		response = client.get("/api/v1/notifications/dashboard/recent-activity/?limit=10")
+
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+		self.assertEqual(len(response.data), 4)
+		self.assertEqual(response.data[-1]["action"], "sale_recorded")
+
+
+	def test_committed_audit_entries_are_served_from_the_ring(self):
+		from django.db import transaction
+		from rbac.services.audit import create_audit_log
+
+		client = APIClient()
+		client.force_authenticate(self.user)
+		client.get("/api/v1/notifications/dashboard/recent-activity/")
+
+		with self.captureOnCommitCallbacks(execute=True):
+			with transaction.atomic():
+				create_audit_log(actor=self.user, action="sale_recorded")
+				create_audit_log(actor=self.user, action="refund_processed")
+
+		with self.assertNumQueries(0):
+			response = client.get("/api/v1/notifications/dashboard/recent-activity/?limit=3")
+
+		self.assertEqual(
+			[entry["action"] for entry in response.data],
+			["refund_processed", "sale_recorded", "file_uploaded"],
+		)
+		self.assertEqual(response.data[0]["message"], "POS refund processed")
+		self.assertEqual(response.data[0]["actor"], "activity_user")
+
+	@override_settings(RECENT_ACTIVITY_FEED_SIZE=3)
+	def test_ring_keeps_only_the_newest_entries(self):
+		from rbac.services.audit import create_audit_log
+		from notifications.services.activity_feed import recent_activity
+
+		recent_activity(3)
+		with self.captureOnCommitCallbacks(execute=True):
+			create_audit_log(actor=None, action="password_changed")
+			create_audit_log(actor=None, action="user_registered")
+
+		self.assertEqual(
+			[entry["action"] for entry in recent_activity(3)],
+			["user_registered", "password_changed", "file_uploaded"],
+		)
+		self.assertEqual(len(cache.get("pharmacio:activity:ring")), 3)
+
+	@override_settings(RECENT_ACTIVITY_FEED_SIZE=3)
+	def test_redis_rebuild_keeps_entries_pushed_during_cold_read(self):
+		import json
+		from notifications.services.activity_feed import RedisRing
+
+		def entry(pk, minute):
+			return {"id": pk, "created_at": f"2026-01-01T10:{minute:02d}:00Z"}
+
+		ring = RedisRing.__new__(RedisRing)
+		ring._client = MagicMock()
+		pipe = MagicMock()
+		pipe.exists.return_value = 0
+		# Appended by a writer after the rebuild read AuditLog.
+		pipe.lrange.return_value = [json.dumps(entry(4, 3))]
+		ring._client.transaction.side_effect = lambda rebuild, *keys: rebuild(pipe)
+
+		ring.replace([entry(3, 2), entry(2, 1), entry(1, 0)])
+
+		pipe.rpush.assert_called_once_with(
+			"pharmacio:activity:ring", *[json.dumps(entry(pk, pk - 1)) for pk in (4, 3, 2)]
+		)
+		pipe.set.assert_called_once_with("pharmacio:activity:primed", 1)
+
+
+@override_settings(NOTIFICATION_STREAM_BACKEND="memory", NOTIFICATION_STREAM_KEEPALIVE_SECONDS=1)
+class NotificationStreamTests(TestCase):
+	URL = "/api/v1/notifications/stream/"
+
+	def setUp(self):
+		get_broker.cache_clear()
+		self.addCleanup(get_broker.cache_clear)
+		self.user = get_user_model().objects.create_user(
+			username="stream_user",
+			password="password123",
+			role="pharmacist",
+		)
+		self.token = str(AccessToken.for_user(self.user))
+
+	async def _open_stream(self):
+		response = await self.async_client.get(self.URL, {"token": self.token})
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+		self.assertEqual(response["Content-Type"], "text/event-stream")
+		stream = aiter(response.streaming_content)
+		self.assertEqual(await anext(stream), b"retry: 5000\n\n")
+		return stream
+
+	async def test_stream_delivers_user_and_dashboard_events(self):
+		stream = await self._open_stream()
+
+		publish(user_channel(self.user.id), "unread_count", {"delta": 1})
+		publish(user_channel(self.user.id + 1), "unread_count", {"delta": 1})
+		publish(DASHBOARD_CHANNEL, "dashboard", {"counter": "inventory", "delta": 1})
+
+		self.assertEqual(await anext(stream), b'event: unread_count\ndata: {"delta": 1}\n\n')
+		self.assertEqual(
+			await anext(stream),
+			b'event: dashboard\ndata: {"counter": "inventory", "delta": 1}\n\n',
+		)
+
+	async def test_stream_sends_keepalive_when_idle(self):
+		stream = await self._open_stream()
+
+		self.assertEqual(await anext(stream), b": keepalive\n\n")
+
+	def test_closed_subscriber_does_not_stop_delivery(self):
+		import asyncio
+		from notifications.services.event_stream import InProcessBroker
+
+		broker = InProcessBroker()
+		dead_loop = asyncio.new_event_loop()
+		dead_loop.close()
+		received = []
+		live_loop = MagicMock()
+		live_loop.call_soon_threadsafe.side_effect = lambda put, message: received.append(message)
+		live = (live_loop, MagicMock())
+		broker._add(["dashboard"], (dead_loop, MagicMock()))
+		broker._add(["dashboard", "user:1"], live)
+
+		broker.publish("dashboard", "first")
+		broker.publish("dashboard", "second")
+
+		self.assertEqual(received, ["first", "second"])
+		self.assertEqual(broker._subscribers, {"dashboard": {live}, "user:1": {live}})
+
+	def test_committed_notification_is_published(self):
+		from notifications.models import Notification, NotificationType, UserNotification
+
+		notification = Notification.objects.create(message="Low stock", type=NotificationType.LOW_STOCK)
+		with patch("notifications.signals.publish") as publish_mock:
+			with self.captureOnCommitCallbacks(execute=True):
+				UserNotification.objects.create(notification=notification, user=self.user)
+
+		events = [call.args[1] for call in publish_mock.call_args_list]
+		self.assertEqual(events, ["notification", "unread_count"])
+		self.assertEqual(publish_mock.call_args_list[0].args[2]["message"], "Low stock")
+
+	def test_stream_requires_token(self):
+		response = self.client.get(self.URL)
+
+		self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+	async def test_database_connection_is_released_before_streaming(self):
+		# SQLite test databases ignore close(), so watch the call instead.
+		with patch("notifications.views.connection") as view_connection:
+			view_connection.in_atomic_block = False
+			await self._open_stream()
+
+		view_connection.close.assert_called_once_with()
+
+	def test_stream_requires_asgi(self):
+		response = self.client.get(self.URL, {"token": self.token})
+
+		self.assertEqual(response.status_code, status.HTTP_501_NOT_IMPLEMENTED)
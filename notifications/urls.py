@@ -1,6 +1,15 @@
 from django.urls import path
 
-from notifications.views import MyNotificationsView, MarkNotificationReadView, DashboardStatsView, RecentActivityView
+from notifications.views import (
+    MyNotificationsView,
+    MarkNotificationReadView,
+    MarkBroadcastReadView,
+    MarkAllNotificationsReadView,
+    MarkNotificationsReadBulkView,
+    DashboardStatsView,
+    RecentActivityView,
+    notification_stream,
+)
 
 
 urlpatterns = [
@@ -10,6 +19,14 @@ urlpatterns = [
         MarkNotificationReadView.as_view(),
         name="notifications-mark-read",
     ),
+    path(
+        "notifications/broadcasts/<int:notification_id>/read/",
+        MarkBroadcastReadView.as_view(),
+        name="notifications-broadcast-mark-read",
+    ),
+    path("notifications/read/", MarkNotificationsReadBulkView.as_view(), name="notifications-bulk-mark-read"),
+    path("notifications/read-all/", MarkAllNotificationsReadView.as_view(), name="notifications-mark-all-read"),
+    path("notifications/stream/", notification_stream, name="notifications-stream"),
     path("notifications/dashboard/stats/", DashboardStatsView.as_view(), name="dashboard-stats"),
     path("notifications/dashboard/recent-activity/", RecentActivityView.as_view(), name="dashboard-recent-activity"),
 ]
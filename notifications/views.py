@@ -1,14 +1,38 @@
-from django.utils import timezone
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import connection
+from django.http import JsonResponse, StreamingHttpResponse
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
 
-from notifications.models import UserNotification, StockAlertRecord
-from notifications.serializers import UserNotificationSerializer
-from inventory.models import Inventory
-from purchases.models import PurchaseProposal
-from rbac.models import AuditLog
+from config.pagination import CreatedAtCursorPagination, wants_cursor_pagination
+from notifications.models import UserNotification
+from notifications.serializers import (
+    InboxNotificationSerializer,
+    MarkNotificationsReadSerializer,
+    UserNotificationSerializer,
+)
+from notifications.services.activity_feed import recent_activity
+from notifications.services.dashboard_counters import get_dashboard_counters, get_unread_count
+from notifications.services.delivery import (
+    BROADCAST,
+    audiences_for_role,
+    delivery_mode,
+    direct_inbox_queryset,
+    inbox_queryset,
+    mark_all_read,
+    mark_broadcast_read,
+    mark_read,
+)
+from notifications.services.event_stream import DASHBOARD_CHANNEL, audience_channel, get_broker, user_channel
+from rbac.authentication import PermissionClaimsJWTAuthentication
 
 
 def _to_bool(value: str | None) -> bool:
@@ -31,24 +55,32 @@ class MyNotificationsView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        queryset = UserNotification.objects.filter(user=request.user).select_related(
-            "notification"
-        )
+        if delivery_mode() == BROADCAST:
+            # Direct and broadcast entries, read from Notification.
+            queryset = inbox_queryset(request.user)
+            serializer_class = InboxNotificationSerializer
+            ordering = ("-created_at", "-id")
+        else:
+            queryset = direct_inbox_queryset(request.user)
+            serializer_class = UserNotificationSerializer
+            ordering = ("-notification__created_at", "-id")
         if unread_only:
             queryset = queryset.filter(is_read=False)
 
-        queryset = queryset.order_by("-notification__created_at", "-id")
-        unread_count = UserNotification.objects.filter(
-            user=request.user,
-            is_read=False,
-        ).count()
+        unread_count = get_unread_count(request.user.id)
+
+        if wants_cursor_pagination(request):
+            paginator = CreatedAtCursorPagination()
+            page = paginator.paginate_queryset(queryset, request, view=self)
+            payload = paginator.get_paginated_data(serializer_class(page, many=True).data)
+            payload["unread_count"] = unread_count
+            return Response(payload, status=status.HTTP_200_OK)
 
-        results = queryset[:limit]
+        results = queryset.order_by(*ordering)[:limit]
         return Response(
             {
-                "count": queryset.count(),
                 "unread_count": unread_count,
-                "results": UserNotificationSerializer(results, many=True).data,
+                "results": serializer_class(results, many=True).data,
             },
             status=status.HTTP_200_OK,
         )
@@ -70,9 +102,8 @@ class MarkNotificationReadView(APIView):
             )
 
         if not entry.is_read:
-            entry.is_read = True
-            entry.read_at = timezone.now()
-            entry.save(update_fields=["is_read", "read_at", "updated_at"])
+            mark_read(request.user, ids=[entry.pk])
+            entry.refresh_from_db(fields=["is_read", "read_at"])
 
         return Response(
             UserNotificationSerializer(entry).data,
@@ -80,54 +111,75 @@ class MarkNotificationReadView(APIView):
         )
 
 
-class DashboardStatsView(APIView):
+class MarkBroadcastReadView(APIView):
     permission_classes = [IsAuthenticated]
 
-    def get(self, request):
-        activity_alerts = UserNotification.objects.filter(
-            user=request.user,
-            is_read=False,
-        ).count()
+    def post(self, request, notification_id: int):
+        entry = mark_broadcast_read(request.user, notification_id)
+        if entry is None:
+            return Response(
+                {"detail": "Notification not found."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        return Response(
+            InboxNotificationSerializer(entry).data,
+            status=status.HTTP_200_OK,
+        )
+
+
+class MarkNotificationsReadBulkView(APIView):
+    """
+    POST /api/v1/notifications/read/
+
+    Marks many entries read at once, by list or up to a cutoff:
+      {"ids": [...], "notification_ids": [...]}   UserNotification / broadcast ids
+      {"up_to_id": n}                             everything up to a notification id
+      {"up_to": "<ISO 8601>"}                     everything created up to a time
+    Returns the number of entries marked and the new unread count.
+    """
+
+    permission_classes = [IsAuthenticated]
 
-        low_stock = StockAlertRecord.objects.filter(
-            is_below_threshold=True,
-        ).count()
+    def post(self, request):
+        serializer = MarkNotificationsReadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
 
-        proposals = PurchaseProposal.objects.filter(
-            status="pending",
-        ).count()
+        marked = mark_read(request.user, **serializer.validated_data)
+        return Response(
+            {"marked_read": marked, "unread_count": get_unread_count(request.user.id)},
+            status=status.HTTP_200_OK,
+        )
 
-        inventory = Inventory.objects.count()
+
+class MarkAllNotificationsReadView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        marked = mark_all_read(request.user)
+        return Response(
+            {"marked_read": marked, "unread_count": get_unread_count(request.user.id)},
+            status=status.HTTP_200_OK,
+        )
+
+
+class DashboardStatsView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        counters = get_dashboard_counters(request.user.id)
 
         return Response(
             {
-                "activity_alerts": activity_alerts,
-                "low_stock": low_stock,
-                "proposals": proposals,
-                "inventory": inventory,
+                "activity_alerts": counters["activity_alerts"],
+                "low_stock": counters["low_stock"],
+                "proposals": counters["proposals"],
+                "inventory": counters["inventory"],
             },
             status=status.HTTP_200_OK,
         )
 
 
-ACTION_MESSAGES = {
-    "proposal_generated": {"msg": "New proposal generated", "theme": "blue", "icon": "document"},
-    "proposal_approved": {"msg": "Proposal approved", "theme": "green", "icon": "check"},
-    "proposal_rejected": {"msg": "Proposal rejected", "theme": "red", "icon": "close"},
-    "inventory_adjusted": {"msg": "Inventory adjusted", "theme": "blue", "icon": "box"},
-    "inventory_item_created": {"msg": "New inventory item created", "theme": "green", "icon": "box"},
-    "sale_recorded": {"msg": "POS transaction recorded", "theme": "green", "icon": "cash"},
-    "refund_processed": {"msg": "POS refund processed", "theme": "green", "icon": "cash"},
-    "assign_role": {"msg": "Role assigned", "theme": "blue", "icon": "shield"},
-    "revoke_role": {"msg": "Role revoked", "theme": "red", "icon": "shield"},
-    "create_permission": {"msg": "Permission created", "theme": "green", "icon": "key"},
-    "delete_permission": {"msg": "Permission deleted", "theme": "red", "icon": "key"},
-    "user_registered": {"msg": "New user registered", "theme": "green", "icon": "user"},
-    "admin_created": {"msg": "Admin user created", "theme": "green", "icon": "shield"},
-    "password_changed": {"msg": "Password changed", "theme": "blue", "icon": "key"},
-    "file_uploaded": {"msg": "File uploaded", "theme": "blue", "icon": "upload"},
-}
-
 class RecentActivityView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -138,21 +190,79 @@ class RecentActivityView(APIView):
         except ValueError:
             limit = 10
 
-        logs = AuditLog.objects.select_related("actor").order_by("-created_at")[:limit]
-
-        results = []
-        for log in logs:
-            meta = ACTION_MESSAGES.get(log.action, {"msg": f"System action: {log.action}", "theme": "gray", "icon": "info"})
-            results.append(
-                {
-                    "id": log.id,
-                    "action": log.action,
-                    "message": meta["msg"],
-                    "theme": meta["theme"],
-                    "icon": meta["icon"],
-                    "created_at": log.created_at,
-                    "actor": log.actor.username if log.actor else "System",
-                }
-            )
+        return Response(recent_activity(limit), status=status.HTTP_200_OK)
+
+
+def _authenticate_stream(request):
+    try:
+        return _resolve_stream_user(request)
+    finally:
+        # The stream needs no database after this, but would otherwise keep
+        # the connection until request_finished, i.e. until the client leaves.
+        if not connection.in_atomic_block:
+            connection.close()
+
+
+def _resolve_stream_user(request):
+    # EventSource cannot send headers, so the access token may also be passed
+    # as ?token=...
+    authenticator = PermissionClaimsJWTAuthentication()
+    header = authenticator.get_header(request)
+    raw_token = authenticator.get_raw_token(header) if header else None
+    if raw_token is None:
+        raw_token = request.GET.get("token")
+    if not raw_token:
+        return None
+    try:
+        return authenticator.get_user(authenticator.get_validated_token(raw_token))
+    except (InvalidToken, AuthenticationFailed):
+        return None
+
+
+async def notification_stream(request):
+    """
+    GET /api/v1/notifications/stream/ (text/event-stream)
+
+    Pushes events for the authenticated user:
+      notification   a new direct or broadcast entry, serialized like MyNotificationsView
+      unread_count   {"delta": n}, or {"stale": true} to refetch the count
+      dashboard      {"counter": name, "delta": n}, or {"counter": name, "stale": true}
+
+    Needs an ASGI server (config.asgi): under WSGI the response would be
+    consumed in full before being sent, which never ends for a stream.
+    """
+    user = await sync_to_async(_authenticate_stream)(request)
+    if user is None:
+        return JsonResponse(
+            {"detail": "Authentication credentials were not provided or are invalid."},
+            status=status.HTTP_401_UNAUTHORIZED,
+        )
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse(
+            {"detail": "The notification stream is only available when served over ASGI."},
+            status=status.HTTP_501_NOT_IMPLEMENTED,
+        )
+
+    channels = [user_channel(user.id), DASHBOARD_CHANNEL]
+    channels += [audience_channel(audience) for audience in audiences_for_role(user.role)]
+    subscription = get_broker().subscribe(channels)
+    response = StreamingHttpResponse(
+        _stream_events(subscription, settings.NOTIFICATION_STREAM_KEEPALIVE_SECONDS),
+        content_type="text/event-stream",
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
 
-        return Response(results, status=status.HTTP_200_OK)
+async def _stream_events(subscription, keepalive):
+    try:
+        yield "retry: 5000\n\n"
+        while True:
+            message = await subscription.get(timeout=keepalive)
+            if message is None:
+                yield ": keepalive\n\n"
+                continue
+            yield f"event: {message['event']}\ndata: {json.dumps(message['data'])}\n\n"
+    finally:
+        await subscription.close()
@@ -0,0 +1,161 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from inventory.models import Inventory, InventoryBarcode
+from pos.serializers import BarcodeLookupSerializer
+
+# Two-tier barcode -> inventory summary cache for POS scanning.
+#
+# A small process-local LRU sits in front of Django's cache (local-memory or
+# Redis). Shared entries are stored under a per-barcode version number, and
+# writes to InventoryBarcode / Inventory bump that version instead of deleting
+# the entry: a lookup that loaded its summary before the bump stores it under
+# the old version, where no reader looks any more. The writing process also
+# drops its local entry; other processes converge once their short-lived local
+# entry expires.
+#
+# quantity_on_hand is either re-read fresh with a single-column query, or,
+# when POS_BARCODE_STOCK_MAX_AGE_SECONDS > 0, served from the cached summary
+# while it is younger than that age.
+
+CACHE_KEY_PREFIX = "pos:barcode:"
+VERSION_KEY_PREFIX = "pos:barcode-version:"
+
+_local_entries = OrderedDict()
+_local_lock = threading.Lock()
+# Bumped on every local eviction, so a lookup that started before one does not
+# put what it loaded back into the local cache.
+_local_generation = 0
+
+
+def lookup_barcode(barcode: str) -> dict | None:
+    generation = _local_generation
+    entry = _get_local(barcode)
+    if entry is None:
+        version = _get_version(barcode)
+        summary = cache.get(_cache_key(barcode, version))
+        if summary is None:
+            summary = _load_summary(barcode)
+            if summary is None:
+                return None
+            cache.set(_cache_key(barcode, version), summary, _shared_ttl())
+        _put_local(barcode, version, summary, generation)
+    else:
+        version, summary = entry
+
+    max_age = getattr(settings, "POS_BARCODE_STOCK_MAX_AGE_SECONDS", 0)
+    if max_age > 0 and time.time() - summary["stock_read_at"] <= max_age:
+        return _public(summary)
+
+    quantity = (
+        Inventory.objects.filter(pk=summary["inventory_id"])
+        .values_list("quantity_on_hand", flat=True)
+        .first()
+    )
+    if quantity is None:
+        # Inventory row vanished underneath a cached barcode; resolve again from the database.
+        invalidate_barcodes([barcode])
+        summary = _load_summary(barcode)
+        return _public(summary) if summary is not None else None
+
+    summary = {**summary, "quantity_on_hand": quantity, "stock_read_at": time.time()}
+    if max_age > 0:
+        cache.set(_cache_key(barcode, version), summary, _shared_ttl())
+        _put_local(barcode, version, summary, generation)
+    return _public(summary)
+
+
+def invalidate_barcodes(barcodes) -> None:
+    barcodes = [barcode for barcode in barcodes if barcode]
+    if not barcodes:
+        return
+
+    def _evict():
+        global _local_generation
+        for barcode in barcodes:
+            try:
+                cache.incr(_version_key(barcode))
+            except ValueError:
+                cache.set(_version_key(barcode), time.time_ns(), None)
+        with _local_lock:
+            _local_generation += 1
+            for barcode in barcodes:
+                _local_entries.pop(barcode, None)
+
+    # Evict now for this process, and again once the write is visible to other readers.
+    _evict()
+    transaction.on_commit(_evict)
+
+
+def clear_local_cache() -> None:
+    with _local_lock:
+        _local_entries.clear()
+
+
+def _load_summary(barcode: str) -> dict | None:
+    record = (
+        InventoryBarcode.objects.select_related("inventory_item")
+        .filter(barcode=barcode)
+        .first()
+    )
+    if record is None:
+        return None
+    return {**BarcodeLookupSerializer(record).data, "stock_read_at": time.time()}
+
+
+def _public(summary: dict) -> dict:
+    return {key: value for key, value in summary.items() if key != "stock_read_at"}
+
+
+def _get_local(barcode: str) -> tuple[int, dict] | None:
+    with _local_lock:
+        entry = _local_entries.get(barcode)
+        if entry is None:
+            return None
+        expires_at, version, summary = entry
+        if expires_at < time.monotonic():
+            del _local_entries[barcode]
+            return None
+        _local_entries.move_to_end(barcode)
+        return version, summary
+
+
+def _put_local(barcode: str, version: int, summary: dict, generation: int) -> None:
+    max_size = getattr(settings, "POS_BARCODE_LOCAL_CACHE_SIZE", 2048)
+    ttl = getattr(settings, "POS_BARCODE_LOCAL_CACHE_TTL_SECONDS", 5)
+    if max_size <= 0 or ttl <= 0:
+        return
+
+    with _local_lock:
+        if generation != _local_generation:
+            return
+        _local_entries[barcode] = (time.monotonic() + ttl, version, summary)
+        _local_entries.move_to_end(barcode)
+        while len(_local_entries) > max_size:
+            _local_entries.popitem(last=False)
+
+
+def _get_version(barcode: str) -> int:
+    version = cache.get(_version_key(barcode))
+    if version is None:
+        # Seed from the clock so a lost counter never reuses an older version.
+        cache.add(_version_key(barcode), time.time_ns(), None)
+        version = cache.get(_version_key(barcode))
+    return version
+
+
+def _cache_key(barcode: str, version: int) -> str:
+    return f"{CACHE_KEY_PREFIX}{barcode}:{version}"
+
+
+def _version_key(barcode: str) -> str:
+    return f"{VERSION_KEY_PREFIX}{barcode}"
+
+
+def _shared_ttl() -> int:
+    return getattr(settings, "POS_BARCODE_CACHE_TTL_SECONDS", 3600)
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.11 on 2026-10-18 14:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pos', '0002_rename_pos_transac_receip_1bb02d_idx_pos_transac_receipt_bd58b4_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transactionitem',
+            name='is_refunded',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='transactionitem',
+            name='refunded_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='status',
+            field=models.CharField(choices=[('completed', 'Completed'), ('partially_refunded', 'Partially Refunded'), ('refunded', 'Refunded')], default='completed', max_length=20),
+        ),
+    ]
@@ -4,6 +4,7 @@ from inventory.models import Inventory
 
 class TransactionStatus(models.TextChoices):
     COMPLETED = "completed", "Completed"
+    PARTIALLY_REFUNDED = "partially_refunded", "Partially Refunded"
     REFUNDED = "refunded", "Refunded"
 
 class Transaction(models.Model):
@@ -34,6 +35,8 @@ class TransactionItem(models.Model):
     unit_price = models.DecimalField(max_digits=10, decimal_places=2)
     discount_percentage = models.DecimalField(max_digits=5, decimal_places=2, default=0.00)
     total_price = models.DecimalField(max_digits=12, decimal_places=2)
+    is_refunded = models.BooleanField(default=False)
+    refunded_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         db_table = "pos_transaction_items"
@@ -10,7 +10,7 @@ class TransactionItemSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = TransactionItem
-        fields = ["id", "inventory_item", "product_name", "strength", "quantity", "unit_price", "discount_percentage", "total_price"]
+        fields = ["id", "inventory_item", "product_name", "strength", "quantity", "unit_price", "discount_percentage", "total_price", "is_refunded", "refunded_at"]
 
 class PaymentSerializer(serializers.ModelSerializer):
     class Meta:
@@ -46,6 +46,18 @@ class CheckoutInputSerializer(serializers.Serializer):
     payments = CheckoutPaymentInputSerializer(many=True, allow_empty=False)
     discount_percentage = serializers.DecimalField(max_digits=5, decimal_places=2, default=0.00, min_value=0, max_value=100)
 
+# Input serializer for Refund
+class RefundInputSerializer(serializers.Serializer):
+    item_ids = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=False)
+
+
+class BarcodeBatchLookupInputSerializer(serializers.Serializer):
+    barcodes = serializers.ListField(
+        child=serializers.CharField(max_length=128),
+        allow_empty=False,
+        max_length=200,
+    )
+
 
 class BarcodeLookupSerializer(serializers.ModelSerializer):
     inventory_id = serializers.IntegerField(source="inventory_item_id", read_only=True)
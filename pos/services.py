@@ -2,10 +2,18 @@ from decimal import Decimal
 import uuid
 from datetime import datetime
 
-from django.db import transaction
+from django.conf import settings
+from django.utils import timezone
 from rest_framework.exceptions import ValidationError
 
 from inventory.models import Inventory
+from inventory.services.stock import (
+    aggregate_quantities,
+    apply_stock_deltas,
+    atomic_with_lock_retry,
+    decrement_stock_if_available,
+    lock_inventory_rows,
+)
 from pos.models import Transaction, TransactionItem, Payment, TransactionStatus
 from rbac.services.audit import create_audit_log
 
@@ -19,7 +27,37 @@ class POSService:
         return f"TXN-{date_str}-{unique_id}"
 
     @staticmethod
-    @transaction.atomic
+    def _uses_conditional_decrement():
+        return getattr(settings, 'POS_STOCK_DECREMENT_MODE', 'locking') == 'conditional'
+
+    @staticmethod
+    def _decrement_stock_with_locks(items_data, requested):
+        # Lock every referenced inventory row in one ordered query, then deduct in a single UPDATE
+        locked_items = lock_inventory_rows(requested.keys())
+        POSService._raise_for_unavailable_stock(items_data, requested, locked_items)
+        apply_stock_deltas({inventory_id: -quantity for inventory_id, quantity in requested.items()})
+
+    @staticmethod
+    def _decrement_stock_conditionally(items_data, requested):
+        # Optimistic path: no row locks, the UPDATE itself checks availability
+        if decrement_stock_if_available(requested):
+            return
+        current_items = Inventory.objects.in_bulk(requested.keys())
+        POSService._raise_for_unavailable_stock(items_data, requested, current_items)
+        raise ValidationError("Stock levels changed during checkout. Please try again.")
+
+    @staticmethod
+    def _raise_for_unavailable_stock(items_data, requested, inventory_by_id):
+        for item_data in items_data:
+            inventory_id = item_data['inventory_id']
+            inventory = inventory_by_id.get(inventory_id)
+            if inventory is None:
+                raise ValidationError(f"Inventory item with ID {inventory_id} not found.")
+            if inventory.quantity_on_hand < requested[inventory_id]:
+                raise ValidationError(f"Insufficient stock for {inventory.product_name}. Available: {inventory.quantity_on_hand}")
+
+    @staticmethod
+    @atomic_with_lock_retry
     def checkout(user, items_data, payments_data, transaction_discount_percentage=Decimal('0.00')):
         if not items_data:
             raise ValidationError("At least one item is required for checkout.")
@@ -38,22 +76,22 @@ class POSService:
 
         subtotal = Decimal('0.00')
 
-        # 2. Process Items and Inventory
+        # 2. Reserve stock for every line
+        requested = aggregate_quantities(
+            (item_data['inventory_id'], item_data['quantity']) for item_data in items_data
+        )
+        if POSService._uses_conditional_decrement():
+            POSService._decrement_stock_conditionally(items_data, requested)
+        else:
+            POSService._decrement_stock_with_locks(items_data, requested)
+
+        # 3. Build line items
         transaction_items = []
         for item_data in items_data:
-            inventory_id = item_data['inventory_id']
             quantity = item_data['quantity']
             unit_price = item_data['unit_price']
             item_discount_percentage = item_data.get('discount_percentage', Decimal('0.00'))
 
-            try:
-                inventory = Inventory.objects.select_for_update().get(id=inventory_id)
-            except Inventory.DoesNotExist:
-                raise ValidationError(f"Inventory item with ID {inventory_id} not found.")
-
-            if inventory.quantity_on_hand < quantity:
-                raise ValidationError(f"Insufficient stock for {inventory.product_name}. Available: {inventory.quantity_on_hand}")
-
             # Calculate price for this item
             item_gross_price = unit_price * quantity
             discount_amount = item_gross_price * (item_discount_percentage / Decimal('100.00'))
@@ -61,23 +99,19 @@ class POSService:
 
             transaction_items.append(TransactionItem(
                 transaction=pos_txn,
-                inventory_item=inventory,
+                inventory_item_id=item_data['inventory_id'],
                 quantity=quantity,
                 unit_price=unit_price,
                 discount_percentage=item_discount_percentage,
                 total_price=item_total_price
             ))
 
-            # Deduct inventory
-            inventory.quantity_on_hand -= quantity
-            inventory.save(update_fields=['quantity_on_hand', 'updated_at'])
-
             subtotal += item_gross_price
 
         # Bulk create items
         TransactionItem.objects.bulk_create(transaction_items)
 
-        # 3. Process Payments
+        # 4. Process Payments
         total_paid = Decimal('0.00')
         payments = []
         for payment_data in payments_data:
@@ -91,7 +125,7 @@ class POSService:
 
         Payment.objects.bulk_create(payments)
 
-        # 4. Finalize totals
+        # 5. Finalize totals
         txn_discount_amount = subtotal * (transaction_discount_percentage / Decimal('100.00'))
         total_amount = subtotal - txn_discount_amount
 
@@ -104,7 +138,7 @@ class POSService:
         pos_txn.total_amount = total_amount
         pos_txn.save(update_fields=['subtotal', 'total_amount', 'updated_at'])
 
-        # 5. Log action for Dashboard
+        # 6. Log action for Dashboard
         create_audit_log(
             actor=user,
             action="sale_recorded",
@@ -115,8 +149,8 @@ class POSService:
         return pos_txn
 
     @staticmethod
-    @transaction.atomic
-    def refund(user, transaction_id):
+    @atomic_with_lock_retry
+    def refund(user, transaction_id, item_ids=None):
         try:
             pos_txn = Transaction.objects.select_for_update().get(id=transaction_id)
         except Transaction.DoesNotExist:
@@ -125,13 +159,29 @@ class POSService:
         if pos_txn.status == TransactionStatus.REFUNDED:
             raise ValidationError("Transaction is already refunded.")
 
-        # Return items to inventory
-        for item in pos_txn.items.all():
-            inventory = Inventory.objects.select_for_update().get(id=item.inventory_item_id)
-            inventory.quantity_on_hand += item.quantity
-            inventory.save(update_fields=['quantity_on_hand', 'updated_at'])
+        refundable_items = list(pos_txn.items.filter(is_refunded=False))
+        if item_ids is None:
+            items = refundable_items
+        else:
+            selected_ids = set(item_ids)
+            items = [item for item in refundable_items if item.id in selected_ids]
+            if len(items) != len(selected_ids):
+                raise ValidationError("One or more items do not belong to this transaction or are already refunded.")
+        if not items:
+            raise ValidationError("Transaction has no refundable items.")
+
+        # Return items to inventory: lock rows in primary-key order, restore in a single UPDATE
+        restored = aggregate_quantities((item.inventory_item_id, item.quantity) for item in items)
+        lock_inventory_rows(restored.keys())
+        apply_stock_deltas(restored)
+
+        TransactionItem.objects.filter(id__in=[item.id for item in items]).update(
+            is_refunded=True,
+            refunded_at=timezone.now(),
+        )
 
-        pos_txn.status = TransactionStatus.REFUNDED
+        fully_refunded = len(items) == len(refundable_items)
+        pos_txn.status = TransactionStatus.REFUNDED if fully_refunded else TransactionStatus.PARTIALLY_REFUNDED
         pos_txn.save(update_fields=['status', 'updated_at'])
 
         # Log action for Dashboard
@@ -139,7 +189,13 @@ class POSService:
             actor=user,
             action="refund_processed",
             entity=pos_txn,
-            metadata={"receipt_number": pos_txn.receipt_number, "total": str(pos_txn.total_amount)}
+            metadata={
+                "receipt_number": pos_txn.receipt_number,
+                "total": str(pos_txn.total_amount),
+                "refunded_item_ids": [item.id for item in items],
+                "refunded_amount": str(sum((item.total_price for item in items), Decimal('0.00'))),
+                "status": pos_txn.status,
+            }
         )
 
         return pos_txn
@@ -0,0 +1,27 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from inventory.models import Inventory, InventoryBarcode
+from pos.barcode_cache import invalidate_barcodes
+
+# Stock-only saves do not change the cached barcode summary; quantities are
+# read fresh (or within POS_BARCODE_STOCK_MAX_AGE_SECONDS) at lookup time.
+STOCK_ONLY_FIELDS = {"quantity_on_hand", "updated_at"}
+
+
+@receiver(post_save, sender=InventoryBarcode)
+@receiver(post_delete, sender=InventoryBarcode)
+def invalidate_cached_barcode(sender, instance, **kwargs):
+    invalidate_barcodes([instance.barcode])
+
+
+@receiver(post_save, sender=Inventory)
+def invalidate_cached_inventory_barcodes(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        return
+    if update_fields is not None and set(update_fields) <= STOCK_ONLY_FIELDS:
+        return
+
+    invalidate_barcodes(
+        InventoryBarcode.objects.filter(inventory_item_id=instance.pk).values_list("barcode", flat=True)
+    )
@@ -1,12 +1,16 @@
 from decimal import Decimal
+from unittest.mock import patch
 
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, override_settings
 from rest_framework import status
 from rest_framework.test import APIClient
 
 from inventory.models import Inventory, InventoryBarcode
 from rbac.models import AuditLog, Permission, Role, UserRole
+from pos import barcode_cache
+from pos.barcode_cache import clear_local_cache, lookup_barcode
 from pos.models import Transaction, TransactionItem, Payment
 
 
@@ -29,6 +33,10 @@ class POSBarcodeLookupApiTests(TestCase):
         return user
 
     def setUp(self):
+        cache.clear()
+        clear_local_cache()
+        self.addCleanup(clear_local_cache)
+        self.addCleanup(cache.clear)
         self.inventory_item = Inventory.objects.create(
             product_name="Aspirin",
             strength="100mg",
@@ -108,6 +116,98 @@ class POSBarcodeLookupApiTests(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data["inventory_id"], self.inventory_item.id)
 
+    def test_cached_lookup_reads_only_fresh_stock(self):
+        lookup_barcode(self.barcode.barcode)
+        Inventory.objects.filter(pk=self.inventory_item.pk).update(quantity_on_hand=7)
+
+        with self.assertNumQueries(1):
+            summary = lookup_barcode(self.barcode.barcode)
+
+        self.assertEqual(summary["quantity_on_hand"], 7)
+        self.assertEqual(summary["product_name"], "Aspirin")
+
+    @override_settings(POS_BARCODE_STOCK_MAX_AGE_SECONDS=60)
+    def test_cached_lookup_serves_recent_stock_without_queries(self):
+        lookup_barcode(self.barcode.barcode)
+        Inventory.objects.filter(pk=self.inventory_item.pk).update(quantity_on_hand=7)
+
+        with self.assertNumQueries(0):
+            summary = lookup_barcode(self.barcode.barcode)
+
+        self.assertEqual(summary["quantity_on_hand"], 20)
+
+    def test_cached_lookup_is_invalidated_when_product_changes(self):
+        lookup_barcode(self.barcode.barcode)
+
+        self.inventory_item.product_name = "Aspirin Plus"
+        self.inventory_item.save()
+
+        self.assertEqual(lookup_barcode(self.barcode.barcode)["product_name"], "Aspirin Plus")
+
+    def test_lookup_racing_an_invalidation_does_not_cache_stale_summary(self):
+        load_summary = barcode_cache._load_summary
+
+        def load_then_rename(barcode):
+            summary = load_summary(barcode)
+            # A concurrent rename lands after the summary was read.
+            self.inventory_item.product_name = "Aspirin Plus"
+            self.inventory_item.save()
+            return summary
+
+        with patch("pos.barcode_cache._load_summary", side_effect=load_then_rename):
+            self.assertEqual(lookup_barcode(self.barcode.barcode)["product_name"], "Aspirin")
+
+        self.assertEqual(lookup_barcode(self.barcode.barcode)["product_name"], "Aspirin Plus")
+        clear_local_cache()
+        self.assertEqual(lookup_barcode(self.barcode.barcode)["product_name"], "Aspirin Plus")
+
+    def test_cached_lookup_is_invalidated_when_barcode_is_removed(self):
+        lookup_barcode(self.barcode.barcode)
+
+        self.barcode.delete()
+
+        self.assertIsNone(lookup_barcode("4012345678901"))
+
+    def test_batch_lookup_returns_hits_and_misses(self):
+        other_item = Inventory.objects.create(
+            product_name="Ibuprofen",
+            strength="200mg",
+            quantity_on_hand=8,
+            min_threshold=2,
+        )
+        InventoryBarcode.objects.create(inventory_item=other_item, barcode="5012345678900")
+        client = APIClient()
+        client.force_authenticate(user=self.permitted_user)
+
+        response = client.post(
+            f"{self.URL}batch/",
+            {"barcodes": ["5012345678900", " 4012345678901 ", "0000000000000", "5012345678900"]},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [result["inventory_id"] for result in response.data["results"]],
+            [other_item.id, self.inventory_item.id],
+        )
+        self.assertEqual(response.data["missing"], ["0000000000000"])
+
+    def test_batch_lookup_requires_barcodes(self):
+        client = APIClient()
+        client.force_authenticate(user=self.permitted_user)
+
+        response = client.post(f"{self.URL}batch/", {"barcodes": []}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_batch_lookup_missing_permission_returns_403(self):
+        client = APIClient()
+        client.force_authenticate(user=self.unpermitted_user)
+
+        response = client.post(f"{self.URL}batch/", {"barcodes": ["4012345678901"]}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
 
 class POSCheckoutApiTests(TestCase):
     URL = "/api/v1/pos/checkout/"
@@ -282,11 +382,12 @@ class POSCheckoutApiTests(TestCase):
         client = APIClient()
         client.force_authenticate(user=self.permitted_user)
 
-        client.post(
-            self.URL,
-            self.valid_payload,
-            format="json",
-        )
+        with self.captureOnCommitCallbacks(execute=True):
+            client.post(
+                self.URL,
+                self.valid_payload,
+                format="json",
+            )
 
         audit_log = AuditLog.objects.filter(
             action="sale_recorded",
@@ -294,3 +395,260 @@ class POSCheckoutApiTests(TestCase):
         ).first()
         self.assertIsNotNone(audit_log)
         self.assertEqual(audit_log.metadata["total"], "15.00")
+
+    def test_checkout_deducts_all_lines_of_multi_item_basket(self):
+        other_item = Inventory.objects.create(
+            product_name="Ibuprofen",
+            strength="400mg",
+            quantity_on_hand=40,
+            min_threshold=10,
+        )
+        client = APIClient()
+        client.force_authenticate(user=self.permitted_user)
+
+        payload = {
+            "items": [
+                {"inventory_id": other_item.pk, "quantity": 4, "unit_price": "2.50", "discount_percentage": "0.00"},
+                {"inventory_id": self.inventory_item.pk, "quantity": 3, "unit_price": "5.00", "discount_percentage": "0.00"},
+                {"inventory_id": other_item.pk, "quantity": 1, "unit_price": "2.50", "discount_percentage": "0.00"},
+            ],
+            "payments": [{"payment_method": "cash", "amount_paid": "27.50"}],
+            "discount_percentage": "0.00",
+        }
+
+        response = client.post(self.URL, payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.inventory_item.refresh_from_db()
+        other_item.refresh_from_db()
+        self.assertEqual(self.inventory_item.quantity_on_hand, 97)
+        self.assertEqual(other_item.quantity_on_hand, 35)
+        self.assertEqual(TransactionItem.objects.count(), 3)
+        self.assertEqual(Transaction.objects.get().total_amount, Decimal("27.50"))
+
+    def test_repeated_lines_are_checked_against_combined_quantity(self):
+        client = APIClient()
+        client.force_authenticate(user=self.permitted_user)
+
+        payload = {
+            "items": [
+                {"inventory_id": self.inventory_item.pk, "quantity": 60, "unit_price": "1.00", "discount_percentage": "0.00"},
+                {"inventory_id": self.inventory_item.pk, "quantity": 60, "unit_price": "1.00", "discount_percentage": "0.00"},
+            ],
+            "payments": [{"payment_method": "cash", "amount_paid": "120.00"}],
+            "discount_percentage": "0.00",
+        }
+
+        response = client.post(self.URL, payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.inventory_item.refresh_from_db()
+        self.assertEqual(self.inventory_item.quantity_on_hand, 100)
+        self.assertFalse(Transaction.objects.exists())
+
+
+@override_settings(POS_STOCK_DECREMENT_MODE="conditional")
+class POSConditionalCheckoutApiTests(POSCheckoutApiTests):
+    """Runs the checkout scenarios against the compare-and-swap decrement mode."""
+
+    def test_conditional_mode_does_not_lock_rows(self):
+        client = APIClient()
+        client.force_authenticate(user=self.permitted_user)
+
+        with patch("pos.services.lock_inventory_rows") as mock_lock:
+            response = client.post(self.URL, self.valid_payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        mock_lock.assert_not_called()
+        self.inventory_item.refresh_from_db()
+        self.assertEqual(self.inventory_item.quantity_on_hand, 97)
+
+    def test_partial_shortage_leaves_all_rows_untouched(self):
+        other_item = Inventory.objects.create(
+            product_name="Ibuprofen",
+            strength="400mg",
+            quantity_on_hand=2,
+            min_threshold=1,
+        )
+        client = APIClient()
+        client.force_authenticate(user=self.permitted_user)
+
+        payload = {
+            "items": [
+                {"inventory_id": self.inventory_item.pk, "quantity": 5, "unit_price": "1.00", "discount_percentage": "0.00"},
+                {"inventory_id": other_item.pk, "quantity": 3, "unit_price": "1.00", "discount_percentage": "0.00"},
+            ],
+            "payments": [{"payment_method": "cash", "amount_paid": "8.00"}],
+            "discount_percentage": "0.00",
+        }
+
+        response = client.post(self.URL, payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("Insufficient stock for Ibuprofen. Available: 2", response.data["detail"])
+        self.inventory_item.refresh_from_db()
+        other_item.refresh_from_db()
+        self.assertEqual(self.inventory_item.quantity_on_hand, 100)
+        self.assertEqual(other_item.quantity_on_hand, 2)
+
+
+class TransactionListApiTests(TestCase):
+    URL = "/api/v1/pos/transactions/"
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="ledger-user",
+            email="ledger@example.com",
+            password="pass1234",
+        )
+        self.transactions = [
+            Transaction.objects.create(
+                receipt_number=f"R-{index}",
+                cashier=self.user,
+                subtotal=Decimal("1.00"),
+                total_amount=Decimal("1.00"),
+            )
+            for index in range(3)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_cursor_mode_walks_history_newest_first(self):
+        newest_first = [t.id for t in sorted(self.transactions, key=lambda t: (t.created_at, t.id), reverse=True)]
+
+        response = self.client.get(self.URL, {"pagination": "cursor", "page_size": 2})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([t["id"] for t in response.data["results"]], newest_first[:2])
+        response = self.client.get(response.data["next"])
+        self.assertEqual([t["id"] for t in response.data["results"]], newest_first[2:])
+
+    def test_default_mode_returns_plain_list(self):
+        response = self.client.get(self.URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 3)
+
+
+class POSRefundApiTests(TestCase):
+    def _make_user(self, username, email, with_permission=False):
+        user = get_user_model().objects.create_user(
+            username=username,
+            email=email,
+            password="pass1234",
+        )
+        if with_permission:
+            permission, _ = Permission.objects.get_or_create(
+                code="record_sale", defaults={"action": "create"}
+            )
+            role, _ = Role.objects.get_or_create(name="cashier")
+            role.permissions.add(permission)
+            UserRole.objects.get_or_create(user=user, role=role)
+        return user
+
+    def _url(self, transaction_id):
+        return f"/api/v1/pos/transactions/{transaction_id}/refund/"
+
+    def setUp(self):
+        self.user = self._make_user("refund-user", "refund@example.com", with_permission=True)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        self.aspirin = Inventory.objects.create(
+            product_name="Aspirin", strength="100mg", quantity_on_hand=50, min_threshold=5
+        )
+        self.ibuprofen = Inventory.objects.create(
+            product_name="Ibuprofen", strength="400mg", quantity_on_hand=30, min_threshold=5
+        )
+        response = self.client.post(
+            "/api/v1/pos/checkout/",
+            {
+                "items": [
+                    {"inventory_id": self.aspirin.pk, "quantity": 2, "unit_price": "1.00", "discount_percentage": "0.00"},
+                    {"inventory_id": self.ibuprofen.pk, "quantity": 3, "unit_price": "2.00", "discount_percentage": "0.00"},
+                    {"inventory_id": self.aspirin.pk, "quantity": 1, "unit_price": "1.00", "discount_percentage": "0.00"},
+                ],
+                "payments": [{"payment_method": "cash", "amount_paid": "9.00"}],
+                "discount_percentage": "0.00",
+            },
+            format="json",
+        )
+        self.transaction = Transaction.objects.get(pk=response.data["id"])
+        self.items = list(self.transaction.items.order_by("id"))
+
+    def test_missing_permission_returns_403(self):
+        client = APIClient()
+        client.force_authenticate(user=self._make_user("no-refund", "norefund@example.com"))
+
+        response = client.post(self._url(self.transaction.pk), format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_full_refund_restores_aggregated_stock(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self._url(self.transaction.pk), format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["status"], "refunded")
+        self.aspirin.refresh_from_db()
+        self.ibuprofen.refresh_from_db()
+        self.assertEqual(self.aspirin.quantity_on_hand, 50)
+        self.assertEqual(self.ibuprofen.quantity_on_hand, 30)
+        self.assertTrue(all(item["is_refunded"] for item in response.data["items"]))
+
+        audit_log = AuditLog.objects.get(action="refund_processed")
+        self.assertEqual(audit_log.metadata["refunded_amount"], "9.00")
+
+    def test_partial_refund_restores_only_selected_items(self):
+        response = self.client.post(
+            self._url(self.transaction.pk),
+            {"item_ids": [self.items[1].pk]},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["status"], "partially_refunded")
+        self.aspirin.refresh_from_db()
+        self.ibuprofen.refresh_from_db()
+        self.assertEqual(self.aspirin.quantity_on_hand, 47)
+        self.assertEqual(self.ibuprofen.quantity_on_hand, 30)
+
+        response = self.client.post(self._url(self.transaction.pk), format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["status"], "refunded")
+        self.aspirin.refresh_from_db()
+        self.ibuprofen.refresh_from_db()
+        self.assertEqual(self.aspirin.quantity_on_hand, 50)
+        self.assertEqual(self.ibuprofen.quantity_on_hand, 30)
+
+    def test_refunding_an_item_twice_is_rejected(self):
+        self.client.post(self._url(self.transaction.pk), {"item_ids": [self.items[0].pk]}, format="json")
+
+        response = self.client.post(
+            self._url(self.transaction.pk),
+            {"item_ids": [self.items[0].pk]},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.aspirin.refresh_from_db()
+        self.assertEqual(self.aspirin.quantity_on_hand, 49)
+
+    def test_refund_rejects_items_from_other_transactions(self):
+        response = self.client.post(
+            self._url(self.transaction.pk),
+            {"item_ids": [999999]},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.transaction.refresh_from_db()
+        self.assertEqual(self.transaction.status, "completed")
+
+    def test_refunded_transaction_cannot_be_refunded_again(self):
+        self.client.post(self._url(self.transaction.pk), format="json")
+
+        response = self.client.post(self._url(self.transaction.pk), format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
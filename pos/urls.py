@@ -1,6 +1,7 @@
 from django.urls import path
 
 from pos.views import (
+    POSBarcodeBatchLookupView,
     POSBarcodeLookupView,
     POSCheckoutView,
     TransactionListView,
@@ -10,6 +11,7 @@ from pos.views import (
 
 urlpatterns = [
     path("pos/barcode-lookup/", POSBarcodeLookupView.as_view(), name="pos-barcode-lookup"),
+    path("pos/barcode-lookup/batch/", POSBarcodeBatchLookupView.as_view(), name="pos-barcode-batch-lookup"),
     path("pos/checkout/", POSCheckoutView.as_view(), name="pos-checkout"),
     path("pos/transactions/", TransactionListView.as_view(), name="pos-transactions"),
     path("pos/transactions/<int:transaction_id>/receipt/", TransactionReceiptView.as_view(), name="pos-receipt"),
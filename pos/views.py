@@ -6,14 +6,18 @@ from rest_framework.views import APIView
 from rest_framework.exceptions import ValidationError as DRFValidationError
 from django.shortcuts import get_object_or_404
 
+from config.pagination import CreatedAtCursorPagination, wants_cursor_pagination
 from inventory.models import InventoryBarcode
 from rbac.constants import RECORD_SALE
 from rbac.permissions import user_has_permission
+from pos.barcode_cache import lookup_barcode
 from pos.models import Transaction
 from pos.serializers import (
+    BarcodeBatchLookupInputSerializer,
     BarcodeLookupSerializer,
     TransactionSerializer,
-    CheckoutInputSerializer
+    CheckoutInputSerializer,
+    RefundInputSerializer,
 )
 from pos.services import POSService
 
@@ -63,25 +67,64 @@ class POSBarcodeLookupView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        barcode_record = (
-            InventoryBarcode.objects.select_related("inventory_item")
-            .filter(barcode=barcode)
-            .first()
-        )
-        if barcode_record is None:
+        summary = lookup_barcode(barcode)
+        if summary is None:
             return Response(
                 {"detail": "No inventory item found for this barcode."},
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        return Response(BarcodeLookupSerializer(barcode_record).data, status=status.HTTP_200_OK)
+        return Response(summary, status=status.HTTP_200_OK)
+
+
+class POSBarcodeBatchLookupView(APIView):
+    """
+    Resolve a burst of queued scans in one request and one query.
+    Returns hits in request order plus the barcodes that matched nothing.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        if not user_has_permission(request.user, RECORD_SALE):
+            return Response(
+                {"detail": "You do not have permission to use POS barcode lookup."},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        serializer = BarcodeBatchLookupInputSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        # Scanners replay the same code repeatedly; resolve each one once, keeping scan order.
+        barcodes = list(dict.fromkeys(serializer.validated_data["barcodes"]))
+        records = {
+            record.barcode: record
+            for record in InventoryBarcode.objects.select_related("inventory_item").filter(barcode__in=barcodes)
+        }
+
+        found = [records[barcode] for barcode in barcodes if barcode in records]
+        return Response(
+            {
+                "results": BarcodeLookupSerializer(found, many=True).data,
+                "missing": [barcode for barcode in barcodes if barcode not in records],
+            },
+            status=status.HTTP_200_OK,
+        )
 
 
 class TransactionListView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        transactions = Transaction.objects.all().order_by('-created_at')[:100]
+        transactions = Transaction.objects.select_related("cashier").prefetch_related(
+            "items__inventory_item", "payments"
+        )
+        if wants_cursor_pagination(request):
+            paginator = CreatedAtCursorPagination()
+            page = paginator.paginate_queryset(transactions, request, view=self)
+            return paginator.get_paginated_response(TransactionSerializer(page, many=True).data)
+
+        transactions = transactions.order_by('-created_at')[:100]
         serializer = TransactionSerializer(transactions, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -105,8 +148,16 @@ class POSRefundView(APIView):
                 status=status.HTTP_403_FORBIDDEN,
             )
 
+        serializer = RefundInputSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
         try:
-            transaction = POSService.refund(user=request.user, transaction_id=transaction_id)
+            transaction = POSService.refund(
+                user=request.user,
+                transaction_id=transaction_id,
+                item_ids=serializer.validated_data.get('item_ids'),
+            )
             return Response(TransactionSerializer(transaction).data, status=status.HTTP_200_OK)
         except DRFValidationError as e:
             return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
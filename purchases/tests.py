@@ -299,6 +299,34 @@ class PurchaseProposalAPITest(TestCase):
         proposals = body.get("results", body)
         self.assertEqual(len(proposals), 1)
 
+    def test_list_cursor_mode_pages_newest_first(self):
+        for _ in range(3):
+            PurchaseProposal.objects.create(total_cost=10, created_by=self.user, status="pending")
+        newest_first = list(PurchaseProposal.objects.order_by("-created_at", "-id").values_list("id", flat=True))
+
+        response = self.client.get("/api/v1/purchase-proposals/", {"pagination": "cursor", "page_size": 2})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        body = response.json()
+        self.assertNotIn("count", body)
+        self.assertEqual([proposal["id"] for proposal in body["results"]], newest_first[:2])
+
+        response = self.client.get(body["next"])
+
+        body = response.json()
+        self.assertEqual([proposal["id"] for proposal in body["results"]], newest_first[2:])
+        self.assertIsNone(body["next"])
+
+    def test_list_cursor_mode_counts_only_when_asked(self):
+        PurchaseProposal.objects.create(total_cost=10, created_by=self.user, status="pending")
+
+        response = self.client.get(
+            "/api/v1/purchase-proposals/",
+            {"pagination": "cursor", "include_count": "true"},
+        )
+
+        self.assertEqual(response.json()["count"], 1)
+
     def test_list_requires_authentication(self):
         self.client.force_authenticate(user=None)
         response = self.client.get("/api/v1/purchase-proposals/")
@@ -342,7 +370,8 @@ class PurchaseProposalAPITest(TestCase):
         proposal = generate_proposal([result_a.id], created_by=self.user)[0]
         self.client.force_authenticate(user=self.approver)
 
-        response = self.client.post(f"/api/v1/purchase-proposals/{proposal.id}/approve/")
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f"/api/v1/purchase-proposals/{proposal.id}/approve/")
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         proposal.refresh_from_db()
@@ -378,7 +407,8 @@ class PurchaseProposalAPITest(TestCase):
         proposal = generate_proposal([result_a.id], created_by=self.user)[0]
         self.client.force_authenticate(user=self.approver)
 
-        response = self.client.post(f"/api/v1/purchase-proposals/{proposal.id}/reject/")
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f"/api/v1/purchase-proposals/{proposal.id}/reject/")
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         proposal.refresh_from_db()
@@ -1,12 +1,12 @@
 from django.db import transaction
-from django.db.models import F
 from rest_framework import generics, status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from config.pagination import PageNumberOrCursorPagination
 from ai_integration.services.comparison import compare_offers, make_drug_key
-from inventory.models import Inventory
+from inventory.services.low_stock import get_low_stock_items
 from purchases.models import PurchaseHistory, PurchaseProposal
 from purchases.serializers import (
     DrugComparisonSerializer,
@@ -47,10 +47,9 @@ class CompareOffersView(APIView):
         serializer.is_valid(raise_exception=True)
         ocr_result_ids = serializer.validated_data["ocr_result_ids"]
 
-        low_stock_items = Inventory.objects.filter(quantity_on_hand__lte=F('min_threshold'))
         requested_keys = {
-            make_drug_key(item.product_name, None)
-            for item in low_stock_items
+            make_drug_key(item["product_name"], None)
+            for item in get_low_stock_items()
         }
 
         comparisons = compare_offers(ocr_result_ids, requested_drug_keys=requested_keys)
@@ -89,11 +88,13 @@ class PurchaseProposalListView(generics.ListAPIView):
     """
     GET /api/v1/purchase-proposals
     Returns all purchase proposals ordered by most recent first.
+    ?pagination=cursor switches to cursor pagination (no total count).
     """
 
     queryset = PurchaseProposal.objects.prefetch_related("items").order_by("-created_at")
     serializer_class = PurchaseProposalSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = PageNumberOrCursorPagination
 
 
 class PurchaseProposalDetailView(generics.RetrieveAPIView):
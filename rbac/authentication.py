@@ -0,0 +1,24 @@
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from rbac.services.permission_cache import TOKEN_CLAIMS_ATTR
+
+
+class PermissionClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that hands the token's RBAC claims (see rbac.tokens)
+    to the permission resolver, so permission checks need no queries.
+    """
+
+    def authenticate(self, request):
+        result = super().authenticate(request)
+        if result is None:
+            return None
+
+        user, token = result
+        if "perm_ver" in token:
+            setattr(user, TOKEN_CLAIMS_ATTR, {
+                "perms": token.get("perms"),
+                "perm_admin": token.get("perm_admin", False),
+                "perm_ver": token["perm_ver"],
+            })
+        return user, token
@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from rbac.services.audit_partitions import archive_expired_audit_logs, ensure_future_partitions
+
+
+class Command(BaseCommand):
+    help = (
+        "Create upcoming monthly audit log partitions and archive months older "
+        "than the retention window to compressed JSONL in file storage"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--months-ahead',
+            type=int,
+            default=settings.AUDIT_LOG_PARTITION_MONTHS_AHEAD,
+            help='Number of future monthly partitions to keep ready'
+        )
+        parser.add_argument(
+            '--retention-months',
+            type=int,
+            default=settings.AUDIT_LOG_RETENTION_MONTHS,
+            help='Months of audit history to keep in the database'
+        )
+
+    def handle(self, *args, **options):
+        created = ensure_future_partitions(options['months_ahead'])
+        for name in created:
+            self.stdout.write(f"  Created partition: {name}")
+
+        archived = archive_expired_audit_logs(options['retention_months'])
+        for key in archived:
+            self.stdout.write(f"  Archived: {key}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Audit partitions maintained ({len(created)} created, {len(archived)} archived)"
+        ))
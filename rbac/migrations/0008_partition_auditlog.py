@@ -0,0 +1,94 @@
+from datetime import date, datetime, time
+
+from django.db import migrations, models
+from django.utils import timezone
+
+# Postgres only: rebuild rbac_auditlog as a table range-partitioned by month on
+# created_at. Partitioned tables need the partition key in the primary key, so
+# the constraint becomes (id, created_at); id stays unique through its identity
+# sequence and remains the Django primary key. Other backends keep the plain
+# table.
+
+TABLE = "rbac_auditlog"
+MONTHS_AHEAD = 3
+
+
+def _add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _bound(month):
+    return timezone.make_aware(datetime.combine(month, time.min))
+
+
+def _rebuild(schema_editor, model, source, *, partitioned):
+    execute = schema_editor.execute
+    execute(f"ALTER TABLE {TABLE} RENAME TO {source}")
+    partition_clause = " PARTITION BY RANGE (created_at)" if partitioned else ""
+    execute(
+        f"CREATE TABLE {TABLE} (LIKE {source} INCLUDING DEFAULTS INCLUDING IDENTITY)"
+        f"{partition_clause}"
+    )
+
+    if partitioned:
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute(f"SELECT MIN(created_at) FROM {source}")
+            oldest = cursor.fetchone()[0]
+        today = timezone.localdate()
+        month = date((oldest or today).year, (oldest or today).month, 1)
+        last = _add_months(date(today.year, today.month, 1), MONTHS_AHEAD)
+        while month <= last:
+            execute(
+                f"CREATE TABLE {TABLE}_p{month:%Y%m} PARTITION OF {TABLE} "
+                "FOR VALUES FROM (%s) TO (%s)",
+                [_bound(month), _bound(_add_months(month, 1))],
+            )
+            month = _add_months(month, 1)
+        execute(f"CREATE TABLE {TABLE}_default PARTITION OF {TABLE} DEFAULT")
+
+    execute(f"INSERT INTO {TABLE} OVERRIDING SYSTEM VALUE SELECT * FROM {source}")
+    execute(
+        f"SELECT setval(pg_get_serial_sequence('{TABLE}', 'id'), "
+        f"COALESCE((SELECT MAX(id) FROM {TABLE}), 0) + 1, false)"
+    )
+    execute(f"DROP TABLE {source}")
+
+    primary_key = "id, created_at" if partitioned else "id"
+    execute(f"ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_pkey PRIMARY KEY ({primary_key})")
+    for column, target in (("actor_id", "users"), ("entity_content_type_id", "django_content_type")):
+        execute(f"CREATE INDEX {TABLE}_{column}_idx ON {TABLE} ({column})")
+        execute(
+            f"ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_{column}_fk FOREIGN KEY ({column}) "
+            f"REFERENCES {target} (id) DEFERRABLE INITIALLY DEFERRED"
+        )
+    for index in model._meta.indexes:
+        schema_editor.add_index(model, index)
+
+
+def partition_auditlog(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    _rebuild(schema_editor, apps.get_model("rbac", "AuditLog"), f"{TABLE}_unpartitioned", partitioned=True)
+
+
+def unpartition_auditlog(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    _rebuild(schema_editor, apps.get_model("rbac", "AuditLog"), f"{TABLE}_partitioned", partitioned=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("rbac", "0007_alter_auditlog_action"),
+        ("contenttypes", "0002_remove_content_type_name"),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_auditlog, reverse_code=unpartition_auditlog),
+        migrations.AddIndex(
+            model_name="auditlog",
+            index=models.Index(fields=["created_at"], name="rbac_auditl_created_idx"),
+        ),
+    ]
@@ -2,6 +2,7 @@ from django.db import models
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.conf import settings
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 
@@ -168,12 +169,14 @@ class AuditLog(models.Model):
     entity_repr = models.CharField(max_length=255, blank=True, default="")
 
     metadata = models.JSONField(default=dict, blank=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Stamped when the entry is recorded, not when a (possibly deferred) batch writes it
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
 
     class Meta:
         indexes = [
             models.Index(fields=["action", "created_at"]),
             models.Index(fields=["actor", "created_at"]),
             models.Index(fields=["entity_content_type", "entity_object_id"]),
+            models.Index(fields=["created_at"], name="rbac_auditl_created_idx"),
         ]
     
@@ -1,5 +1,5 @@
 from rest_framework import permissions
-from .models import UserRole
+from .services.permission_cache import get_effective_permissions
 
 
 def user_has_permission(user, permission_code):
@@ -12,17 +12,7 @@ def user_has_permission(user, permission_code):
     if getattr(user, 'role', None) == 'admin':
         return True
 
-    if UserRole.objects.filter(user=user, role__name__iexact='admin').exists():
-        return True
-
-    user_roles = UserRole.objects.filter(user=user).select_related(
-        'role').prefetch_related('role__permissions')
-    for user_role in user_roles:
-        for perm in user_role.role.permissions.all():
-            if perm.code == permission_code:
-                return True
-
-    return False
+    return get_effective_permissions(user).allows(permission_code)
 
 
 class IsAdminUser(permissions.BasePermission):
@@ -33,9 +23,7 @@ class IsAdminUser(permissions.BasePermission):
             return True
         if getattr(request.user, 'role', None) == 'admin':
             return True
-        return UserRole.objects.filter(
-            user=request.user, role__name__iexact='admin'
-        ).exists()
+        return get_effective_permissions(request.user).is_admin
 
 
 class HasPermission(permissions.BasePermission):
@@ -1,8 +1,24 @@
+from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.dispatch import Signal
+
+from config.transactions import commit_buffer
 from rbac.models import AuditLog
 
+# Sent after committed entries are bulk-inserted. Arguments: entries.
+audit_logs_written = Signal()
+
+
 def create_audit_log(*, actor, action: str, entity=None, metadata=None, request=None):
- 
+    """
+    Record an audit entry for the current unit of work.
+
+    Inside a transaction the entry is buffered and written together with the
+    transaction's other entries in one bulk INSERT after commit; entries from
+    rolled-back transactions or savepoints are never written. Outside a
+    transaction it is written immediately.
+    """
     ct = None
     oid = None
     erepr = ""
@@ -12,11 +28,45 @@ def create_audit_log(*, actor, action: str, entity=None, metadata=None, request=
         oid = str(entity.pk)
         erepr = str(entity)[:255]
 
-    AuditLog.objects.create(
+    entry = AuditLog(
         actor=actor,
         action=action,
         entity_content_type=ct,
         entity_object_id=oid,
         entity_repr=erepr,
         metadata=metadata or {},
-    )
\ No newline at end of file
+    )
+
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        write_audit_logs([entry])
+        return
+
+    commit_buffer(write_audit_logs).append(entry)
+
+
+def write_audit_logs(entries: list[AuditLog]) -> None:
+    if not entries:
+        return
+    if getattr(settings, "AUDIT_LOG_ASYNC", False):
+        from rbac.tasks import write_audit_log_batch
+
+        batch_size = getattr(settings, "AUDIT_LOG_BATCH_SIZE", 500)
+        rows = [_serialize(entry) for entry in entries]
+        for start in range(0, len(rows), batch_size):
+            write_audit_log_batch.delay(rows[start:start + batch_size])
+        return
+    AuditLog.objects.bulk_create(entries)
+    audit_logs_written.send(sender=AuditLog, entries=entries)
+
+
+def _serialize(entry: AuditLog) -> dict:
+    return {
+        "actor_id": entry.actor_id,
+        "action": entry.action,
+        "entity_content_type_id": entry.entity_content_type_id,
+        "entity_object_id": entry.entity_object_id,
+        "entity_repr": entry.entity_repr,
+        "metadata": entry.metadata,
+        "created_at": entry.created_at.isoformat(),
+    }
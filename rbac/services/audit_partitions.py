@@ -0,0 +1,233 @@
+import gzip
+import json
+import logging
+import re
+import tempfile
+from datetime import date, datetime, time
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.utils import timezone
+
+from files.storage import get_storage_adapter
+from rbac.models import AuditLog
+
+logger = logging.getLogger(__name__)
+
+# On Postgres rbac_auditlog is range-partitioned by month on created_at
+# (see rbac/migrations/0008_partition_auditlog.py), with one child table per
+# month named rbac_auditlog_pYYYYMM plus a default partition. Other backends
+# keep a plain table; retention there archives and deletes rows by month.
+#
+# Rows only land in the default partition when their month has no partition
+# yet. Before such a month's partition is created the default partition is
+# detached and its rows for that month moved over, since Postgres refuses to
+# create a partition whose range already has rows in the default one.
+
+AUDIT_TABLE = AuditLog._meta.db_table
+DEFAULT_PARTITION = f"{AUDIT_TABLE}_default"
+PARTITION_NAME_RE = re.compile(rf"^{AUDIT_TABLE}_p(\d{{4}})(\d{{2}})$")
+
+
+def month_start(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{AUDIT_TABLE}_p{month:%Y%m}"
+
+
+def archive_key(month: date) -> str:
+    prefix = getattr(settings, "AUDIT_LOG_ARCHIVE_PREFIX", "audit-archive").strip("/")
+    return f"{prefix}/{partition_name(month)}.jsonl.gz"
+
+
+def uses_partitions() -> bool:
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass",
+            [AUDIT_TABLE],
+        )
+        return cursor.fetchone() is not None
+
+
+def ensure_future_partitions(months_ahead: int, today: date | None = None) -> list[str]:
+    """
+    Create monthly partitions from the current month through months_ahead,
+    plus one for every month with rows waiting in the default partition.
+    """
+    if not uses_partitions():
+        return []
+
+    current = month_start(today or timezone.localdate())
+    existing = set(_partition_months())
+    wanted = {add_months(current, offset) for offset in range(months_ahead + 1)}
+    wanted.update(_default_partition_months())
+    created = []
+    for month in sorted(wanted - existing):
+        _create_partition(month)
+        created.append(partition_name(month))
+    return created
+
+
+def _create_partition(month: date) -> None:
+    bounds = [_month_bound(month), _month_bound(add_months(month, 1))]
+    with transaction.atomic(), connection.cursor() as cursor:
+        has_default = _has_default_partition()
+        if has_default:
+            cursor.execute(f"ALTER TABLE {AUDIT_TABLE} DETACH PARTITION {DEFAULT_PARTITION}")
+        cursor.execute(
+            f"CREATE TABLE {partition_name(month)} PARTITION OF {AUDIT_TABLE} "
+            "FOR VALUES FROM (%s) TO (%s)",
+            bounds,
+        )
+        if has_default:
+            # With the default detached, rows inserted through the parent are
+            # routed to the new partition.
+            cursor.execute(
+                f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+                "WHERE created_at >= %s AND created_at < %s RETURNING *) "
+                f"INSERT INTO {AUDIT_TABLE} OVERRIDING SYSTEM VALUE SELECT * FROM moved",
+                bounds,
+            )
+            if cursor.rowcount:
+                logger.info(
+                    "Moved %s audit rows from %s to %s",
+                    cursor.rowcount, DEFAULT_PARTITION, partition_name(month),
+                )
+            cursor.execute(f"ALTER TABLE {AUDIT_TABLE} ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT")
+
+
+def archive_expired_audit_logs(retention_months: int, today: date | None = None) -> list[str]:
+    """
+    Archive every month older than the retention window to compressed JSONL
+    on the storage adapter, then drop it: partitions are detached and dropped
+    on Postgres, rows are deleted elsewhere. Returns the archive keys written.
+    """
+    cutoff = add_months(month_start(today or timezone.localdate()), -retention_months)
+    if uses_partitions():
+        return _archive_partitions_before(cutoff)
+    return _archive_rows_before(cutoff)
+
+
+def _archive_partitions_before(cutoff: date) -> list[str]:
+    keys = []
+    for month in sorted(_partition_months()):
+        if month >= cutoff:
+            continue
+        table = partition_name(month)
+        with transaction.atomic():
+            with connection.chunked_cursor() as cursor:
+                cursor.execute(f"SELECT row_to_json(t)::text FROM {table} t ORDER BY id")
+                key = _upload_jsonl(month, (row[0] for row in _iter_rows(cursor)))
+            with connection.cursor() as cursor:
+                cursor.execute(f"ALTER TABLE {AUDIT_TABLE} DETACH PARTITION {table}")
+                cursor.execute(f"DROP TABLE {table}")
+        logger.info("Archived audit partition %s to %s", table, key)
+        keys.append(key)
+
+    for month in sorted(_default_partition_months()):
+        if month >= cutoff:
+            continue
+        bounds = [_month_bound(month), _month_bound(add_months(month, 1))]
+        with transaction.atomic():
+            with connection.chunked_cursor() as cursor:
+                cursor.execute(
+                    f"SELECT row_to_json(t)::text FROM {DEFAULT_PARTITION} t "
+                    "WHERE created_at >= %s AND created_at < %s ORDER BY id",
+                    bounds,
+                )
+                key = _upload_jsonl(month, (row[0] for row in _iter_rows(cursor)))
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"DELETE FROM {DEFAULT_PARTITION} WHERE created_at >= %s AND created_at < %s",
+                    bounds,
+                )
+        logger.info("Archived %s rows of %s to %s", DEFAULT_PARTITION, f"{month:%Y-%m}", key)
+        keys.append(key)
+    return keys
+
+
+def _archive_rows_before(cutoff: date) -> list[str]:
+    keys = []
+    expired = AuditLog.objects.filter(created_at__lt=_month_bound(cutoff))
+    months = sorted({month_start(timezone.localtime(value)) for value in expired.values_list("created_at", flat=True)})
+    for month in months:
+        rows = expired.filter(
+            created_at__gte=_month_bound(month),
+            created_at__lt=_month_bound(add_months(month, 1)),
+        ).order_by("id")
+        with transaction.atomic():
+            key = _upload_jsonl(
+                month,
+                (json.dumps(row, cls=DjangoJSONEncoder) for row in rows.values().iterator()),
+            )
+            rows.delete()
+        logger.info("Archived audit rows for %s to %s", f"{month:%Y-%m}", key)
+        keys.append(key)
+    return keys
+
+
+def _upload_jsonl(month: date, lines) -> str:
+    key = archive_key(month)
+    with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as buffer:
+        with gzip.GzipFile(fileobj=buffer, mode="wb") as archive:
+            for line in lines:
+                archive.write(line.encode("utf-8") + b"\n")
+        buffer.seek(0)
+        get_storage_adapter().upload_fileobj(buffer, key)
+    return key
+
+
+def _partition_months() -> list[date]:
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = %s::regclass",
+            [AUDIT_TABLE],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    months = []
+    for name in names:
+        match = PARTITION_NAME_RE.match(name)
+        if match:
+            months.append(date(int(match.group(1)), int(match.group(2)), 1))
+    return months
+
+
+def _has_default_partition() -> bool:
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT to_regclass(%s) IS NOT NULL", [DEFAULT_PARTITION])
+        return cursor.fetchone()[0]
+
+
+def _default_partition_months() -> list[date]:
+    if not _has_default_partition():
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT DISTINCT date_trunc('month', created_at AT TIME ZONE %s)::date "
+            f"FROM {DEFAULT_PARTITION}",
+            [timezone.get_current_timezone_name()],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _iter_rows(cursor, size=1000):
+    while True:
+        rows = cursor.fetchmany(size)
+        if not rows:
+            return
+        yield from rows
+
+
+def _month_bound(month: date) -> datetime:
+    return timezone.make_aware(datetime.combine(month, time.min))
@@ -0,0 +1,143 @@
+import time
+from typing import NamedTuple
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import F
+
+from rbac.models import Permission, UserRole
+
+# Effective permissions are versioned per user: User.permissions_version is
+# bumped (in the same transaction) whenever a change to the user's roles, to
+# those roles' permissions or to a permission they hold can alter the user's
+# effective set. Since the request's user row is loaded anyway, checking the
+# version costs no query, and it is the same in every process.
+#
+# Resolved sets are memoized on the user object for the request and, with a
+# TTL, shared through the cache under (user, version). Sharing needs a cache
+# all processes see (Redis); without REDIS_URL the TTL defaults to 0 and
+# every request resolves its user's permissions once.
+
+USER_MEMO_ATTR = "_rbac_effective_permissions"
+TOKEN_CLAIMS_ATTR = "_rbac_token_claims"
+CODES_BY_ID_CACHE_KEY = "rbac:perm-codes"
+# Permission ids never change meaning except by a rename, after which every
+# holder's version is bumped; the id -> code map can be kept longer.
+CODES_BY_ID_TTL_SECONDS = 300
+
+_codes_by_id_memo = (0.0, {})
+
+
+class EffectivePermissions(NamedTuple):
+    is_admin: bool
+    codes: frozenset
+
+    def allows(self, permission_code: str) -> bool:
+        return self.is_admin or permission_code in self.codes
+
+
+def get_effective_permissions(user) -> EffectivePermissions:
+    """
+    Resolve the user's RBAC roles to an admin flag and a frozenset of
+    permission codes, for the user's current permissions_version.
+    """
+    version = user.permissions_version
+
+    memo = getattr(user, USER_MEMO_ATTR, None)
+    if memo is not None and memo[0] == version:
+        return memo[1]
+
+    claims = getattr(user, TOKEN_CLAIMS_ATTR, None)
+    if claims is not None and claims.get("perm_ver") == version:
+        effective = _from_token_claims(claims)
+        setattr(user, USER_MEMO_ATTR, (version, effective))
+        return effective
+
+    ttl = _cache_ttl()
+    key = _user_cache_key(user.pk, version)
+    cached = cache.get(key) if ttl else None
+    if cached is None:
+        effective = _load_effective_permissions(user.pk)
+        if ttl:
+            cache.set(key, (effective.is_admin, tuple(effective.codes)), ttl)
+    else:
+        effective = EffectivePermissions(cached[0], frozenset(cached[1]))
+
+    setattr(user, USER_MEMO_ATTR, (version, effective))
+    return effective
+
+
+def bump_permissions_version(users) -> None:
+    """Make the cached permissions and token claims of the given users stale."""
+    get_user_model().objects.filter(pk__in=users.values("pk")).update(
+        permissions_version=F("permissions_version") + 1
+    )
+
+
+def forget_user_permissions(user) -> None:
+    """Drop a cached entry left under this user's id and version, e.g. by a deleted user whose id was reused."""
+    cache.delete(_user_cache_key(user.pk, user.permissions_version))
+
+
+def forget_permission_codes() -> None:
+    """Drop the cached Permission id -> code map after a permission changes."""
+    global _codes_by_id_memo
+    _codes_by_id_memo = (0.0, {})
+    cache.delete(CODES_BY_ID_CACHE_KEY)
+
+
+def encode_permission_bitmap(codes) -> str:
+    """Pack permission codes into a hex bitmap where bit N is Permission.id N."""
+    bitmap = 0
+    for permission_id in Permission.objects.filter(code__in=codes).values_list("id", flat=True):
+        bitmap |= 1 << permission_id
+    return format(bitmap, "x")
+
+
+def _from_token_claims(claims: dict) -> EffectivePermissions:
+    bitmap = int(claims.get("perms") or "0", 16)
+    codes_by_id = _permission_codes_by_id()
+    if bitmap.bit_length() - 1 > max(codes_by_id, default=0):
+        # Issued after a permission was added that this process has not seen.
+        forget_permission_codes()
+        codes_by_id = _permission_codes_by_id()
+    codes = frozenset(
+        code for permission_id, code in codes_by_id.items()
+        if bitmap >> permission_id & 1
+    )
+    return EffectivePermissions(bool(claims.get("perm_admin")), codes)
+
+
+def _permission_codes_by_id() -> dict:
+    global _codes_by_id_memo
+    loaded_at, codes_by_id = _codes_by_id_memo
+    if codes_by_id and time.monotonic() - loaded_at < CODES_BY_ID_TTL_SECONDS:
+        return codes_by_id
+
+    codes_by_id = cache.get(CODES_BY_ID_CACHE_KEY)
+    if codes_by_id is None:
+        codes_by_id = dict(Permission.objects.values_list("id", "code"))
+        cache.set(CODES_BY_ID_CACHE_KEY, codes_by_id, CODES_BY_ID_TTL_SECONDS)
+    _codes_by_id_memo = (time.monotonic(), codes_by_id)
+    return codes_by_id
+
+
+def _load_effective_permissions(user_id) -> EffectivePermissions:
+    is_admin = False
+    codes = set()
+    rows = UserRole.objects.filter(user_id=user_id).values_list("role__name", "role__permissions__code")
+    for role_name, code in rows:
+        if role_name.lower() == "admin":
+            is_admin = True
+        if code is not None:
+            codes.add(code)
+    return EffectivePermissions(is_admin, frozenset(codes))
+
+
+def _user_cache_key(user_id, version) -> str:
+    return f"rbac:perms:{user_id}:{version}"
+
+
+def _cache_ttl() -> int:
+    return getattr(settings, "RBAC_PERMISSION_CACHE_TTL_SECONDS", 300)
@@ -0,0 +1,73 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from rbac.models import Permission, Role, RolePermission, UserRole
+from rbac.services.permission_cache import (
+    bump_permissions_version,
+    forget_permission_codes,
+    forget_user_permissions,
+)
+
+User = get_user_model()
+
+# Each change bumps the permissions_version of the users it can affect
+# (see rbac.services.permission_cache); nobody else's cache is touched.
+
+
+@receiver(post_save, sender=UserRole)
+@receiver(post_delete, sender=UserRole)
+def invalidate_permissions_on_user_role_change(sender, instance, **kwargs):
+    bump_permissions_version(User.objects.filter(pk=instance.user_id))
+
+
+@receiver(post_save, sender=RolePermission)
+@receiver(post_delete, sender=RolePermission)
+def invalidate_permissions_on_role_permission_change(sender, instance, **kwargs):
+    bump_permissions_version(User.objects.filter(roles=instance.role_id))
+
+
+@receiver(post_save, sender=Role)
+@receiver(pre_delete, sender=Role)
+def invalidate_permissions_on_role_change(sender, instance, **kwargs):
+    # Renaming a role to or from "admin" changes what it grants.
+    bump_permissions_version(User.objects.filter(roles=instance))
+
+
+@receiver(post_save, sender=Permission)
+@receiver(pre_delete, sender=Permission)
+def invalidate_permissions_on_permission_change(sender, instance, **kwargs):
+    forget_permission_codes()
+    bump_permissions_version(User.objects.filter(roles__permissions=instance))
+
+
+@receiver(m2m_changed, sender=Role.permissions.through)
+def invalidate_permissions_on_role_permissions_m2m_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    if not reverse:
+        users = User.objects.filter(roles=instance)
+    elif action == "pre_clear":
+        users = User.objects.filter(roles__permissions=instance)
+    else:
+        users = User.objects.filter(roles__in=pk_set)
+    bump_permissions_version(users)
+
+
+@receiver(m2m_changed, sender=User.roles.through)
+def invalidate_permissions_on_user_roles_m2m_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    if not reverse:
+        users = User.objects.filter(pk=instance.pk)
+    elif action == "pre_clear":
+        users = User.objects.filter(roles=instance)
+    else:
+        users = User.objects.filter(pk__in=pk_set)
+    bump_permissions_version(users)
+
+
+@receiver(post_save, sender=User)
+def forget_permissions_on_user_created(sender, instance, created, **kwargs):
+    if created:
+        forget_user_permissions(instance)
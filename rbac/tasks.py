@@ -0,0 +1,39 @@
+import logging
+
+from celery import shared_task
+from django.conf import settings
+from django.utils.dateparse import parse_datetime
+
+from rbac.models import AuditLog
+from rbac.services.audit import audit_logs_written
+from rbac.services.audit_partitions import archive_expired_audit_logs, ensure_future_partitions
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=10)
+def write_audit_log_batch(self, rows: list[dict]):
+    """
+    Write a batch of committed audit entries (see rbac.services.audit) with
+    a single bulk INSERT, keeping the created_at each entry was recorded with.
+    """
+    try:
+        entries = AuditLog.objects.bulk_create(
+            [AuditLog(**{**row, "created_at": parse_datetime(row["created_at"])}) for row in rows]
+        )
+    except Exception as exc:
+        logger.warning("Audit log batch of %s entries failed, retrying: %s", len(rows), exc)
+        raise self.retry(exc=exc)
+    audit_logs_written.send(sender=AuditLog, entries=entries)
+
+
+@shared_task
+def maintain_audit_partitions():
+    """
+    Periodic audit log maintenance (the manage_audit_partitions command):
+    create upcoming monthly partitions and archive expired months.
+    """
+    created = ensure_future_partitions(settings.AUDIT_LOG_PARTITION_MONTHS_AHEAD)
+    archived = archive_expired_audit_logs(settings.AUDIT_LOG_RETENTION_MONTHS)
+    logger.info("Audit partitions maintained (%s created, %s archived)", len(created), len(archived))
+    return {"created": created, "archived": archived}
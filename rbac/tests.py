@@ -1,12 +1,26 @@
-from django.test import TestCase
+import gzip
+import json
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
 
 # Create your tests here.
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import transaction
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
 
-from rbac.models import Role, Permission, UserRole, RolePermission
+from rbac.models import AuditLog, Role, Permission, UserRole, RolePermission
 from rbac.permissions import user_has_permission
+from rbac.services.audit import create_audit_log
+from rbac.services.permission_cache import get_effective_permissions
+from rbac.tasks import maintain_audit_partitions, write_audit_log_batch
 
 
 class RBACApiTests(APITestCase):
@@ -143,4 +157,253 @@ class RBACApiTests(APITestCase):
         self.normal_user.is_staff = True
         self.normal_user.save(update_fields=["is_staff"])
 
-        self.assertFalse(user_has_permission(self.normal_user, "adjust_inventory"))
\ No newline at end of file
+        self.assertFalse(user_has_permission(self.normal_user, "adjust_inventory"))
+
+@override_settings(RBAC_PERMISSION_CACHE_TTL_SECONDS=300)
+class EffectivePermissionCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user = get_user_model().objects.create_user(
+            username="cashier1",
+            email="cashier@example.com",
+            password="pass1234",
+        )
+        self.permission = Permission.objects.create(code="record_sale", action="create")
+        self.role = Role.objects.create(name="cashier")
+        self.role.permissions.add(self.permission)
+        UserRole.objects.create(user=self.user, role=self.role)
+        self.user.refresh_from_db()
+
+    def test_repeated_checks_do_not_query(self):
+        self.assertTrue(user_has_permission(self.user, "record_sale"))
+
+        with self.assertNumQueries(0):
+            self.assertTrue(user_has_permission(self.user, "record_sale"))
+            self.assertFalse(user_has_permission(self.user, "adjust_inventory"))
+
+    def test_shared_cache_serves_fresh_user_instances(self):
+        user_has_permission(self.user, "record_sale")
+        reloaded = get_user_model().objects.get(pk=self.user.pk)
+
+        with self.assertNumQueries(0):
+            self.assertTrue(user_has_permission(reloaded, "record_sale"))
+
+    def test_granting_role_permission_invalidates_cache(self):
+        self.assertFalse(user_has_permission(self.user, "adjust_inventory"))
+
+        self.role.permissions.add(Permission.objects.create(code="adjust_inventory", action="update"))
+        self.user.refresh_from_db()
+
+        self.assertTrue(user_has_permission(self.user, "adjust_inventory"))
+
+    def test_revoking_user_role_invalidates_cache(self):
+        self.assertTrue(user_has_permission(self.user, "record_sale"))
+
+        UserRole.objects.filter(user=self.user, role=self.role).delete()
+        self.user.refresh_from_db()
+
+        self.assertFalse(user_has_permission(self.user, "record_sale"))
+
+    def test_changes_only_bump_affected_users(self):
+        other = get_user_model().objects.create_user(username="stocker", password="pass1234")
+        version = get_user_model().objects.get(pk=self.user.pk).permissions_version
+
+        UserRole.objects.create(user=other, role=Role.objects.create(name="stocker"))
+        self.role.permissions.add(Permission.objects.create(code="void_sale", action="delete"))
+
+        self.user.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(self.user.permissions_version, version + 1)
+        self.assertEqual(other.permissions_version, 1)
+
+    def test_admin_role_grants_every_permission(self):
+        admin_role = Role.objects.create(name="Admin")
+        self.user.roles.add(admin_role)
+        self.user.refresh_from_db()
+
+        self.assertTrue(get_effective_permissions(self.user).is_admin)
+        self.assertTrue(user_has_permission(self.user, "anything"))
+
+
+@override_settings(RBAC_EMBED_PERMISSIONS_IN_TOKEN=True)
+class PermissionTokenClaimsTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user = get_user_model().objects.create_user(
+            username="cashier2",
+            email="cashier2@example.com",
+            password="pass1234",
+        )
+        self.role = Role.objects.create(name="cashier")
+        self.role.permissions.add(Permission.objects.create(code="record_sale", action="create"))
+        UserRole.objects.create(user=self.user, role=self.role)
+
+    def _login(self):
+        res = self.client.post(
+            "/api/v1/auth/login/",
+            {"username": "cashier2", "password": "pass1234"},
+            format="json",
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data["token"]["access"]
+
+    def _check(self, access, code):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+        return self.client.get(f"/api/v1/rbac/check-permission/?code={code}")
+
+    def test_access_token_carries_permission_claims(self):
+        token = AccessToken(self._login())
+
+        self.user.refresh_from_db()
+        self.assertEqual(token["perm_ver"], self.user.permissions_version)
+        self.assertFalse(token["perm_admin"])
+        permission_id = Permission.objects.get(code="record_sale").id
+        self.assertTrue(int(token["perms"], 16) >> permission_id & 1)
+
+    def test_current_claims_answer_without_loading_roles(self):
+        access = self._login()
+
+        with patch("rbac.services.permission_cache._load_effective_permissions") as load:
+            granted = self._check(access, "record_sale")
+            denied = self._check(access, "adjust_inventory")
+
+        load.assert_not_called()
+        self.assertTrue(granted.data["has_permission"])
+        self.assertFalse(denied.data["has_permission"])
+
+    def test_stale_claims_fall_back_to_database(self):
+        access = self._login()
+
+        UserRole.objects.filter(user=self.user).delete()
+
+        self.assertFalse(self._check(access, "record_sale").data["has_permission"])
+
+    def test_other_users_changes_keep_claims_current(self):
+        access = self._login()
+        newcomer = get_user_model().objects.create_user(username="newcomer", password="pass1234")
+        UserRole.objects.create(user=newcomer, role=Role.objects.create(name="stocker"))
+
+        with patch("rbac.services.permission_cache._load_effective_permissions") as load:
+            self.assertTrue(self._check(access, "record_sale").data["has_permission"])
+
+        load.assert_not_called()
+
+
+class BufferedAuditLogTests(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="auditor",
+            email="auditor@example.com",
+            password="pass1234",
+        )
+
+    def test_entries_are_written_in_one_insert_after_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            create_audit_log(actor=self.user, action="sale_recorded", entity=self.user)
+            create_audit_log(actor=self.user, action="refund_processed")
+            self.assertFalse(AuditLog.objects.exists())
+
+        with self.assertNumQueries(1):
+            for callback in callbacks:
+                callback()
+
+        self.assertEqual(
+            list(AuditLog.objects.order_by("id").values_list("action", flat=True)),
+            ["sale_recorded", "refund_processed"],
+        )
+        self.assertEqual(AuditLog.objects.get(action="sale_recorded").entity_object_id, str(self.user.pk))
+
+    def test_entries_from_rolled_back_savepoint_are_discarded(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            create_audit_log(actor=self.user, action="sale_recorded")
+            try:
+                with transaction.atomic():
+                    create_audit_log(actor=self.user, action="refund_processed")
+                    raise RuntimeError("abort refund")
+            except RuntimeError:
+                pass
+
+        self.assertEqual(list(AuditLog.objects.values_list("action", flat=True)), ["sale_recorded"])
+
+    @override_settings(AUDIT_LOG_ASYNC=True, AUDIT_LOG_BATCH_SIZE=2)
+    def test_async_mode_hands_batches_to_celery(self):
+        with patch("rbac.tasks.write_audit_log_batch.delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                for _ in range(3):
+                    create_audit_log(actor=self.user, action="sale_recorded", metadata={"total": "1.00"})
+
+        self.assertFalse(AuditLog.objects.exists())
+        self.assertEqual([len(call.args[0]) for call in delay.call_args_list], [2, 1])
+        self.assertEqual(delay.call_args_list[0].args[0][0]["metadata"], {"total": "1.00"})
+
+    @override_settings(AUDIT_LOG_ASYNC=True)
+    def test_async_batches_keep_recorded_timestamps(self):
+        with patch("rbac.tasks.write_audit_log_batch.delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                create_audit_log(actor=self.user, action="sale_recorded")
+        rows = json.loads(json.dumps(delay.call_args.args[0]))
+        recorded_at = rows[0]["created_at"]
+
+        # The worker picks the batch up later.
+        with patch("django.utils.timezone.now", return_value=timezone.now() + timedelta(minutes=5)):
+            write_audit_log_batch.run(rows)
+
+        self.assertEqual(AuditLog.objects.get().created_at.isoformat(), recorded_at)
+
+
+class AuditLogArchiveCommandTests(TestCase):
+
+    def setUp(self):
+        self.uploads = {}
+
+        def upload(file_obj, key):
+            self.uploads[key] = gzip.decompress(file_obj.read()).decode("utf-8")
+
+        patcher = patch("rbac.services.audit_partitions.get_storage_adapter")
+        self.addCleanup(patcher.stop)
+        patcher.start().return_value.upload_fileobj.side_effect = upload
+
+    def _log_at(self, action, created_at):
+        log = AuditLog.objects.create(action=action, metadata={"total": "1.00"})
+        AuditLog.objects.filter(pk=log.pk).update(created_at=created_at)
+        return log
+
+    def test_archives_and_removes_months_past_retention(self):
+        now = timezone.now()
+        old = self._log_at("sale_recorded", now - timedelta(days=500))
+        recent = self._log_at("refund_processed", now - timedelta(days=5))
+
+        call_command("manage_audit_partitions", retention_months=12, stdout=StringIO())
+
+        self.assertEqual(list(AuditLog.objects.values_list("id", flat=True)), [recent.id])
+        self.assertEqual(len(self.uploads), 1)
+        key, content = next(iter(self.uploads.items()))
+        self.assertTrue(key.startswith("audit-archive/rbac_auditlog_p"))
+        self.assertTrue(key.endswith(".jsonl.gz"))
+        row = json.loads(content.splitlines()[0])
+        self.assertEqual(row["id"], old.id)
+        self.assertEqual(row["action"], "sale_recorded")
+        self.assertEqual(row["metadata"], {"total": "1.00"})
+
+    def test_nothing_to_archive_within_retention(self):
+        self._log_at("sale_recorded", timezone.now())
+
+        call_command("manage_audit_partitions", retention_months=12, stdout=StringIO())
+
+        self.assertEqual(AuditLog.objects.count(), 1)
+        self.assertEqual(self.uploads, {})
+
+    @override_settings(AUDIT_LOG_RETENTION_MONTHS=12)
+    def test_beat_task_archives_expired_months(self):
+        self._log_at("sale_recorded", timezone.now() - timedelta(days=500))
+        recent = self._log_at("refund_processed", timezone.now())
+
+        summary = maintain_audit_partitions()
+
+        self.assertEqual(list(AuditLog.objects.values_list("id", flat=True)), [recent.id])
+        self.assertEqual(summary["archived"], list(self.uploads))
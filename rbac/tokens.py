@@ -0,0 +1,26 @@
+from django.conf import settings
+
+from rbac.services.permission_cache import encode_permission_bitmap, get_effective_permissions
+
+
+def add_permission_claims(token, user):
+    """
+    Stamp the user's effective RBAC permissions onto a simplejwt token:
+
+        perms       hex bitmap, bit N set when the user holds Permission.id N
+        perm_admin  true when an RBAC admin role grants everything
+        perm_ver    the user's permissions_version the claims were issued at
+
+    Claims set on a refresh token are copied into its access tokens. They are
+    only trusted while perm_ver matches the user's current permissions_version;
+    a change to that user's roles or their permissions makes them stale and
+    checks fall back to the database. Other users' changes do not.
+    """
+    if not getattr(settings, "RBAC_EMBED_PERMISSIONS_IN_TOKEN", False):
+        return token
+
+    effective = get_effective_permissions(user)
+    token["perms"] = encode_permission_bitmap(effective.codes)
+    token["perm_admin"] = effective.is_admin
+    token["perm_ver"] = user.permissions_version
+    return token
@@ -11,7 +11,7 @@ from .serializers import (
     RolePermissionAssignmentSerializer, UserRoleAssignmentSerializer,
     UserWithRolesSerializer
 )
-from .permissions import IsAdminUser, HasPermission
+from .permissions import IsAdminUser, HasPermission, user_has_permission
 from .services.audit import create_audit_log
 
 logger = logging.getLogger(__name__)
@@ -254,14 +254,7 @@ class CheckPermissionView(APIView):
         if not permission_code:
             return Response({'error': 'Permission code required'}, status=400)
 
-        if request.user.is_admin:
-            has_perm = True
-        else:
-            user_permissions = set()
-            for role in request.user.roles.all():
-                for perm in role.permissions.all():
-                    user_permissions.add(perm.code)
-            has_perm = permission_code in user_permissions
+        has_perm = user_has_permission(request.user, permission_code)
 
         return Response({
             'permission': permission_code,
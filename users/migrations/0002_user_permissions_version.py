@@ -0,0 +1,18 @@
+# Generated by Django 5.2.11 on 2026-10-18 16:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='permissions_version',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text="Bumped whenever the user's effective RBAC permissions may change", verbose_name='permissions version'),
+        ),
+    ]
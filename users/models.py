@@ -37,6 +37,13 @@ class User(AbstractUser):
         auto_now=True
     )
 
+    permissions_version = models.PositiveIntegerField(
+        _('permissions version'),
+        default=0,
+        editable=False,
+        help_text=_('Bumped whenever the user\'s effective RBAC permissions may change')
+    )
+
     roles = models.ManyToManyField(
         "rbac.Role",
         through='rbac.UserRole',
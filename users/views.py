@@ -10,6 +10,7 @@ from rest_framework_simplejwt.tokens import RefreshToken
 from rbac.models import UserRole
 from rbac.permissions import user_has_permission
 from rbac.services.audit import create_audit_log
+from rbac.tokens import add_permission_claims
 
 from .models import User
 from .serializers import (
@@ -24,7 +25,7 @@ logger = logging.getLogger(__name__)
 
 
 def get_tokens_for_user(user):
-    refresh = RefreshToken.for_user(user)
+    refresh = add_permission_claims(RefreshToken.for_user(user), user)
     return {
         'refresh': str(refresh),
         'access': str(refresh.access_token),